@@ -230,9 +230,43 @@ CREATE TABLE SupportTickets (
   status        ENUM('open', 'in_progress', 'closed') DEFAULT 'open',
   created_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   
-  FOREIGN KEY (user_id) REFERENCES Users(user_id)
+  FOREIGN KEY (user_id) REFERENCES Users(user_id),
+  INDEX idx_user_created (user_id, created_at),
+  INDEX idx_status_type_created (status, type, created_at) -- 상담원 큐 (keyset paging)
+);
+
+-- 16-1) SupportTicketCounts: 상태/유형별 티켓 수 (트리거로 유지되는 카운터)
+CREATE TABLE SupportTicketCounts (
+  status       ENUM('open', 'in_progress', 'closed') NOT NULL,
+  type         ENUM('bug', 'feature', 'account', 'other') NOT NULL,
+  ticket_count INT NOT NULL DEFAULT 0,
+
+  PRIMARY KEY (status, type)
 );
 
+INSERT INTO SupportTicketCounts (status, type)
+SELECT s.status, t.type
+FROM (SELECT 'open' AS status UNION ALL SELECT 'in_progress' UNION ALL SELECT 'closed') s
+CROSS JOIN (SELECT 'bug' AS type UNION ALL SELECT 'feature' UNION ALL SELECT 'account' UNION ALL SELECT 'other') t;
+
+CREATE TRIGGER trg_support_counts_ins AFTER INSERT ON SupportTickets FOR EACH ROW
+  UPDATE SupportTicketCounts
+  SET ticket_count = ticket_count + 1
+  WHERE status = NEW.status AND type = NEW.type;
+
+CREATE TRIGGER trg_support_counts_upd AFTER UPDATE ON SupportTickets FOR EACH ROW
+  UPDATE SupportTicketCounts
+  SET ticket_count = ticket_count
+                     + (status = NEW.status AND type = NEW.type)
+                     - (status = OLD.status AND type = OLD.type)
+  WHERE (status = NEW.status AND type = NEW.type)
+     OR (status = OLD.status AND type = OLD.type);
+
+CREATE TRIGGER trg_support_counts_del AFTER DELETE ON SupportTickets FOR EACH ROW
+  UPDATE SupportTicketCounts
+  SET ticket_count = ticket_count - 1
+  WHERE status = OLD.status AND type = OLD.type;
+
 -- 17) Movies: 영화 (Videos와 별도 관리)
 -- 테이블명을 단수(Movie)에서 복수(Movies)로 통일했습니다.
 CREATE TABLE Movies (
@@ -257,4 +291,21 @@ CREATE TABLE MoviePurchases (
   
   FOREIGN KEY (user_id) REFERENCES Users(user_id),
   FOREIGN KEY (movie_id) REFERENCES Movies(movie_id)
-);
\ No newline at end of file
+);
+-- ==========================================
+-- 6. 통계 (Analytics)
+-- ==========================================
+
+-- 19) VideoStatsRollup: 영상별 조회/좋아요/댓글 집계 (analytics.py rollup job이 채움)
+-- 시간 단위(hour) → 일 단위(day) → 월 단위(month)로 오래된 구간을 다운샘플링
+CREATE TABLE VideoStatsRollup (
+  video_id     INT NOT NULL,
+  granularity  ENUM('hour', 'day', 'month') NOT NULL,
+  bucket_start DATETIME NOT NULL,
+  views        INT DEFAULT 0,
+  likes        INT DEFAULT 0,
+  comments     INT DEFAULT 0,
+
+  PRIMARY KEY (video_id, granularity, bucket_start),
+  FOREIGN KEY (video_id) REFERENCES Videos(video_id)
+);
@@ -0,0 +1,241 @@
+# affinity.py
+"""Per-user content-type and creator affinity (``UserAffinity``).
+
+Each user has one row holding two small score vectors, maintained as watch
+events arrive (``POST /watch`` calls ``record_watch`` in the same
+transaction as the ``WatchHistory`` upsert):
+
+* types    — score per ``type_id``, half-life ``TYPE_HALF_LIFE_DAYS``
+* creators — score per uploader, half-life ``CREATOR_HALF_LIFE_DAYS``,
+  only the ``MAX_CREATORS`` best kept
+
+A watch adds 1 to its type and creator. Scores are stored as of
+``ref_time`` and decayed by ``0.5 ** (age / half_life)`` whenever they are
+read or updated, so nothing has to touch idle rows. The vectors are packed
+``(id, float32)`` pairs in ``VARBINARY`` columns — a few hundred bytes per
+user at most.
+
+``/ads/recommend`` and ``/creators/top`` read the row instead of grouping
+the user's whole ``WatchHistory``. Users without a row (no watch since the
+table was created and not backfilled) are scored from ``WatchHistory`` on
+the fly with the same decay. Backfill / rebuild after bulk loads::
+
+    python affinity.py rebuild                 # every user with history
+    python affinity.py rebuild --users 1 42    # a few users
+
+A rebuild sees one event per (user, video) — ``WatchHistory`` keeps only the
+latest watch — whereas live updates count every re-watch.
+"""
+import argparse
+import struct
+from datetime import datetime
+
+from db import get_db
+
+TYPE_HALF_LIFE_DAYS = 3.5
+CREATOR_HALF_LIFE_DAYS = 30.0
+MAX_CREATORS = 32
+
+_TYPE_PAIR = struct.Struct("<Bf")
+_CREATOR_PAIR = struct.Struct("<If")
+
+# 한 번에 재계산할 사용자 id 구간
+REBUILD_CHUNK = 5_000
+
+
+class Profile:
+    """Decayed scores as of ``ref_time``: ``{type_id: score}``, ``{creator_id: score}``."""
+
+    __slots__ = ("types", "creators", "ref_time")
+
+    def __init__(self, types=None, creators=None, ref_time=None):
+        self.types = types or {}
+        self.creators = creators or {}
+        self.ref_time = ref_time or datetime.now()
+
+    def decayed(self, now=None):
+        """Copy of the profile with every score decayed to ``now``."""
+        now = now or datetime.now()
+        age_days = max((now - self.ref_time).total_seconds(), 0.0) / 86400.0
+        tf = 0.5 ** (age_days / TYPE_HALF_LIFE_DAYS)
+        cf = 0.5 ** (age_days / CREATOR_HALF_LIFE_DAYS)
+        return Profile(
+            {k: v * tf for k, v in self.types.items()},
+            {k: v * cf for k, v in self.creators.items()},
+            now,
+        )
+
+    def add(self, type_id, creator_id, weight=1.0):
+        if type_id is not None:
+            self.types[type_id] = self.types.get(type_id, 0.0) + weight
+        if creator_id is not None:
+            self.creators[creator_id] = self.creators.get(creator_id, 0.0) + weight
+        if len(self.creators) > MAX_CREATORS:
+            self.creators = dict(top(self.creators, MAX_CREATORS))
+
+    def top_type(self):
+        """``(type_id, score)`` of the strongest type, or None."""
+        best = top(self.types, 1)
+        return best[0] if best else None
+
+    def top_creators(self, n):
+        return [cid for cid, _ in top(self.creators, n)]
+
+
+def top(scores, n):
+    """``n`` best ``(id, score)`` pairs, ties broken by the smaller id."""
+    return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+
+
+def pack(scores, pair):
+    return b"".join(pair.pack(k, v) for k, v in scores.items())
+
+
+def unpack(blob, pair):
+    return {k: v for k, v in pair.iter_unpack(bytes(blob or b""))}
+
+
+def _from_row(row):
+    return Profile(
+        unpack(row["type_scores"], _TYPE_PAIR),
+        unpack(row["creator_scores"], _CREATOR_PAIR),
+        row["ref_time"],
+    )
+
+
+def _save(cur, user_id, profile):
+    cur.execute("""
+        INSERT INTO UserAffinity (user_id, type_scores, creator_scores, ref_time)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            type_scores = VALUES(type_scores),
+            creator_scores = VALUES(creator_scores),
+            ref_time = VALUES(ref_time)
+    """, (user_id, pack(profile.types, _TYPE_PAIR), pack(profile.creators, _CREATOR_PAIR), profile.ref_time))
+
+
+# ------------------------------------------------------------
+# from WatchHistory (backfill / users without a row)
+# ------------------------------------------------------------
+_DECAYED_SUM = "SUM(POW(0.5, TIMESTAMPDIFF(SECOND, wh.watched_at, %s) / %s))"
+
+
+def _score_history(cur, first_user, last_user, now):
+    """``{user_id: Profile}`` computed from ``WatchHistory`` for a user id range."""
+    profiles = {}
+    for column, half_life, attr in (
+        ("v.type_id", TYPE_HALF_LIFE_DAYS, "types"),
+        ("v.user_id", CREATOR_HALF_LIFE_DAYS, "creators"),
+    ):
+        cur.execute(f"""
+            SELECT wh.user_id, {column} AS k, {_DECAYED_SUM} AS score
+            FROM WatchHistory wh
+            JOIN Videos v ON v.video_id = wh.video_id
+            WHERE wh.user_id BETWEEN %s AND %s
+            GROUP BY wh.user_id, {column}
+        """, (now, half_life * 86400, first_user, last_user))
+        for r in cur.fetchall():
+            p = profiles.get(r["user_id"])
+            if p is None:
+                p = profiles[r["user_id"]] = Profile(ref_time=now)
+            getattr(p, attr)[r["k"]] = float(r["score"])
+
+    for p in profiles.values():
+        if len(p.creators) > MAX_CREATORS:
+            p.creators = dict(top(p.creators, MAX_CREATORS))
+    return profiles
+
+
+# ------------------------------------------------------------
+# read / write side
+# ------------------------------------------------------------
+def load(cur, user_id, now=None):
+    """The user's profile decayed to ``now`` (empty if they never watched).
+
+    ``cur`` must be a dictionary cursor.
+    """
+    now = now or datetime.now()
+    cur.execute("""
+        SELECT type_scores, creator_scores, ref_time
+        FROM UserAffinity
+        WHERE user_id = %s
+    """, (user_id,))
+    row = cur.fetchone()
+    if row is not None:
+        return _from_row(row).decayed(now)
+    # 아직 행이 없는 사용자 — 기록에서 바로 계산 (저장은 하지 않음)
+    return _score_history(cur, user_id, user_id, now).get(int(user_id)) or Profile(ref_time=now)
+
+
+def record_watch(cur, user_id, type_id, creator_id, now=None):
+    """Add one watch to the user's profile, inside the caller's transaction.
+
+    The row is locked (``FOR UPDATE``) for the read-modify-write, so
+    concurrent watches of one user are applied one after the other.
+    """
+    now = now or datetime.now()
+    # 첫 시청 두 건이 동시에 들어와도 한쪽이 덮어쓰지 않도록 빈 행부터 만들고 잠근다
+    cur.execute("""
+        INSERT IGNORE INTO UserAffinity (user_id, type_scores, creator_scores, ref_time)
+        VALUES (%s, '', '', %s)
+    """, (user_id, now))
+    cur.execute("""
+        SELECT type_scores, creator_scores, ref_time
+        FROM UserAffinity
+        WHERE user_id = %s
+        FOR UPDATE
+    """, (user_id,))
+    profile = _from_row(cur.fetchone()).decayed(now)
+    profile.add(type_id, creator_id)
+    _save(cur, user_id, profile)
+
+
+def rebuild(user_ids=None, now=None):
+    """Recompute profiles from ``WatchHistory``; returns the number of rows written.
+
+    Without ``user_ids`` every user is rebuilt in id ranges of
+    ``REBUILD_CHUNK``, one transaction per range.
+    """
+    now = now or datetime.now()
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    written = 0
+    try:
+        if user_ids:
+            ranges = [(u, u) for u in sorted(set(user_ids))]
+        else:
+            cur.execute("SELECT MIN(user_id) AS lo, MAX(user_id) AS hi FROM WatchHistory")
+            bounds = cur.fetchone()
+            if bounds["lo"] is None:
+                return 0
+            ranges = [(lo, min(lo + REBUILD_CHUNK - 1, bounds["hi"]))
+                      for lo in range(bounds["lo"], bounds["hi"] + 1, REBUILD_CHUNK)]
+
+        for first, last in ranges:
+            profiles = _score_history(cur, first, last, now)
+            for user_id, profile in profiles.items():
+                _save(cur, user_id, profile)
+            conn.commit()
+            written += len(profiles)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    return written
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("rebuild", help="recompute profiles from WatchHistory")
+    r.add_argument("--users", type=int, nargs="+", help="only these user ids")
+    args = ap.parse_args()
+
+    n = rebuild(args.users)
+    print(f"rebuilt {n} profiles")
+
+
+if __name__ == "__main__":
+    main()
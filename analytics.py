@@ -0,0 +1,217 @@
+# analytics.py
+"""Per-video rollups of views / likes / comments (``VideoStatsRollup``).
+
+The rollup job deletes the hourly buckets of its window and the daily
+buckets of every day the window touches, then rebuilds both from the raw
+interaction rows with one ``INSERT ... SELECT ... GROUP BY`` per source
+table and granularity. Re-running a window is idempotent: a bucket whose
+source rows went away (an unlike, a deleted comment, a re-watch) is
+cleared too. Hourly buckets are only written inside the hourly retention
+period and daily ones only for days not yet folded into months, so a
+backfill never rebuilds what retention already downsampled. The
+``(granularity, bucket_start)`` range deletes and retention reads go through
+``idx_granularity_bucket`` (migration 0006), not a scan of the whole table.
+
+Sources (and their caveats):
+
+* views    — ``WatchHistory.watched_at`` (one row per user/video, so a
+  re-watch moves the view into the newer bucket)
+* likes    — ``VideoLikes.created_at`` where ``is_dislike = 0``
+* comments — ``Comments.created_at``
+
+Retention downsamples: hourly buckets older than ``HOURLY_RETENTION_DAYS``
+are dropped (their daily buckets already exist), and daily buckets of whole
+months older than ``DAILY_RETENTION_DAYS`` are folded into monthly buckets.
+Monthly series are read as day buckets summed per month plus the folded
+month buckets (``SERIES_SOURCES``), so recent months are not empty.
+
+Run from cron, e.g. every 15 minutes::
+
+    python analytics.py rollup --hours 2
+    python analytics.py retention          # once a day
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from db import get_db
+
+HOURLY_RETENTION_DAYS = 7
+DAILY_RETENTION_DAYS = 365
+
+GRANULARITIES = ("hour", "day", "month")
+
+# SQL expressions that truncate a timestamp column to the start of its hour / day / month
+_HOUR_OF = "TIMESTAMP(DATE({col}), MAKETIME(HOUR({col}), 0, 0))"
+_DAY_OF = "TIMESTAMP(DATE({col}))"
+_MONTH_OF = "TIMESTAMP(DATE_SUB(DATE({col}), INTERVAL DAYOFMONTH({col}) - 1 DAY))"
+
+# series granularity -> (stored granularities read, bucket expression over them).
+# 월 시리즈는 아직 접히지 않은 일 버킷을 달별로 더하고, 접힌 달 버킷은 그대로 (겹치는 날은 없다)
+SERIES_SOURCES = {
+    "hour": (("hour",), "{col}"),
+    "day": (("day",), "{col}"),
+    "month": (("day", "month"), _MONTH_OF),
+}
+
+_SOURCES = (
+    ("views", "WatchHistory", "watched_at", ""),
+    ("likes", "VideoLikes", "created_at", "AND is_dislike = 0"),
+    ("comments", "Comments", "created_at", ""),
+)
+
+
+def truncate(dt, granularity):
+    """Start of the bucket that contains ``dt``."""
+    if granularity == "hour":
+        return dt.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_bucket(dt, granularity):
+    if granularity == "hour":
+        return dt + timedelta(hours=1)
+    if granularity == "day":
+        return dt + timedelta(days=1)
+    return (dt.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+# ------------------------------------------------------------
+# rollup job
+# ------------------------------------------------------------
+def retention_cutoffs(now=None):
+    """``(hour, day)``: hourly buckets are kept from ``hour`` on, daily ones from ``day`` on."""
+    now = now or datetime.now()
+    # 월 단위는 달 전체가 보존 기간을 넘긴 경우에만 접는다
+    return (
+        truncate(now - timedelta(days=HOURLY_RETENTION_DAYS), "day"),
+        truncate(now - timedelta(days=DAILY_RETENTION_DAYS), "month"),
+    )
+
+
+def run_rollup(start, end, now=None):
+    """Rebuild hourly buckets in ``[start, end)`` and the daily buckets of
+    every day the window touches (each clipped to its retention period)."""
+    start = truncate(start, "hour")
+    end = next_bucket(truncate(end, "hour"), "hour") if end != truncate(end, "hour") else end
+    hour_cutoff, day_cutoff = retention_cutoffs(now)
+
+    # 일 단위는 시간 버킷이 아니라 원본에서 — 시간 버킷이 이미 지워진 날도 온전히 다시 만든다
+    windows = (
+        ("hour", _HOUR_OF, max(start, hour_cutoff), end),
+        ("day", _DAY_OF, max(truncate(start, "day"), day_cutoff),
+         next_bucket(truncate(end - timedelta(microseconds=1), "day"), "day")),
+    )
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        for granularity, bucket_of, lo, hi in windows:
+            if lo >= hi:
+                continue
+            # 덮어쓰기만 하면 원본이 사라진 버킷(좋아요 취소, 댓글 삭제, 재시청)이 남는다
+            cur.execute("""
+                DELETE FROM VideoStatsRollup
+                WHERE granularity = %s AND bucket_start >= %s AND bucket_start < %s;
+            """, (granularity, lo, hi))
+            for column, table, ts_col, extra in _SOURCES:
+                bucket = bucket_of.format(col=ts_col)
+                cur.execute(f"""
+                    INSERT INTO VideoStatsRollup (video_id, granularity, bucket_start, {column})
+                    SELECT video_id, %s, {bucket}, COUNT(*)
+                    FROM {table}
+                    WHERE {ts_col} >= %s AND {ts_col} < %s {extra}
+                    GROUP BY video_id, {bucket}
+                    ON DUPLICATE KEY UPDATE {column} = VALUES({column});
+                """, (granularity, lo, hi))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def run_retention(now=None):
+    """Drop expired hourly buckets and fold old daily buckets into months."""
+    hour_cutoff, month_cutoff = retention_cutoffs(now)
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            DELETE FROM VideoStatsRollup
+            WHERE granularity = 'hour' AND bucket_start < %s;
+        """, (hour_cutoff,))
+
+        month_of = _MONTH_OF.format(col="bucket_start")
+        # 같은 트랜잭션에서 더하고 지우므로 다시 실행해도 이중 집계되지 않음
+        cur.execute(f"""
+            INSERT INTO VideoStatsRollup (video_id, granularity, bucket_start, views, likes, comments)
+            SELECT video_id, 'month', {month_of} AS month_start,
+                   SUM(views), SUM(likes), SUM(comments)
+            FROM VideoStatsRollup
+            WHERE granularity = 'day' AND bucket_start < %s
+            GROUP BY video_id, month_start
+            ON DUPLICATE KEY UPDATE
+                views = views + VALUES(views),
+                likes = likes + VALUES(likes),
+                comments = comments + VALUES(comments);
+        """, (month_cutoff,))
+        cur.execute("""
+            DELETE FROM VideoStatsRollup
+            WHERE granularity = 'day' AND bucket_start < %s;
+        """, (month_cutoff,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ------------------------------------------------------------
+# read side
+# ------------------------------------------------------------
+def fill_series(rows, start, end, granularity):
+    """Turn sparse ``{bucket_start: row}`` results into a dense series over
+    ``[start, end)`` with zero-filled gaps."""
+    by_bucket = {r["bucket_start"]: r for r in rows}
+    series = []
+    bucket = truncate(start, granularity)
+    while bucket < end:
+        r = by_bucket.get(bucket)
+        series.append({
+            "bucket": bucket.strftime('%Y-%m-%d %H:%M:%S'),
+            "views": int(r["views"]) if r else 0,
+            "likes": int(r["likes"]) if r else 0,
+            "comments": int(r["comments"]) if r else 0,
+        })
+        bucket = next_bucket(bucket, granularity)
+    return series
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("rollup", help="rebuild recent hourly/daily buckets")
+    r.add_argument("--hours", type=int, default=2, help="window size ending now")
+    r.add_argument("--since", help="explicit window start, 'YYYY-MM-DD HH:MM' (backfill)")
+    sub.add_parser("retention", help="downsample old buckets")
+    args = ap.parse_args()
+
+    now = datetime.now()
+    if args.cmd == "rollup":
+        start = datetime.fromisoformat(args.since) if args.since else now - timedelta(hours=args.hours)
+        run_rollup(start, now)
+        print(f"rolled up {start:%Y-%m-%d %H:%M} .. {now:%Y-%m-%d %H:%M}")
+    else:
+        run_retention(now)
+        print("retention applied")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,49 @@
 from flask import Flask
+import instrumentation
+import jobs
+import json_provider
+import metrics
+import moderation
+import profiler
+import recommend
+import search
+import trending
 from routes.subscriptions import bp as subscriptions_bp
 from routes.home import home_bp
 from routes.shorts import shorts_bp
 from routes.mypage import yt_bp
+from routes.movies import movies_bp
+from routes.support import support_bp
+from routes.admin import admin_bp
+from routes.search import search_bp
+from routes.videos import videos_bp
+from routes.notifications import notifications_bp
+from routes.reports import reports_bp
 
 
 def create_app():
     app = Flask(__name__)
+    json_provider.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
+    recommend.init_app(app)
+    search.init_app(app)
+    moderation.init_app(app)
+    jobs.init_app(app)
+    trending.init_app(app)
 
     app.register_blueprint(subscriptions_bp, url_prefix="/subscriptions")
     app.register_blueprint(home_bp, url_prefix='/')
     app.register_blueprint(shorts_bp, url_prefix='/')
     app.register_blueprint(yt_bp, url_prefix='/')
+    app.register_blueprint(movies_bp, url_prefix='/')
+    app.register_blueprint(support_bp, url_prefix="/support")
+    app.register_blueprint(admin_bp, url_prefix="/admin")
+    app.register_blueprint(search_bp, url_prefix='/')
+    app.register_blueprint(videos_bp, url_prefix='/')
+    app.register_blueprint(notifications_bp, url_prefix='/')
+    app.register_blueprint(reports_bp, url_prefix='/')
 
     return app
 
@@ -0,0 +1,381 @@
+# cache.py
+"""Read-through cache with tag-based invalidation.
+
+Every cached value carries a set of tags (``video:123``,
+``user:5:subscriptions``, ...). Write paths call ``invalidate(*tags)``
+after their commit, and every entry tagged with one of them is treated as a
+miss from then on — no key bookkeeping on the write side.
+
+Invalidation is clock based: the backend keeps a monotonically increasing
+counter, ``invalidate`` stamps each tag with the next value, and an entry
+is valid only while none of its tags carries a stamp newer than the clock
+read just before the value was loaded. A write that lands while a value is
+being loaded therefore still invalidates it, even when the tags are only
+known from the loaded value (``tags=lambda value: ...``). Tag stamps only
+need to outlive the longest TTL, so they expire instead of piling up.
+
+Backends (``CACHE_URL``):
+
+* unset      — in-process LRU bounded by ``CACHE_MAX_ENTRIES`` and
+  ``CACHE_MAX_BYTES`` (per worker; a write in one worker does not reach
+  the others, so keep TTLs short when running several)
+* redis://…  — shared Redis (``redis`` package), tags and clock included
+* off        — no caching, every call runs the loader (benchmark baselines)
+
+A loader that reads through a connection the caller already used (the
+route's cursor) reads the route's snapshot, which may predate the clock at
+load time; such callers pass ``loaded_at=cur.cache_clock`` — the clock
+``db.get_db`` read at checkout, before any snapshot on that connection —
+instead of letting the load read the clock itself.
+
+``SWRCache`` adds a soft TTL: past it the old value is still served while a
+background reload runs, and it stands in for a failed reload.
+
+Values are pickled in both backends, so callers always get their own copy
+and may modify it. Hits, misses and stale entries are counted per cache
+name in ``cache_requests_total``.
+"""
+import itertools
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+try:
+    import redis
+except ImportError:  # optional: only needed for CACHE_URL=redis://...
+    redis = None
+
+CACHE_URL = os.environ.get("CACHE_URL", "")
+MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))
+MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# upper bound for any Cache ttl; tag stamps are kept this long
+MAX_TTL = 3600
+
+
+class LRUBackend:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, blob)
+        self._bytes = 0
+        self._clock = itertools.count(1)
+        self._now = 0
+        self._tags = {}  # tag -> (stamp, drop_at)
+        self._next_prune = 0.0
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        out = []
+        with self._lock:
+            for key in keys:
+                item = self._entries.get(key)
+                if item is not None and item[0] <= now:
+                    self._drop(key)
+                    item = None
+                if item is None:
+                    out.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                out.append(item[1])
+        return out
+
+    def set(self, key, blob, ttl):
+        self.set_many({key: blob}, ttl)
+
+    def set_many(self, blobs, ttl):
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            for key, blob in blobs.items():
+                if len(blob) > self.max_bytes:
+                    continue
+                if key in self._entries:
+                    self._drop(key)
+                self._entries[key] = (expires_at, blob)
+                self._bytes += len(blob)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        _, blob = self._entries.pop(key)
+        self._bytes -= len(blob)
+
+    def clock(self):
+        with self._lock:
+            return self._now
+
+    def stamps(self, tags):
+        with self._lock:
+            return {t: self._tags.get(t, (0,))[0] for t in tags}
+
+    def invalidate(self, tags):
+        now = time.monotonic()
+        with self._lock:
+            for tag in tags:
+                self._now = next(self._clock)
+                self._tags[tag] = (self._now, now + MAX_TTL)
+            if now >= self._next_prune:
+                self._tags = {t: v for t, v in self._tags.items() if v[1] > now}
+                self._next_prune = now + 60
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "tags": len(self._tags)}
+
+
+class RedisBackend:
+    PREFIX = "cache:"
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError(f"CACHE_URL={url} needs the redis package: python -m pip install redis")
+        self._r = redis.Redis.from_url(url)
+        self._clock_key = self.PREFIX + "clock"
+
+    def get(self, key):
+        return self._r.get(self.PREFIX + "v:" + key)
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        return self._r.mget([self.PREFIX + "v:" + k for k in keys])
+
+    def set(self, key, blob, ttl):
+        self._r.set(self.PREFIX + "v:" + key, blob, ex=max(1, int(ttl)))
+
+    def set_many(self, blobs, ttl):
+        pipe = self._r.pipeline(transaction=False)
+        for key, blob in blobs.items():
+            pipe.set(self.PREFIX + "v:" + key, blob, ex=max(1, int(ttl)))
+        pipe.execute()
+
+    def clock(self):
+        return int(self._r.get(self._clock_key) or 0)
+
+    def stamps(self, tags):
+        tags = list(tags)
+        if not tags:
+            return {}
+        values = self._r.mget([self.PREFIX + "t:" + t for t in tags])
+        return {t: int(v or 0) for t, v in zip(tags, values)}
+
+    def invalidate(self, tags):
+        pipe = self._r.pipeline()
+        for tag in tags:
+            stamp = self._r.incr(self._clock_key)
+            pipe.set(self.PREFIX + "t:" + tag, stamp, ex=MAX_TTL)
+        pipe.execute()
+
+    def stats(self):
+        return {"backend": "redis", "clock": self.clock()}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend():
+    """The process-wide backend picked from ``CACHE_URL`` (None when off)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if CACHE_URL == "off":
+                    _backend = False
+                elif CACHE_URL.startswith(("redis://", "rediss://", "unix://")):
+                    _backend = RedisBackend(CACHE_URL)
+                else:
+                    _backend = LRUBackend()
+    return _backend or None
+
+
+def clock():
+    """The backend clock (0 when caching is off); see ``loaded_at``."""
+    b = backend()
+    return b.clock() if b is not None else 0
+
+
+def invalidate(*tags):
+    """Mark every entry tagged with any of ``tags`` stale. Call after commit."""
+    b = backend()
+    if b is None or not tags:
+        return
+    b.invalidate(tags)
+    metrics.CACHE_INVALIDATIONS.inc(amount=len(tags))
+
+
+class Cache:
+    """A named namespace in the shared backend with its own TTL."""
+
+    def __init__(self, name, ttl):
+        if ttl > MAX_TTL:
+            raise ValueError(f"ttl must be <= {MAX_TTL}s")
+        self.name = name
+        self.ttl = ttl
+
+    def _key(self, key):
+        if isinstance(key, tuple):
+            key = ":".join(str(k) for k in key)
+        return f"{self.name}:{key}"
+
+    def get_or_load(self, key, loader, tags=(), loaded_at=None):
+        """Return the cached value for ``key``, or call ``loader()`` and cache it.
+
+        ``tags`` is an iterable of tag strings, or a callable that receives
+        the loaded value and returns them. ``loaded_at`` is the clock to
+        stamp a load with when ``loader`` reads an older snapshot.
+        """
+        b = backend()
+        if b is None:
+            return loader()
+        full_key = self._key(key)
+
+        state, value = self._lookup(b, full_key)
+        metrics.CACHE_REQUESTS.inc((self.name, state))
+        if state == "hit":
+            return value
+        return self._load(b, full_key, loader, tags, loaded_at)
+
+    def _lookup(self, b, full_key):
+        """``("hit" | "stale" | "miss", value)`` — stale = a tag was invalidated."""
+        blob = b.get(full_key)
+        if blob is None:
+            return "miss", None
+        loaded_at, entry_tags, value = pickle.loads(blob)
+        if max(b.stamps(entry_tags).values(), default=0) <= loaded_at:
+            return "hit", value
+        return "stale", value
+
+    def _load(self, b, full_key, loader, tags, loaded_at=None):
+        if loaded_at is None:
+            loaded_at = b.clock()
+        value = loader()
+        entry_tags = tuple(tags(value) if callable(tags) else tags)
+        b.set(full_key, pickle.dumps((loaded_at, entry_tags, value), pickle.HIGHEST_PROTOCOL), self.ttl)
+        return value
+
+    def get_many(self, keys, loader, tags, loaded_at=None):
+        """Multi-get: ``{key: value}`` for ``keys``, loading all misses in one call.
+
+        ``loader(missing_keys)`` returns ``{key: value}`` for the keys that
+        exist (absent keys are left out of the result and not cached);
+        ``tags(key, value)`` returns the tags of one entry. ``loaded_at`` as
+        in ``get_or_load``.
+        """
+        keys = list(dict.fromkeys(keys))
+        b = backend()
+        if b is None:
+            return loader(keys) if keys else {}
+
+        found, entries = {}, {}
+        for key, blob in zip(keys, b.get_many([self._key(k) for k in keys])):
+            if blob is not None:
+                entries[key] = pickle.loads(blob)
+        # 모든 엔트리의 태그 스탬프를 한 번에 조회
+        stamps = b.stamps({t for _, entry_tags, _ in entries.values() for t in entry_tags})
+        stale = 0
+        for key, (loaded_at, entry_tags, value) in entries.items():
+            if all(stamps[t] <= loaded_at for t in entry_tags):
+                found[key] = value
+            else:
+                stale += 1
+
+        missing = [k for k in keys if k not in found]
+        if found:
+            metrics.CACHE_REQUESTS.inc((self.name, "hit"), amount=len(found))
+        if stale:
+            metrics.CACHE_REQUESTS.inc((self.name, "stale"), amount=stale)
+        if len(missing) > stale:
+            metrics.CACHE_REQUESTS.inc((self.name, "miss"), amount=len(missing) - stale)
+        if not missing:
+            return found
+
+        if loaded_at is None:
+            loaded_at = b.clock()
+        loaded = loader(missing)
+        b.set_many({
+            self._key(k): pickle.dumps((loaded_at, tuple(tags(k, v)), v), pickle.HIGHEST_PROTOCOL)
+            for k, v in loaded.items()
+        }, self.ttl)
+        found.update(loaded)
+        return found
+
+
+_refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+class SWRCache(Cache):
+    """Stale-while-revalidate: fresh for ``soft_ttl``, kept until ``ttl``.
+
+    * younger than ``soft_ttl``            — served (``hit``)
+    * older, up to ``ttl``                 — served as is, and reloaded in
+      the background (``refresh``; one reload per key at a time)
+    * tag invalidated / missing / expired  — loaded inline (``stale`` /
+      ``miss``), so a user sees their own write right away
+    * inline load raises (pool timeout, DB down) and an old value exists —
+      the old value is served instead of the error (``fallback``)
+
+    The background reload runs outside the request, so ``loader`` must open
+    its own connection rather than use the request's cursor.
+    """
+
+    def __init__(self, name, soft_ttl, ttl):
+        super().__init__(name, ttl)
+        self.soft_ttl = soft_ttl
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+
+    def get_or_load(self, key, loader, tags=()):
+        b = backend()
+        if b is None:
+            return loader()
+        full_key = self._key(key)
+
+        state, stored = self._lookup(b, full_key)
+        if state == "hit":
+            stored_at, value = stored
+            if time.time() - stored_at < self.soft_ttl:
+                metrics.CACHE_REQUESTS.inc((self.name, "hit"))
+            else:
+                metrics.CACHE_REQUESTS.inc((self.name, "refresh"))
+                self._refresh(b, full_key, loader, tags)
+            return value
+
+        try:
+            value = self._load_stamped(b, full_key, loader, tags)
+        except Exception:
+            if stored is None:
+                raise
+            metrics.CACHE_REQUESTS.inc((self.name, "fallback"))
+            return stored[1]
+        metrics.CACHE_REQUESTS.inc((self.name, state))
+        return value
+
+    def _load_stamped(self, b, full_key, loader, tags):
+        stamped_tags = (lambda s: tags(s[1])) if callable(tags) else tags
+        return self._load(b, full_key, lambda: (time.time(), loader()), stamped_tags)[1]
+
+    def _refresh(self, b, full_key, loader, tags):
+        with self._refreshing_lock:
+            if full_key in self._refreshing:
+                return
+            self._refreshing.add(full_key)
+
+        def run():
+            try:
+                self._load_stamped(b, full_key, loader, tags)
+            except Exception:
+                pass  # 다음 요청도 기존 값을 받는다
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(full_key)
+
+        _refresh_pool.submit(run)
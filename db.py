@@ -1,17 +1,45 @@
 # db.py
+import os
+import threading
+import time
+from collections import deque
+
 import mysql.connector
 from mysql.connector import errors as mysql_errors
 
+import cache
+import instrumentation
+import metrics
+import slowlog
+
 # optional fallback driver
 try:
     import pymysql
-    from pymysql.cursors import DictCursor
+    from pymysql.cursors import Cursor as TupleCursor, DictCursor
 except Exception:
     pymysql = None
 
 
-def get_db():
-    """Return a DB connection.
+# connection params (move to env vars if needed)
+DB_CONFIG = dict(
+    host="localhost",
+    user="root",
+    password="9799",
+    database="youtube_app",
+)
+
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "5"))
+# idle connections older than this are pinged before being handed out
+POOL_PING_AFTER = 30.0
+
+
+class PoolTimeout(RuntimeError):
+    """No pooled connection became available within ``POOL_TIMEOUT``."""
+
+
+def connect_raw():
+    """Open a new raw connection and return ``(conn, driver)``.
 
     Tries to use mysql.connector first. If the server requires an
     authentication plugin not supported by mysql.connector (e.g.
@@ -19,13 +47,7 @@ def get_db():
 
     If neither works, raises a clear RuntimeError with remediation steps.
     """
-    # connection params (move to env vars if needed)
-    cfg = dict(
-        host="localhost",
-        user="root",
-        password="9799",
-        database="youtube_app",
-    )
+    cfg = DB_CONFIG
 
     try:
         conn = mysql.connector.connect(**cfg)
@@ -47,36 +69,256 @@ def get_db():
         conn = pymysql.connect(cursorclass=DictCursor, db=cfg["database"], **{k: v for k, v in cfg.items() if k != "database"})
         driver = "pymysql"
 
-    # Wrap connection to provide a compatible cursor(dictionary=True) signature
-    class _ConnWrapper:
-        def __init__(self, conn, driver):
-            self._conn = conn
-            self._driver = driver
-
-        def cursor(self, *args, **kwargs):
-            # support `dictionary=True` used by mysql.connector code
-            if kwargs.pop("dictionary", False):
-                if self._driver == "mysqlconnector":
-                    return self._conn.cursor(dictionary=True)
-                else:
-                    # pymysql uses DictCursor via cursorclass; ignore kw
-                    return self._conn.cursor(*args, **kwargs)
-            return self._conn.cursor(*args, **kwargs)
-
-        def close(self):
-            return self._conn.close()
-
-        def commit(self):
-            return self._conn.commit()
-
-        def rollback(self):
-            return self._conn.rollback()
-
-        def __getattr__(self, item):
-            return getattr(self._conn, item)
-        
-        def get_raw_connection(self):
-            """Return the raw connection for pandas or other libraries."""
-            return self._conn
+    return conn, driver
+
+
+class _Pool:
+    """Small blocking connection pool shared by both drivers.
+
+    Connections are handed out LIFO so the hot ones stay warm, and are
+    opened lazily up to ``size``. Callers beyond that wait up to ``timeout``
+    seconds and then get ``PoolTimeout``.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, driver, last_used)
+        self._open = 0
+        self._waiting = 0
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        item = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    item = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"no DB connection available within {self.timeout}s (pool size {self.size})")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        if item is None:
+            try:
+                return connect_raw()
+            except Exception:
+                self._discarded()
+                raise
+
+        conn, driver, last_used = item
+        if time.monotonic() - last_used > POOL_PING_AFTER:
+            try:
+                conn.ping(reconnect=True)
+            except Exception:
+                self._discarded()
+                _close_quietly(conn)
+                return self.acquire()
+        return conn, driver
+
+    def release(self, conn, driver):
+        try:
+            # end the implicit transaction so the next user sees fresh data
+            conn.rollback()
+        except Exception:
+            self._discarded()
+            _close_quietly(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, driver, time.monotonic()))
+            self._cond.notify()
+
+    def _discarded(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "waiting": self._waiting,
+            }
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+_pool = _Pool(POOL_SIZE, POOL_TIMEOUT)
+
+
+def pool_stats():
+    """Snapshot of the connection pool (size / open / idle / in_use / waiting)."""
+    return _pool.stats()
+
+
+_READ_PREFIXES = ("SELE", "WITH", "SHOW", "EXPL", "(SEL")
+
+
+class _InstrumentedCursor:
+    """Thin cursor proxy that reports each statement to ``instrumentation``
+    and hands statements slower than ``slowlog.THRESHOLD_MS`` to ``slowlog``.
 
+    Wall time covers ``execute`` plus the ``fetch*`` calls that follow it,
+    since unbuffered drivers only read the result set while fetching.
+    """
+    __slots__ = ("_cur", "_entry", "_sql", "_params", "_ms", "_slow", "cache_clock")
+
+    def __init__(self, cur, cache_clock=0):
+        self._cur = cur
+        self.cache_clock = cache_clock
+        self._entry = None
+        self._sql = None
+        self._params = None
+        self._ms = 0.0
+        self._slow = False
+
+    def execute(self, sql, params=None):
+        started = time.perf_counter()
+        try:
+            return self._cur.execute(sql, params)
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            # reads count rows as they are fetched, writes report rowcount
+            rows = 0 if sql.lstrip()[:4].upper() in _READ_PREFIXES else max(self._cur.rowcount, 0)
+            self._entry = instrumentation.start_query(sql, ms, rows)
+            self._sql, self._params, self._ms, self._slow = sql, params, ms, False
+            if ms >= slowlog.THRESHOLD_MS:
+                self._report_slow()
+
+    def _report_slow(self):
+        self._slow = True
+        slowlog.record(self._sql, self._params, self._ms)
+
+    def _fetched(self, started, rows):
+        ms = (time.perf_counter() - started) * 1000
+        entry = self._entry
+        if entry is not None:
+            entry[1] += ms
+            entry[2] += rows
+        self._ms += ms
+        if not self._slow and self._ms >= slowlog.THRESHOLD_MS and self._sql is not None:
+            self._report_slow()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cur.fetchone()
+        self._fetched(started, 1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size=1):
+        started = time.perf_counter()
+        rows = self._cur.fetchmany(size)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cur.fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, item):
+        return getattr(self._cur, item)
+
+
+# Wrap connection to provide a compatible cursor(dictionary=True) signature
+class _ConnWrapper:
+    def __init__(self, conn, driver):
+        self._conn = conn
+        self._driver = driver
+        self._released = False
+        # 이 커넥션의 어떤 스냅샷보다 먼저 읽은 캐시 시계 — 라우트 커서로 채우는 캐시 항목의 기준 (cache.py)
+        self.cache_clock = cache.clock()
+
+    def cursor(self, *args, **kwargs):
+        return _InstrumentedCursor(self._raw_cursor(*args, **kwargs), self.cache_clock)
+
+    def _raw_cursor(self, *args, **kwargs):
+        # `compact=True`: plain tuple rows (pair with fetch_compact for the column names)
+        if kwargs.pop("compact", False):
+            kwargs.pop("dictionary", None)
+            if self._driver == "pymysql":
+                return self._conn.cursor(TupleCursor)
+            return self._conn.cursor()
+        # support `dictionary=True` used by mysql.connector code
+        if kwargs.pop("dictionary", False):
+            if self._driver == "mysqlconnector":
+                return self._conn.cursor(dictionary=True)
+            else:
+                # pymysql uses DictCursor via cursorclass; ignore kw
+                return self._conn.cursor(*args, **kwargs)
+        return self._conn.cursor(*args, **kwargs)
+
+    def close(self):
+        """Return the connection to the pool (the socket stays open)."""
+        if not self._released:
+            self._released = True
+            _pool.release(self._conn, self._driver)
+
+    def commit(self):
+        return self._conn.commit()
+
+    def rollback(self):
+        return self._conn.rollback()
+
+    def __getattr__(self, item):
+        return getattr(self._conn, item)
+
+    def __del__(self):
+        # routes that error out before close() must not leak pool slots
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def get_raw_connection(self):
+        """Return the raw connection for pandas or other libraries."""
+        return self._conn
+
+
+def fetch_compact(cur):
+    """Fetch the rest of the result as ``(columns, rows)`` with tuple rows.
+
+    Meant for a ``cursor(compact=True)``: no per-row dict, so large result
+    sets take roughly half the memory and encode faster. Dict rows from a
+    ``dictionary=True`` cursor are converted, so callers may pass either.
+    """
+    columns = [d[0] for d in cur.description] if cur.description else []
+    rows = cur.fetchall()
+    if rows and isinstance(rows[0], dict):
+        rows = [tuple(r[c] for c in columns) for r in rows]
+    return columns, rows
+
+
+def get_db():
+    """Return a pooled DB connection.
+
+    Callers use it exactly like a plain connection; ``close()`` hands it back
+    to the pool instead of closing the socket.
+    """
+    started = time.perf_counter()
+    conn, driver = _pool.acquire()
+    waited = time.perf_counter() - started
+    instrumentation.record_wait(waited * 1000)
+    metrics.POOL_WAIT.observe(waited)
     return _ConnWrapper(conn, driver)
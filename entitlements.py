@@ -0,0 +1,226 @@
+# entitlements.py
+"""In-memory entitlement cache (premium membership + movie purchases).
+
+Per-user state is loaded lazily from ``Premium`` and ``MoviePurchases`` on the
+first check and then served from memory. Every grant that can run out
+(premium ``end_date``, rental ``expired_at``) is also pushed onto a min-heap
+ordered by its expiry time, and the heap is drained on every access, so a
+grant disappears exactly when it expires rather than at the next reload.
+
+Writes that change entitlements (movie purchase, premium change) must call
+``invalidate(user_id)``. Like ``cache.py`` it is generation based: a load
+reads the generation before it queries, and its result is not cached if
+the user was invalidated meanwhile, so a load racing a purchase cannot put
+the pre-purchase state back.
+
+``invalidate`` also stamps the tag ``user:<id>:entitlements`` in the
+``cache.py`` backend, which other workers share under ``CACHE_URL=redis://``.
+Grants and refusals are both served from memory; only a check that would
+refuse (not owned, not premium) compares the entry's load clock with that
+tag stamp and reloads when another worker invalidated the user since — a
+purchase made elsewhere plays on the next check, and a user without the
+grant costs one stamp lookup, not a query. With the in-process backend
+other workers see the change at the ``reload_after`` reload.
+
+Checks made while a route holds a connection take its cursor (``cur``) so a
+miss does not check out a second one.
+"""
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+import cache
+from db import get_db
+
+# heap key used for the premium grant (movie ids start at 1)
+_PREMIUM = 0
+
+
+def _ts(dt):
+    """naive DB datetime (local time) -> epoch seconds"""
+    return dt.timestamp() if dt is not None else None
+
+
+def _tag(user_id):
+    return f"user:{user_id}:entitlements"
+
+
+class _UserEntitlements:
+    __slots__ = ("premium_until", "owned", "rented", "loaded_at", "clock")
+
+    def __init__(self, premium_until, owned, rented, loaded_at, clock):
+        self.premium_until = premium_until  # epoch seconds or None
+        self.owned = owned                  # set of movie_id (type='buy')
+        self.rented = rented                # {movie_id: expires epoch}
+        self.loaded_at = loaded_at
+        self.clock = clock                  # cache.py clock read before the load
+
+
+class EntitlementCache:
+    def __init__(self, max_users=100_000, reload_after=300):
+        self.max_users = max_users
+        self.reload_after = reload_after
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+        # invalidate 세대: 진행 중인 로드가 있을 때만 user_id -> 마지막 무효화 세대를 기록
+        self._generation = 0
+        self._invalidated = {}
+        self._loading = 0
+        # (expires_at, user_id, movie_id) — movie_id _PREMIUM means premium
+        self._expiry = []
+
+    # ------------------------------------------------------------
+    # loading / expiry
+    # ------------------------------------------------------------
+    def _load(self, user_id, cur=None):
+        # 라우트 커서면 그 스냅샷보다 먼저 읽힌 체크아웃 시각의 시계 (cache.py)
+        clock = getattr(cur, "cache_clock", 0) if cur is not None else cache.clock()
+        if cur is not None:
+            return self._query(cur, user_id, clock)
+        conn = get_db()
+        own = conn.cursor(dictionary=True)
+        try:
+            return self._query(own, user_id, clock)
+        finally:
+            own.close()
+            conn.close()
+
+    @staticmethod
+    def _query(cur, user_id, clock):
+        cur.execute("SELECT end_date FROM Premium WHERE user_id = %s", (user_id,))
+        row = cur.fetchone()
+        premium_until = _ts(row["end_date"]) if row and row.get("end_date") else None
+
+        cur.execute("""
+            SELECT movie_id, type, expired_at
+            FROM MoviePurchases
+            WHERE user_id = %s
+              AND (type = 'buy' OR expired_at > NOW())
+        """, (user_id,))
+        owned, rented = set(), {}
+        for r in cur.fetchall():
+            if r["type"] == "buy":
+                owned.add(r["movie_id"])
+            else:
+                exp = _ts(r["expired_at"])
+                if exp > rented.get(r["movie_id"], 0):
+                    rented[r["movie_id"]] = exp
+        return _UserEntitlements(premium_until, owned, rented, time.time(), clock)
+
+    def _sweep(self, now):
+        """drop every grant whose expiry time has passed (caller holds lock)"""
+        heap = self._expiry
+        while heap and heap[0][0] <= now:
+            expires_at, user_id, movie_id = heapq.heappop(heap)
+            ent = self._users.get(user_id)
+            if ent is None:
+                continue
+            # stale heap entries (user reloaded since) are skipped
+            if movie_id == _PREMIUM:
+                if ent.premium_until == expires_at:
+                    ent.premium_until = None
+            elif ent.rented.get(movie_id) == expires_at:
+                del ent.rented[movie_id]
+
+    def _schedule(self, user_id, ent, now):
+        if ent.premium_until is not None and ent.premium_until > now:
+            heapq.heappush(self._expiry, (ent.premium_until, user_id, _PREMIUM))
+        for movie_id, exp in ent.rented.items():
+            heapq.heappush(self._expiry, (exp, user_id, movie_id))
+
+        # reloads leave stale entries behind; rebuild once they dominate
+        if len(self._expiry) > 4 * max(len(self._users), 1024):
+            live = []
+            for uid, e in self._users.items():
+                if e.premium_until is not None:
+                    live.append((e.premium_until, uid, _PREMIUM))
+                live.extend((exp, uid, mid) for mid, exp in e.rented.items())
+            heapq.heapify(live)
+            self._expiry = live
+
+    @staticmethod
+    def _invalidated_since(user_id, clock):
+        """True if ``invalidate(user_id)`` ran in any worker after ``clock``."""
+        b = cache.backend()
+        if b is None:
+            return False
+        tag = _tag(user_id)
+        return b.stamps([tag])[tag] > clock
+
+    def _get(self, user_id, cur=None, reload=False):
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            ent = self._users.get(user_id)
+            if ent is not None and not reload and now - ent.loaded_at < self.reload_after:
+                self._users.move_to_end(user_id)
+                return ent, now
+            # 조회 전에 세대를 읽어 둔다
+            generation = self._generation
+            self._loading += 1
+
+        # DB 조회는 lock 밖에서
+        ent, keep = None, False
+        try:
+            ent = self._load(user_id, cur)
+            # 다른 워커의 invalidate 는 태그 스탬프로 — 조회 중에 찍혔으면 캐시하지 않는다
+            keep = not self._invalidated_since(user_id, ent.clock)
+        finally:
+            now = time.time()
+            with self._lock:
+                self._loading -= 1
+                # 조회 중에 invalidate 됐으면 쓰기 전 상태일 수 있다 — 이번 호출에만 쓰고 캐시하지 않는다
+                if ent is not None and keep and self._invalidated.get(user_id, 0) <= generation:
+                    self._users[user_id] = ent
+                    self._users.move_to_end(user_id)
+                    while len(self._users) > self.max_users:
+                        self._users.popitem(last=False)
+                    self._schedule(user_id, ent, now)
+                    self._sweep(now)
+                # 진행 중인 로드가 없으면 이후 로드는 모두 지금 세대 이후에 시작한다
+                if not self._loading:
+                    self._invalidated.clear()
+        return ent, now
+
+    # ------------------------------------------------------------
+    # public API
+    # ------------------------------------------------------------
+    def _recheck(self, user_id, ent, now, cur):
+        # 거절하기 전에만: 다른 워커에서 방금 구매/가입했으면 다시 읽는다
+        if self._invalidated_since(user_id, ent.clock):
+            return self._get(user_id, cur, reload=True)
+        return ent, now
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._generation += 1
+            if self._loading:
+                self._invalidated[user_id] = self._generation
+        cache.invalidate(_tag(user_id))
+
+    def premium_active(self, user_id, cur=None):
+        ent, now = self._get(user_id, cur)
+        if ent.premium_until is None or ent.premium_until <= now:
+            ent, now = self._recheck(user_id, ent, now, cur)
+        return ent.premium_until is not None and ent.premium_until > now
+
+    def can_play(self, user_id, movie_id, cur=None):
+        """Return ``(playable, reason, expires_at_epoch)``.
+
+        reason is one of ``"owned"``, ``"rented"`` or ``"none"``.
+        """
+        ent, now = self._get(user_id, cur)
+        if movie_id not in ent.owned and ent.rented.get(movie_id, 0) <= now:
+            ent, now = self._recheck(user_id, ent, now, cur)
+        if movie_id in ent.owned:
+            return True, "owned", None
+        exp = ent.rented.get(movie_id)
+        if exp is not None and exp > now:
+            return True, "rented", exp
+        return False, "none", None
+
+
+# process-wide instance used by the routes
+entitlements = EntitlementCache()
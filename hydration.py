@@ -0,0 +1,119 @@
+# hydration.py
+"""Video / channel cards resolved by id (multi-get over the cache).
+
+Listing and ranking queries select only ids (plus whatever they rank on);
+the display fields are attached afterwards from cards:
+
+* video card   — ``Videos`` row without ``description`` plus ``type_name``
+  (from ``lookups``), counts included
+* channel card — ``user_id``, ``username``, ``handle``, ``profile_img``
+
+Cards come from the cache; all misses of one call are loaded with a single
+``WHERE id IN (...)`` per table. Video cards are tagged ``video:<id>`` (the
+like / comment writes already emit it since they change the counts),
+channel cards ``user:<id>``.
+
+Misses loaded through the route's cursor see the route's snapshot, so they
+are stamped with the cache clock read when the route checked out its
+connection (``cur.cache_clock``) rather than the clock at load time — a
+write committed after the snapshot still invalidates them.
+"""
+import cache
+import lookups
+from db import get_db
+
+# IN (...) 목록 한 번에 이만큼까지
+BATCH_SIZE = 500
+
+_videos = cache.Cache("video_cards", ttl=300)
+_channels = cache.Cache("channel_cards", ttl=600)
+
+_VIDEO_COLUMNS = (
+    "video_id, user_id, type_id, title, thumbnail_url, video_url, duration, "
+    "visibility, view_count, like_count, comment_count, upload_date"
+)
+
+
+def _load_by_id(cur, table, columns, id_column, ids):
+    rows = {}
+    for i in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[i:i + BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cur.execute(
+            f"SELECT {columns} FROM {table} WHERE {id_column} IN ({placeholders})",
+            tuple(chunk),
+        )
+        for r in cur.fetchall():
+            rows[r[id_column]] = r
+    return rows
+
+
+def _with_cursor(cur, fn):
+    # 라우트가 이미 쥔 커넥션을 재사용 — 요청당 풀 커넥션 2개를 잡지 않도록
+    if cur is not None:
+        return fn(cur)
+    conn = get_db()
+    own = conn.cursor(dictionary=True)
+    try:
+        return fn(own)
+    finally:
+        own.close()
+        conn.close()
+
+
+def _snapshot_clock(cur):
+    # 자체 커넥션으로 읽을 때(cur 없음)는 cache.py 가 조회 직전에 시계를 읽는다
+    return getattr(cur, "cache_clock", 0) if cur is not None else None
+
+
+def _load_videos(cur, ids):
+    rows = _load_by_id(cur, "Videos", _VIDEO_COLUMNS, "video_id", ids)
+    type_names = {t["type_id"]: t["type_name"] for t in lookups.video_types(cur)}
+    for r in rows.values():
+        r["type_name"] = type_names.get(r["type_id"])
+    return rows
+
+
+def _load_channels(cur, ids):
+    return _load_by_id(cur, "Users", "user_id, username, handle, profile_img", "user_id", ids)
+
+
+def video_cards(video_ids, cur=None):
+    """``{video_id: card}``; ids without a video are missing from the result.
+
+    ``cur`` (a dictionary cursor) is used for the misses if given, else a
+    pooled connection is checked out for them.
+    """
+    return _videos.get_many(
+        [int(v) for v in video_ids],
+        lambda ids: _with_cursor(cur, lambda c: _load_videos(c, ids)),
+        tags=lambda vid, card: (f"video:{vid}",),
+        loaded_at=_snapshot_clock(cur),
+    )
+
+
+def channel_cards(user_ids, cur=None):
+    """``{user_id: card}``; ids without a user are missing from the result."""
+    return _channels.get_many(
+        [int(u) for u in user_ids],
+        lambda ids: _with_cursor(cur, lambda c: _load_channels(c, ids)),
+        tags=lambda uid, card: (f"user:{uid}",),
+        loaded_at=_snapshot_clock(cur),
+    )
+
+
+def videos_with_channels(video_ids, cur=None):
+    """Video cards in ``video_ids`` order, each with its ``channel`` card attached.
+
+    Ids whose video (or uploader) no longer exists are dropped.
+    """
+    videos = video_cards(video_ids, cur)
+    channels = channel_cards({v["user_id"] for v in videos.values()}, cur)
+    out = []
+    for vid in video_ids:
+        v = videos.get(int(vid))
+        if v is None or v["user_id"] not in channels:
+            continue
+        v["channel"] = channels[v["user_id"]]
+        out.append(v)
+    return out
@@ -0,0 +1,139 @@
+# instrumentation.py
+"""Per-request DB instrumentation.
+
+``db.get_db()`` hands out cursors that report every ``execute`` here: the
+statement fingerprint, wall time (execute + fetch), rows returned and the
+time spent waiting for a pooled connection. Per request, the numbers roll
+up into a ``Server-Timing`` response header and one structured log line::
+
+    Server-Timing: db;dur=12.41;desc="7 queries", db-wait;dur=0.03, app;dur=18.90
+
+The hot path is a context-variable lookup, a ``perf_counter`` pair and a
+list append; fingerprints are cached per distinct SQL string. Set
+``DB_INSTRUMENTATION=0`` to switch it off entirely.
+"""
+import contextvars
+import json
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+
+from flask import g, request
+
+ENABLED = os.environ.get("DB_INSTRUMENTATION", "1") != "0"
+
+logger = logging.getLogger("db_tp.requests")
+
+_current = contextvars.ContextVar("db_request_stats", default=None)
+
+
+class RequestStats:
+    __slots__ = ("started", "queries", "wait_ms")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # [fingerprint, ms, rows] — fetch*가 같은 항목에 시간/행 수를 더함
+        self.queries = []
+        self.wait_ms = 0.0
+
+    @property
+    def db_ms(self):
+        return sum(q[1] for q in self.queries)
+
+    def slowest(self):
+        return max(self.queries, key=lambda q: q[1]) if self.queries else None
+
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """Normalize a statement so that calls differing only in literals or in
+    the length of an ``IN (...)`` list share one fingerprint."""
+    fp = _STRING.sub("?", sql)
+    fp = _NUMBER.sub("?", fp)
+    fp = _PARAM_LIST.sub("(...)", fp)
+    return _SPACE.sub(" ", fp).strip().rstrip(";")
+
+
+# ------------------------------------------------------------
+# hooks called from db.py
+# ------------------------------------------------------------
+def current():
+    return _current.get() if ENABLED else None
+
+
+def record_wait(ms):
+    stats = current()
+    if stats is not None:
+        stats.wait_ms += ms
+
+
+def start_query(sql, ms, rows):
+    """Register an executed statement; returns the entry so fetches can add
+    their time and row count to it (None when not inside a request)."""
+    stats = current()
+    if stats is None:
+        return None
+    entry = [fingerprint(sql), ms, rows]
+    stats.queries.append(entry)
+    return entry
+
+
+# ------------------------------------------------------------
+# Flask wiring
+# ------------------------------------------------------------
+def server_timing(stats, total_ms):
+    return (
+        f'db;dur={stats.db_ms:.2f};desc="{len(stats.queries)} queries", '
+        f"db-wait;dur={stats.wait_ms:.2f}, "
+        f"app;dur={total_ms:.2f}"
+    )
+
+
+def init_app(app):
+    if not ENABLED:
+        return
+
+    @app.before_request
+    def _start_db_stats():
+        stats = RequestStats()
+        g._db_stats_token = _current.set(stats)
+        g._db_stats = stats
+
+    @app.after_request
+    def _report_db_stats(response):
+        stats = g.pop("_db_stats", None)
+        token = g.pop("_db_stats_token", None)
+        if stats is None:
+            return response
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:
+                pass
+
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        response.headers.add("Server-Timing", server_timing(stats, total_ms))
+
+        if logger.isEnabledFor(logging.INFO):
+            slowest = stats.slowest()
+            logger.info(json.dumps({
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 2),
+                "queries": len(stats.queries),
+                "db_ms": round(stats.db_ms, 2),
+                "db_wait_ms": round(stats.wait_ms, 2),
+                "rows": sum(q[2] for q in stats.queries if q[2] > 0),
+                "slowest": {"sql": slowest[0], "ms": round(slowest[1], 2), "rows": slowest[2]} if slowest else None,
+            }, ensure_ascii=False))
+        return response
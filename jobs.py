@@ -0,0 +1,275 @@
+# jobs.py
+"""Post-commit side effects run in the background, journaled in SQLite.
+
+Write endpoints commit their own change once and hand the derived work
+(counter recounts, cache invalidation that must follow them) to
+``enqueue``; the request returns without waiting for it::
+
+    jobs.enqueue("recount_likes", {"video_id": 10}, key="recount_likes:10")
+
+The journal is an SQLite file (``JOBS_JOURNAL``, WAL mode) shared by the
+workers of one host, so a job survives the process that queued it:
+
+* ``key`` is an idempotency key — while a job with the same key is still
+  pending the new one is dropped (ten likes in a burst cost one recount).
+  A job that is already running does not absorb new ones, so a write that
+  lands mid-recount gets its own
+* ``JOBS_WORKERS`` threads per process claim jobs under a lease
+  (``LEASE_SECONDS``); a job whose process died is claimed again once its
+  lease runs out — replay after a crash needs no separate step
+* a failing job is retried with exponential backoff (``RETRY_SECONDS``,
+  doubled per attempt) and left as ``failed`` after ``MAX_ATTEMPTS``;
+  so is a job whose lease ran out ``MAX_ATTEMPTS`` times (it kills or
+  hangs its worker). Finished jobs are deleted
+
+The schema is created once per process. Request threads enqueue through
+one shared connection behind a lock (an insert is a few microseconds);
+each worker thread keeps its own connection for claiming and running.
+Workers start with the first request a process serves, so every forked
+server worker runs its own (a child inherits no threads from its parent).
+
+Handlers are registered with ``@jobs.handler(kind)`` and take the payload
+as keyword arguments. They must be idempotent (a job can run twice if its
+lease expires mid-run), which recount-style work is by construction.
+
+``synchronous=NORMAL`` keeps ``enqueue`` off fsync: a process crash loses
+nothing, a power loss can lose the last few jobs — acceptable for work a
+later write recomputes anyway. Inspect / requeue::
+
+    python jobs.py stats
+    python jobs.py requeue        # failed -> pending
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+JOURNAL_PATH = os.environ.get(
+    "JOBS_JOURNAL",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "jobs.sqlite3"),
+)
+WORKERS = int(os.environ.get("JOBS_WORKERS", "2"))
+LEASE_SECONDS = 60.0
+MAX_ATTEMPTS = 5
+RETRY_SECONDS = 2.0
+POLL_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind        TEXT NOT NULL,
+        key         TEXT,
+        payload     TEXT NOT NULL,
+        status      TEXT NOT NULL DEFAULT 'pending',   -- pending / running / failed
+        attempts    INTEGER NOT NULL DEFAULT 0,
+        run_after   REAL NOT NULL,
+        error       TEXT,
+        created_at  REAL NOT NULL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS uk_pending_key ON jobs (key) WHERE status = 'pending';
+    CREATE INDEX IF NOT EXISTS idx_status_run ON jobs (status, run_after);
+"""
+
+_handlers = {}
+_schema_lock = threading.Lock()
+_schema_ready = False
+_shared = None
+_shared_lock = threading.Lock()
+_inherited = []
+_wake = threading.Condition()
+_workers = []
+
+
+def handler(kind):
+    """Register ``fn(**payload)`` as the handler of ``kind``."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def _connect(shared=False):
+    global _schema_ready
+    db = sqlite3.connect(JOURNAL_PATH, timeout=10, isolation_level=None, check_same_thread=not shared)
+    db.execute("PRAGMA synchronous=NORMAL")
+    # 파일 생성, WAL 전환, 스키마는 프로세스당 한 번
+    with _schema_lock:
+        if not _schema_ready:
+            os.makedirs(os.path.dirname(os.path.abspath(JOURNAL_PATH)), exist_ok=True)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            _schema_ready = True
+    return db
+
+
+def _journal():
+    """The shared connection; callers hold ``_shared_lock`` while using it."""
+    global _shared
+    if _shared is None:
+        _shared = _connect(shared=True)
+    return _shared
+
+
+def enqueue(kind, payload, key=None, delay=0.0):
+    """Journal a job; returns False if a pending job with the same ``key`` exists."""
+    now = time.time()
+    with _shared_lock:
+        cur = _journal().execute(
+            "INSERT OR IGNORE INTO jobs (kind, key, payload, run_after, created_at) VALUES (?, ?, ?, ?, ?)",
+            (kind, key, json.dumps(payload), now + delay, now),
+        )
+        inserted = cur.rowcount == 1
+    if not inserted:
+        return False
+    with _wake:
+        _wake.notify()
+    return True
+
+
+def _claim(db):
+    """Lease the oldest runnable job (pending, or running with an expired lease)."""
+    now = time.time()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        # 임대가 MAX_ATTEMPTS 번 끝난 작업은 워커를 죽이거나 멈추게 하는 작업 — 다시 임대하지 않는다
+        db.execute("""
+            UPDATE jobs SET status = 'failed', error = 'lease expired ' || attempts || ' times'
+            WHERE status = 'running' AND run_after <= ? AND attempts >= ?
+        """, (now, MAX_ATTEMPTS))
+        row = db.execute("""
+            SELECT job_id, kind, payload, attempts FROM jobs
+            WHERE status IN ('pending', 'running') AND run_after <= ?
+            ORDER BY run_after, job_id
+            LIMIT 1
+        """, (now,)).fetchone()
+        if row is not None:
+            # running 의 run_after 는 임대 만료 시각 — 지나면 다른 워커가 다시 가져간다
+            db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, run_after = ? WHERE job_id = ?",
+                (now + LEASE_SECONDS, row[0]),
+            )
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    return row
+
+
+def _run(db, job):
+    job_id, kind, payload, attempts = job
+    try:
+        fn = _handlers.get(kind)
+        if fn is None:
+            raise LookupError(f"no handler for job kind {kind!r}")
+        fn(**json.loads(payload))
+    except Exception as e:
+        attempts += 1
+        if attempts >= MAX_ATTEMPTS:
+            db.execute("UPDATE jobs SET status = 'failed', error = ? WHERE job_id = ?", (str(e)[:500], job_id))
+        else:
+            # 그사이 같은 key 의 pending 이 생겼으면 같은 일이므로 하나만 남긴다 (OR REPLACE)
+            retry_at = time.time() + RETRY_SECONDS * 2 ** (attempts - 1)
+            db.execute("""
+                UPDATE OR REPLACE jobs SET status = 'pending', run_after = ?, error = ?
+                WHERE job_id = ?
+            """, (retry_at, str(e)[:500], job_id))
+        return False
+    db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+    return True
+
+
+def _worker_loop():
+    db = _connect()
+    while True:
+        try:
+            job = _claim(db)
+        except sqlite3.Error:
+            logger.exception("jobs: claim failed")
+            job = None
+        if job is None:
+            with _wake:
+                _wake.wait(POLL_SECONDS)
+            continue
+        try:
+            _run(db, job)
+        except sqlite3.Error:
+            # 결과를 못 적었으면 임대가 끝난 뒤 다시 실행된다 (핸들러는 멱등)
+            logger.exception("jobs: job %s not recorded", job[0])
+
+
+def _after_fork():
+    # 자식 프로세스에는 워커 스레드가 없다. 부모의 SQLite 연결은 닫지 않고 버린다
+    # (자식이 닫으면 부모가 쥔 파일 락이 풀린다). 락/조건변수도 새로 만든다
+    global _shared, _shared_lock, _schema_lock, _wake, _workers
+    if _shared is not None:
+        _inherited.append(_shared)
+    _shared = None
+    _shared_lock = threading.Lock()
+    _schema_lock = threading.Lock()
+    _wake = threading.Condition()
+    _workers = []
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def start(workers=WORKERS):
+    """Start the worker threads (once per process; a forked child has none)."""
+    with _wake:
+        while len(_workers) < workers:
+            t = threading.Thread(target=_worker_loop, name=f"jobs-{len(_workers)}", daemon=True)
+            t.start()
+            _workers.append(t)
+
+
+def init_app(app):
+    # preload 된 마스터에서 띄우면 fork 된 워커에는 스레드가 없다 — 요청을 받는 프로세스에서 띄운다
+    @app.before_request
+    def _jobs_start():
+        if len(_workers) < WORKERS:
+            start()
+
+
+def stats():
+    with _shared_lock:
+        rows = _journal().execute("""
+            SELECT kind, status, COUNT(*), MIN(created_at) FROM jobs GROUP BY kind, status ORDER BY kind, status
+        """).fetchall()
+    now = time.time()
+    return [
+        {"kind": kind, "status": status, "count": n, "oldest_age_s": round(now - oldest, 1)}
+        for kind, status, n, oldest in rows
+    ]
+
+
+def requeue_failed():
+    """Give failed jobs a fresh set of attempts; returns how many were requeued."""
+    with _shared_lock:
+        cur = _journal().execute("""
+            UPDATE OR IGNORE jobs SET status = 'pending', attempts = 0, run_after = ?
+            WHERE status = 'failed'
+        """, (time.time(),))
+        return cur.rowcount
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="jobs in the journal by kind and status")
+    sub.add_parser("requeue", help="move failed jobs back to pending")
+    args = ap.parse_args()
+
+    if args.cmd == "stats":
+        for s in stats():
+            print(f"{s['kind']:24} {s['status']:8} {s['count']:8}  oldest {s['oldest_age_s']}s")
+    else:
+        print(f"requeued {requeue_failed()} jobs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# lookups.py
+"""Near-static lookup tables (``VideoType``) served from the cache.
+
+Routes that filter by a type name resolve it here to a ``type_id`` and
+filter on ``Videos.type_id`` directly instead of joining ``VideoType`` for
+the comparison. Anything that changes ``VideoType`` must call
+``cache.invalidate("videotype")``.
+"""
+import cache
+from db import get_db
+
+_cache = cache.Cache("lookups", ttl=3600)
+
+
+def _load_video_types(cur):
+    if cur is not None:
+        cur.execute("SELECT type_id, type_name FROM VideoType ORDER BY type_id")
+        rows = cur.fetchall()
+        # compact 커서가 넘어와도 캐시에는 항상 dict 행으로 — 튜플이 한 시간 동안 남으면 모든 경로가 깨진다
+        columns = [d[0] for d in cur.description]
+        return [r if isinstance(r, dict) else dict(zip(columns, r)) for r in rows]
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("SELECT type_id, type_name FROM VideoType ORDER BY type_id")
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def video_types(cur=None):
+    """``[{"type_id", "type_name"}, ...]`` ordered by id.
+
+    ``cur`` (a dictionary cursor) is used on a miss if given; the entry is
+    then stamped with the clock of its connection's checkout (``cache.py``).
+    """
+    loaded_at = getattr(cur, "cache_clock", 0) if cur is not None else None
+    return _cache.get_or_load(
+        "videotype", lambda: _load_video_types(cur), tags=("videotype",), loaded_at=loaded_at,
+    )
+
+
+def type_id(type_name, cur=None):
+    """``type_id`` for a type name, or None if there is no such type."""
+    for t in video_types(cur):
+        if t["type_name"] == type_name:
+            return t["type_id"]
+    return None
@@ -0,0 +1,416 @@
+# metrics.py
+"""Prometheus-style metrics registry exposed at ``/metrics``.
+
+Recording is lock-cheap: every metric keeps one shard per thread (a plain
+dict only that thread writes to), so ``inc`` / ``observe`` never contend.
+A scrape merges the shards.
+
+Multi-process (prefork) servers: set ``METRICS_DIR`` to a directory shared
+by the workers. Each process then dumps its merged values to
+``<METRICS_DIR>/metrics_<pid>_<start>.json`` every few seconds (atomic
+rename), and ``/metrics`` in any worker sums its own live values with every
+other worker's file. Gauges are only taken from files refreshed in the last
+``3 * FLUSH_INTERVAL`` seconds. A file whose process is gone (no such PID,
+or not refreshed for ``STALE_AFTER`` seconds) is deleted at the next
+scrape, so an exited worker's counts leave the totals — Prometheus sees a
+counter reset, which ``rate()`` handles.
+
+Fork-safe for preloading servers: a forked child starts with its own key
+and empty values (nothing recorded before the fork is counted twice), and
+the flush thread is started per PID on the first request rather than in
+``init_app``.
+"""
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+METRICS_DIR = os.environ.get("METRICS_DIR")
+FLUSH_INTERVAL = 5.0
+# 이만큼 갱신되지 않은 다른 프로세스의 파일은 주인이 없는 것으로 본다
+STALE_AFTER = 12 * FLUSH_INTERVAL
+# 새 스레드 샤드가 이만큼 생길 때마다 끝난 스레드의 샤드를 정리 (수집 때도 정리)
+PRUNE_EVERY = 64
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+_registry_lock = threading.Lock()
+_process_key = f"{os.getpid()}_{int(time.time())}"
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._reset()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _reset(self):
+        self._local = threading.local()
+        self._shards = []  # [(thread, shard)]
+        self._base = {}    # values of threads that have exited
+        self._shards_lock = threading.Lock()
+        self._added = 0
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), shard))
+                self._added += 1
+                if self._added % PRUNE_EVERY == 0:
+                    self._prune()
+            return shard
+
+    def _prune(self):
+        """Fold shards of exited threads into ``_base`` (caller holds the lock).
+
+        A threaded server starts a thread per request, so without this the
+        shard list — and scrape time — would grow with the request count.
+        An exited thread never writes its shard again, so folding is safe.
+        """
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for labels, v in shard.items():
+                    self._fold(labels, v)
+        self._shards = live
+
+    def _shard_items(self):
+        with self._shards_lock:
+            self._prune()
+            shards = [shard for _, shard in self._shards]
+            base = [(labels, self._copy(v)) for labels, v in self._base.items()]
+        yield from base
+        for shard in shards:
+            # list() of a dict is a single C call, safe against the owning thread
+            yield from list(shard.items())
+
+    def _fold(self, labels, v):
+        self._base[labels] = self._base.get(labels, 0) + v
+
+    @staticmethod
+    def _copy(v):
+        return v
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def collect(self):
+        out = {}
+        for labels, v in self._shard_items():
+            out[labels] = out.get(labels, 0) + v
+        return out
+
+
+class Gauge(Counter):
+    """Up/down value (in-flight requests), or a callback evaluated at scrape."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), fn=None):
+        super().__init__(name, help_text, labelnames)
+        self.fn = fn
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def collect(self):
+        if self.fn is not None:
+            return self.fn()
+        return super().collect()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        shard = self._shard()
+        h = shard.get(labels)
+        if h is None:
+            # [per-bucket counts (+Inf last), sum, count]
+            h = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        h[0][bisect.bisect_left(self.buckets, value)] += 1
+        h[1] += value
+        h[2] += 1
+
+    def _fold(self, labels, v):
+        agg = self._base.get(labels)
+        if agg is None:
+            self._base[labels] = self._copy(v)
+            return
+        agg[0] = [a + b for a, b in zip(agg[0], v[0])]
+        agg[1] += v[1]
+        agg[2] += v[2]
+
+    @staticmethod
+    def _copy(v):
+        return [list(v[0]), v[1], v[2]]
+
+    def collect(self):
+        out = {}
+        for labels, (counts, total, n) in self._shard_items():
+            agg = out.get(labels)
+            if agg is None:
+                agg = out[labels] = [[0] * len(counts), 0.0, 0]
+            agg[0] = [a + b for a, b in zip(agg[0], counts)]
+            agg[1] += total
+            agg[2] += n
+        return out
+
+
+# ------------------------------------------------------------
+# standard metrics
+# ------------------------------------------------------------
+REQUESTS = Counter("http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", ("route", "method"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served.", ("route",))
+POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "DB pool connections by state.", ("state",),
+    fn=lambda: _pool_connections(),  # db is imported lazily, see below
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache name and result (hit, miss, stale).", ("cache", "result"))
+CACHE_INVALIDATIONS = Counter("cache_invalidations_total", "Cache tags invalidated by write paths.")
+SINGLEFLIGHT = Counter(
+    "singleflight_requests_total",
+    "Coalesced reads by result (executed, shared = saved execution, timeout).", ("result",),
+)
+
+
+def _pool_connections():
+    import db  # db imports this module; resolve lazily
+    return {(k,): v for k, v in db.pool_stats().items() if k in ("open", "idle", "in_use", "waiting")}
+
+
+# ------------------------------------------------------------
+# multi-process store
+# ------------------------------------------------------------
+def _snapshot():
+    snap = {}
+    for m in list(_registry):
+        values = m.collect()
+        snap[m.name] = [[list(labels), v] for labels, v in values.items()]
+    return snap
+
+
+def _after_fork():
+    # 자식 프로세스: 부모가 fork 전에 기록한 값은 부모 몫 — 자기 키, 빈 값으로 시작.
+    # fork 순간 다른 스레드가 쥐고 있었을 수 있는 락도 새로 만든다
+    global _process_key, _registry_lock, _flusher_lock
+    _process_key = f"{os.getpid()}_{int(time.time())}"
+    _registry_lock = threading.Lock()
+    _flusher_lock = threading.Lock()
+    for m in _registry:
+        m._reset()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _ensure_flusher():
+    """Start this process' flush thread (once per PID; a forked child has none)."""
+    global _flusher_pid
+    pid = os.getpid()
+    if not METRICS_DIR or _flusher_pid == pid:
+        return
+    with _flusher_lock:
+        if _flusher_pid == pid:
+            return
+        threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+        _flusher_pid = pid
+
+
+def _flush_at_exit():
+    if _flusher_pid == os.getpid():
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+atexit.register(_flush_at_exit)
+
+
+def flush():
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"metrics_{_process_key}.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_snapshot(), f)
+    os.replace(tmp, path)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+def _owner_gone(path, mtime, now):
+    """True if the process that wrote ``path`` has exited."""
+    if now - mtime > STALE_AFTER:
+        return True
+    try:
+        pid = int(os.path.basename(path).split("_")[1])
+        os.kill(pid, 0)
+    except (IndexError, ValueError):
+        return False
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False  # 살아 있는 다른 사용자의 프로세스
+    return False
+
+
+def _merged():
+    """Own live values plus every other process' file."""
+    merged = {m.name: dict(m.collect()) for m in _registry}
+    if not METRICS_DIR:
+        return merged
+
+    kinds = {m.name: m.kind for m in _registry}
+    own = f"metrics_{_process_key}.json"
+    now = time.time()
+    fresh_after = now - 3 * FLUSH_INTERVAL
+    for path in glob.glob(os.path.join(METRICS_DIR, "metrics_*.json")):
+        if os.path.basename(path) == own:
+            continue
+        try:
+            mtime = os.path.getmtime(path)
+            if _owner_gone(path, mtime, now):
+                os.remove(path)
+                continue
+            with open(path, encoding="utf-8") as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, values in snap.items():
+            kind = kinds.get(name)
+            if kind is None or (kind == "gauge" and mtime < fresh_after):
+                continue
+            target = merged.setdefault(name, {})
+            for labels, v in values:
+                labels = tuple(labels)
+                if kind == "histogram":
+                    cur = target.get(labels)
+                    if cur is None:
+                        target[labels] = [list(v[0]), v[1], v[2]]
+                    else:
+                        cur[0] = [a + b for a, b in zip(cur[0], v[0])]
+                        cur[1] += v[1]
+                        cur[2] += v[2]
+                else:
+                    target[labels] = target.get(labels, 0) + v
+    return merged
+
+
+# ------------------------------------------------------------
+# text exposition
+# ------------------------------------------------------------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _label_str(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(v):
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def render():
+    merged = _merged()
+    lines = []
+    for m in _registry:
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        for labels, v in sorted(merged.get(m.name, {}).items()):
+            if m.kind == "histogram":
+                counts, total, n = v
+                cumulative = 0
+                for le, c in zip(m.buckets + ("+Inf",), counts):
+                    cumulative += c
+                    le_label = 'le="%s"' % le
+                    lines.append(f"{m.name}_bucket{_label_str(m.labelnames, labels, le_label)} {cumulative}")
+                lines.append(f"{m.name}_sum{_label_str(m.labelnames, labels)} {_fmt(total)}")
+                lines.append(f"{m.name}_count{_label_str(m.labelnames, labels)} {n}")
+            else:
+                lines.append(f"{m.name}{_label_str(m.labelnames, labels)} {_fmt(v)}")
+    return "\n".join(lines) + "\n"
+
+
+# ------------------------------------------------------------
+# Flask wiring
+# ------------------------------------------------------------
+def init_app(app):
+    def _route():
+        return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+    @app.before_request
+    def _metrics_start():
+        _ensure_flusher()
+        g._metrics_started = time.perf_counter()
+        g._metrics_route = _route()
+        IN_FLIGHT.inc((g._metrics_route,))
+
+    @app.after_request
+    def _metrics_record(response):
+        started = g.get("_metrics_started")
+        if started is not None:
+            route = g._metrics_route
+            LATENCY.observe(time.perf_counter() - started, (route, request.method))
+            REQUESTS.inc((route, request.method, str(response.status_code)))
+            g._metrics_recorded = True
+        return response
+
+    @app.teardown_request
+    def _metrics_done(exc):
+        route = g.get("_metrics_route")
+        if route is None:
+            return
+        IN_FLIGHT.dec((route,))
+        if not g.get("_metrics_recorded"):
+            # 응답을 만들기 전에 예외로 끝난 요청
+            REQUESTS.inc((route, request.method, "500"))
+            LATENCY.observe(time.perf_counter() - g._metrics_started, (route, request.method))
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return Response(render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,317 @@
+# migrate.py
+"""Versioned schema migrations (``migrations/NNNN_name.sql``).
+
+Files are applied in version order and recorded in ``schema_migrations``
+with a SHA-256 of their contents, so ``status`` can flag a file that was
+edited after it ran. A fresh install is ``DB_TP.sql`` followed by
+``python migrate.py up``.
+
+File format: plain SQL, statements ending in ``;`` at the end of a line,
+``--`` comment lines ignored. A comment of the form::
+
+    -- explain: SELECT ... WHERE user_id = 1 ORDER BY watched_at DESC LIMIT 5
+
+marks a query the migration is meant to speed up. ``up --report DIR``
+runs ``EXPLAIN FORMAT=JSON`` on each of them before and after the
+migration and writes the two plans side by side (access type, key, rows
+examined, filesort / temporary flags, query cost).
+
+DDL should spell out ``ALGORITHM=INPLACE, LOCK=NONE`` so MySQL refuses the
+change instead of silently copying / locking a large table.
+``lock_wait_timeout`` is lowered for the session (``--lock-wait-timeout``)
+so a migration stuck behind a long transaction's metadata lock gives up
+rather than queueing every query on the table behind it.
+
+MySQL DDL is not transactional: if a file fails half-way, the statements
+before the failing one stay applied and the version is not recorded.
+Fix the file (or the schema) and run ``up`` again.
+
+    python migrate.py status
+    python migrate.py up --dry-run
+    python migrate.py up --report migrations/reports
+    python migrate.py explain 1
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+import db
+import slowlog
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+FILE_RE = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+EXPLAIN_RE = re.compile(r"^--\s*explain:\s*(.+)$")
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+      version      INT PRIMARY KEY,
+      name         VARCHAR(100) NOT NULL,
+      checksum     CHAR(64) NOT NULL,
+      applied_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      execution_ms INT NOT NULL
+    )
+"""
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            self.text = f.read()
+        self.checksum = hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+    @property
+    def label(self):
+        return f"{self.version:04d}_{self.name}"
+
+    def statements(self):
+        body = "\n".join(
+            line for line in self.text.splitlines() if not line.lstrip().startswith("--")
+        )
+        stmts, current = [], []
+        for line in body.splitlines():
+            current.append(line)
+            if line.rstrip().endswith(";"):
+                sql = "\n".join(current).strip().rstrip(";").strip()
+                if sql:
+                    stmts.append(sql)
+                current = []
+        tail = "\n".join(current).strip()
+        if tail:
+            stmts.append(tail)
+        return stmts
+
+    def explain_queries(self):
+        out = []
+        for line in self.text.splitlines():
+            m = EXPLAIN_RE.match(line.strip())
+            if m:
+                out.append(m.group(1).strip().rstrip(";"))
+        return out
+
+
+def discover(directory=MIGRATIONS_DIR):
+    found = []
+    for fname in sorted(os.listdir(directory)):
+        m = FILE_RE.match(fname)
+        if m:
+            found.append(Migration(int(m.group(1)), m.group(2), os.path.join(directory, fname)))
+    versions = [mg.version for mg in found]
+    if len(versions) != len(set(versions)):
+        raise SystemExit(f"duplicate migration version in {directory}")
+    return found
+
+
+def _first(row):
+    # raw connection: tuple (mysql.connector) 또는 dict (PyMySQL DictCursor)
+    return row[0] if isinstance(row, (tuple, list)) else next(iter(row.values()))
+
+
+def _col(row, idx, key):
+    return row[idx] if isinstance(row, (tuple, list)) else row[key]
+
+
+def applied_versions(conn):
+    cur = conn.cursor()
+    cur.execute(_CREATE_TABLE)
+    cur.execute("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    rows = cur.fetchall()
+    cur.close()
+    conn.commit()
+    return {
+        _col(r, 0, "version"): {
+            "name": _col(r, 1, "name"),
+            "checksum": _col(r, 2, "checksum"),
+            "applied_at": _col(r, 3, "applied_at"),
+        }
+        for r in rows
+    }
+
+
+# ------------------------------------------------------------
+# EXPLAIN
+# ------------------------------------------------------------
+def plan_tables(plan):
+    """Per-table access of an ``EXPLAIN FORMAT=JSON`` document."""
+    tables = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "table_name" in node and "access_type" in node:
+                tables.append({
+                    "table": node["table_name"],
+                    "access_type": node["access_type"],
+                    "key": node.get("key"),
+                    "rows_examined": node.get("rows_examined_per_scan"),
+                })
+            for v in node.values():
+                walk(v)
+        elif isinstance(node, list):
+            for v in node:
+                walk(v)
+
+    walk(plan)
+    return tables
+
+
+def explain(conn, sql):
+    cur = conn.cursor()
+    try:
+        cur.execute("EXPLAIN FORMAT=JSON " + sql)
+        plan = json.loads(_first(cur.fetchone()))
+    except Exception as e:
+        return {"error": str(e)}
+    finally:
+        cur.close()
+    conn.rollback()
+    summary = slowlog.summarize_plan(plan)
+    summary["tables"] = plan_tables(plan)
+    return summary
+
+
+def _format_plan(p):
+    if "error" in p:
+        return f"error: {p['error']}"
+    access = ", ".join(
+        f"{t['table']}:{t['access_type']}({t['key'] or '-'}, rows={t['rows_examined']})" for t in p["tables"]
+    )
+    flags = [f for f in ("filesort", "temporary") if p.get(f)]
+    return f"{access}  cost={p.get('query_cost')}" + (f"  [{', '.join(flags)}]" if flags else "")
+
+
+def explain_all(conn, migration):
+    return {sql: explain(conn, sql) for sql in migration.explain_queries()}
+
+
+def print_report(migration, before, after):
+    print(f"  explain report for {migration.label}")
+    for sql in migration.explain_queries():
+        print(f"    {sql}")
+        if before is not None:
+            print(f"      before  {_format_plan(before[sql])}")
+        print(f"      after   {_format_plan(after[sql])}")
+
+
+def write_report(directory, migration, before, after):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{migration.label}.json")
+    doc = {
+        "version": migration.version,
+        "name": migration.name,
+        "checksum": migration.checksum,
+        "queries": [{"sql": sql, "before": before[sql], "after": after[sql]} for sql in before],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2, default=str)
+    return path
+
+
+# ------------------------------------------------------------
+# commands
+# ------------------------------------------------------------
+def status(conn, migrations):
+    applied = applied_versions(conn)
+    known = {m.version for m in migrations}
+    for m in migrations:
+        rec = applied.get(m.version)
+        if rec is None:
+            state = "pending"
+        elif rec["checksum"] != m.checksum:
+            state = f"MODIFIED after apply ({rec['applied_at']})"
+        else:
+            state = f"applied {rec['applied_at']}"
+        print(f"{m.label:<40} {state}")
+    for version in sorted(set(applied) - known):
+        print(f"{version:04d}_{applied[version]['name']:<35} applied, file missing")
+
+
+def up(conn, migrations, target=None, dry_run=False, report_dir=None, lock_wait_timeout=10):
+    applied = applied_versions(conn)
+    for m in migrations:
+        rec = applied.get(m.version)
+        if rec is not None and rec["checksum"] != m.checksum:
+            raise SystemExit(f"{m.label} was modified after it was applied; restore it or add a new migration")
+
+    pending = [m for m in migrations if m.version not in applied and (target is None or m.version <= target)]
+    if not pending:
+        print("nothing to apply")
+        return
+
+    cur = conn.cursor()
+    cur.execute("SET SESSION lock_wait_timeout = %s", (lock_wait_timeout,))
+    cur.close()
+
+    for m in pending:
+        print(f"{'would apply' if dry_run else 'applying'} {m.label}")
+        if dry_run:
+            for sql in m.statements():
+                print("    " + sql.replace("\n", "\n    ") + ";")
+            if report_dir:
+                print_report(m, None, explain_all(conn, m))
+            continue
+
+        before = explain_all(conn, m) if report_dir else None
+        started = time.perf_counter()
+        cur = conn.cursor()
+        i = 0
+        try:
+            for i, sql in enumerate(m.statements(), 1):
+                t0 = time.perf_counter()
+                cur.execute(sql)
+                print(f"  [{i}] {(time.perf_counter() - t0) * 1000:.0f}ms  {sql.splitlines()[0]}")
+            elapsed_ms = int((time.perf_counter() - started) * 1000)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name, checksum, execution_ms) VALUES (%s, %s, %s, %s)",
+                (m.version, m.name, m.checksum, elapsed_ms),
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise SystemExit(f"{m.label} failed at statement {i}: {e}")
+        finally:
+            cur.close()
+        print(f"  done in {elapsed_ms}ms")
+
+        if report_dir:
+            after = explain_all(conn, m)
+            print_report(m, before, after)
+            print(f"  report: {write_report(report_dir, m, before, after)}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("status", help="list migrations and whether they are applied")
+    u = sub.add_parser("up", help="apply pending migrations in order")
+    u.add_argument("--to", type=int, help="stop after this version")
+    u.add_argument("--dry-run", action="store_true", help="print the statements instead of running them")
+    u.add_argument("--report", metavar="DIR", help="EXPLAIN the annotated queries before/after and save to DIR")
+    u.add_argument("--lock-wait-timeout", type=int, default=10, help="seconds to wait for a metadata lock")
+    e = sub.add_parser("explain", help="EXPLAIN a migration's annotated queries against the current schema")
+    e.add_argument("version", type=int)
+    args = ap.parse_args()
+
+    migrations = discover()
+    conn, _ = db.connect_raw()
+    try:
+        if args.cmd == "status":
+            status(conn, migrations)
+        elif args.cmd == "up":
+            up(conn, migrations, target=args.to, dry_run=args.dry_run,
+               report_dir=args.report, lock_wait_timeout=args.lock_wait_timeout)
+        else:
+            m = next((m for m in migrations if m.version == args.version), None)
+            if m is None:
+                raise SystemExit(f"no migration {args.version:04d}")
+            print_report(m, None, explain_all(conn, m))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
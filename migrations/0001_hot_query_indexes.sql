@@ -0,0 +1,42 @@
+-- 0001 핫 쿼리 인덱스 팩
+--
+-- 각 인덱스는 아래 explain 쿼리의 before/after 플랜(python migrate.py up --report)과
+-- tools.bench_routes 의 라우트별 p95 비교(--compare)로 확인한다.
+-- ALGORITHM=INPLACE, LOCK=NONE: 온라인으로 만들 수 없으면 테이블을 잠그는 대신 실패한다.
+
+-- 최근 시청 기록 (/watch/recent, /full, /yt_history): user_id 범위 + filesort -> 인덱스 역순 스캔
+-- explain: SELECT wh.video_id, wh.watched_at FROM WatchHistory wh WHERE wh.user_id = 1 ORDER BY wh.watched_at DESC LIMIT 5
+ALTER TABLE WatchHistory
+  ADD INDEX idx_user_watched (user_id, watched_at),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- /shorts/list 인기순, /time·/full 시간대 추천 (타입별 상위 N을 LATERAL로 가져옴): 전체 스캔 + filesort -> 타입별 인덱스 역순 스캔
+-- explain: SELECT v.video_id FROM Videos v WHERE v.type_id = 2 ORDER BY v.view_count DESC, v.upload_date DESC LIMIT 20
+-- explain: SELECT v.video_id FROM Videos v WHERE v.type_id = 1 AND v.visibility = 'public' ORDER BY v.view_count DESC, v.upload_date DESC LIMIT 20
+ALTER TABLE Videos
+  ADD INDEX idx_type_views (type_id, view_count, upload_date),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 대표 댓글 (parent_id IS NULL 중 좋아요 최다): video_id 범위 + filesort -> 인덱스 한 행
+-- idx_video 는 새 인덱스의 접두어라 중복 (FK video_id 도 새 인덱스로 충족)
+-- explain: SELECT c.comment_id FROM Comments c WHERE c.video_id = 1 AND c.parent_id IS NULL ORDER BY c.like_count DESC LIMIT 1
+ALTER TABLE Comments
+  ADD INDEX idx_video_parent_likes (video_id, parent_id, like_count),
+  DROP INDEX idx_video,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 채널 기준 구독자 조회 (구독자 수 재계산, 새 영상 알림 대상): FK 인덱스 + PK 조회 -> 커버링 인덱스
+-- FK용으로 자동 생성된 channel_id 인덱스는 새 인덱스가 대신하면서 자동 제거된다.
+-- idx_subscriber 는 PK (subscriber_id, channel_id) 의 접두어라 중복
+-- explain: SELECT s.subscriber_id FROM Subscriptions s WHERE s.channel_id = 1
+-- explain: SELECT s.channel_id, COUNT(*) FROM Subscriptions s GROUP BY s.channel_id
+ALTER TABLE Subscriptions
+  ADD INDEX idx_channel_subscriber (channel_id, subscriber_id),
+  DROP INDEX idx_subscriber,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 영화 구매 내역 (/yt_movies, entitlements 로드): FK 인덱스 + filesort -> 인덱스 역순 스캔
+-- explain: SELECT mp.purchase_id, mp.movie_id FROM MoviePurchases mp WHERE mp.user_id = 1 ORDER BY mp.created_at DESC
+ALTER TABLE MoviePurchases
+  ADD INDEX idx_user_created (user_id, created_at),
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,14 @@
+-- 0002 사용자별 타입/크리에이터 선호도 (affinity.py)
+--
+-- /ads/recommend, /creators/top 이 WatchHistory 전체를 GROUP BY 하는 대신 읽는 사용자당 1행.
+-- 점수는 ref_time 시점 값이고 읽을 때 감쇠시킨다. (id, float32) 쌍을 이어 붙인 바이너리.
+-- 적용 후 기존 기록으로 채우기: python affinity.py rebuild
+
+CREATE TABLE IF NOT EXISTS UserAffinity (
+  user_id        INT PRIMARY KEY,
+  type_scores    VARBINARY(255) NOT NULL,  -- (type_id TINYINT, score FLOAT) 5바이트씩
+  creator_scores VARBINARY(256) NOT NULL,  -- (user_id INT, score FLOAT) 8바이트씩, 최대 32개
+  ref_time       TIMESTAMP NOT NULL,
+
+  FOREIGN KEY (user_id) REFERENCES Users(user_id)
+);
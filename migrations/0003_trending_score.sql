@@ -0,0 +1,16 @@
+-- 0003 시간 감쇠 트렌딩 점수 (trending.py)
+--
+-- trend_score = ln(Σ 가중치 · e^((t - EPOCH) / τ)) — 모든 영상에 같은 감쇠가 걸리므로
+-- 저장된 값의 순서가 곧 현재 순위다. 이벤트가 없는 영상의 행은 건드릴 필요가 없다. 없으면 NULL.
+-- 적용 후 기존 기록으로 채우기: python trending.py rebuild
+
+-- 8.0: 메타데이터만 바꾸는 즉시 컬럼 추가
+ALTER TABLE Videos
+  ADD COLUMN trend_score DOUBLE NULL,
+  ALGORITHM=INSTANT;
+
+-- ?order=trending (/shorts/list, /time): 타입별 인덱스 역순 스캔으로 상위 N
+-- explain: SELECT v.video_id FROM Videos v WHERE v.type_id = 2 ORDER BY v.trend_score DESC LIMIT 20
+ALTER TABLE Videos
+  ADD INDEX idx_type_trend (type_id, trend_score),
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,53 @@
+-- 0004 새 영상 알림 (notify.py)
+--
+-- POST /videos 가 Videos 와 같은 트랜잭션에 NotificationJobs 한 행을 넣고(outbox),
+-- 워커가 구독자를 subscriber_id 순으로 잘라 Notifications 에 다중 행 INSERT 한다.
+-- 청크마다 알림 + 미읽음 카운터 + 작업 커서를 한 트랜잭션으로 커밋 — 중간에 죽어도 이어서 하면 중복이 없다.
+
+CREATE TABLE IF NOT EXISTS NotificationJobs (
+  job_id        INT AUTO_INCREMENT PRIMARY KEY,
+  video_id      INT NOT NULL,
+  channel_id    INT NOT NULL,
+  status        ENUM('pending','running','done','failed') NOT NULL DEFAULT 'pending',
+  last_subscriber_id INT NOT NULL DEFAULT 0,   -- 여기까지 전달함 (keyset 커서)
+  delivered     INT NOT NULL DEFAULT 0,
+  attempts      INT NOT NULL DEFAULT 0,
+  locked_until  TIMESTAMP NULL,                -- 워커 임대 만료 시각, 지나면 다른 워커가 가져간다
+  error         VARCHAR(255) NULL,
+  created_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  FOREIGN KEY (video_id) REFERENCES Videos(video_id),
+  INDEX idx_status (status, job_id)
+);
+
+-- 사용자별 알림함: 최신순 keyset 페이지 (user_id, notification_id)
+CREATE TABLE IF NOT EXISTS Notifications (
+  notification_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  user_id         INT NOT NULL,
+  video_id        INT NOT NULL,
+  channel_id      INT NOT NULL,
+  is_read         BOOLEAN NOT NULL DEFAULT FALSE,
+  created_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+  FOREIGN KEY (user_id) REFERENCES Users(user_id),
+  FOREIGN KEY (video_id) REFERENCES Videos(video_id),
+  UNIQUE KEY uk_user_video (user_id, video_id),
+  INDEX idx_user_id (user_id, notification_id)
+);
+
+-- 미읽음 수: 알림함 COUNT(*) 대신 사용자당 한 행
+CREATE TABLE IF NOT EXISTS NotificationCounters (
+  user_id INT PRIMARY KEY,
+  unread  INT NOT NULL DEFAULT 0,
+
+  FOREIGN KEY (user_id) REFERENCES Users(user_id)
+);
+
+-- 알림 대상 구독자 (alert_enabled = 1) 를 subscriber_id 순으로: 커버링 범위 스캔 (행마다 PK 조회 없음)
+-- channel_id 로 시작하므로 idx_channel_subscriber 의 역할(FK, 채널별 구독자 수)도 대신한다
+-- explain: SELECT s.subscriber_id FROM Subscriptions s WHERE s.channel_id = 1 AND s.alert_enabled = 1 AND s.subscriber_id > 0 ORDER BY s.subscriber_id LIMIT 1000
+ALTER TABLE Subscriptions
+  ADD INDEX idx_channel_alert (channel_id, alert_enabled, subscriber_id),
+  DROP INDEX idx_channel_subscriber,
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,25 @@
+-- 0005 신고 중복 제거 + 대상별 신고 수 (moderation.py)
+--
+-- POST /reports 는 INSERT IGNORE — 같은 사용자가 같은 대상을 다시 신고하면 유니크 키에 걸려 무시된다.
+-- 대상별 신고 수는 워커 메모리에서 모았다가 주기적으로 ReportCounters 에 한 번에 더하고,
+-- 임계값을 넘은 대상은 hidden_at 을 찍어 목록에서 뺀다 (목록 쿼리는 Reports 를 조인하지 않는다).
+
+-- 중복 신고 방지 + 대상별 신고 조회 (모더레이션 큐의 사유별 집계, 처리 시 pending 일괄 resolved)
+-- 지금까지 Reports 에 쓰는 경로가 없어 중복 행이 없다 — 있으면 이 ALTER 는 실패하므로 먼저 정리할 것
+-- explain: SELECT r.reason, COUNT(*) FROM Reports r WHERE r.target_type = 'video' AND r.target_id = 1 AND r.status = 'pending' GROUP BY r.reason
+ALTER TABLE Reports
+  ADD UNIQUE KEY uk_target_reporter (target_type, target_id, reporter_id),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- 대상별 미처리 신고 수 (모더레이터가 처리하면 0으로) 와 숨김 시각
+CREATE TABLE IF NOT EXISTS ReportCounters (
+  target_type   ENUM('video', 'comment', 'user') NOT NULL,
+  target_id     INT NOT NULL,
+  report_count  INT NOT NULL DEFAULT 0,
+  hidden_at     TIMESTAMP NULL,               -- 자동/수동 숨김, NULL 이면 노출
+  updated_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  PRIMARY KEY (target_type, target_id),
+  INDEX idx_queue (report_count),             -- 모더레이션 큐: 신고 많은 대상부터
+  INDEX idx_hidden (hidden_at)                -- 워커가 숨김 집합을 다시 읽을 때
+);
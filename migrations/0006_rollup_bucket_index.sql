@@ -0,0 +1,12 @@
+-- 0006 롤업 구간 인덱스 (analytics.py)
+--
+-- 롤업/보존 작업은 (granularity, bucket_start) 구간으로 지우고 다시 채우는데, 유일한 키인
+-- PK (video_id, granularity, bucket_start) 는 video_id 가 앞이라 매 패스가 테이블 전체를 훑는다.
+-- 구간 인덱스가 있으면 해당 버킷 행만 읽고 잠근다.
+
+-- rollup (마지막 구간 재집계), run_retention (만료된 hour / 월로 접을 day 정리)
+-- explain: SELECT r.video_id FROM VideoStatsRollup r WHERE r.granularity = 'hour' AND r.bucket_start >= '2024-01-01 00:00:00' AND r.bucket_start < '2024-01-01 02:00:00'
+-- explain: SELECT r.video_id, SUM(r.views) FROM VideoStatsRollup r WHERE r.granularity = 'day' AND r.bucket_start < '2024-01-01' GROUP BY r.video_id
+ALTER TABLE VideoStatsRollup
+  ADD INDEX idx_granularity_bucket (granularity, bucket_start),
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,262 @@
+# moderation.py
+"""Report counters and the auto-hidden set (``Reports`` -> ``ReportCounters``).
+
+``POST /reports`` inserts with ``INSERT IGNORE`` against the unique key
+``(target_type, target_id, reporter_id)`` — a repeated report by the same
+user is a no-op — and, after its commit, only bumps an in-process counter
+(``count``). A background thread flushes the counters every
+``FLUSH_INTERVAL`` seconds as one multi-row upsert into ``ReportCounters``
+(one row per reported target, ``report_count`` = reports since the last
+moderator decision) and marks targets that reached ``HIDE_THRESHOLD`` with
+``hidden_at`` in the same transaction.
+
+The same thread reloads the hidden targets (a small set, read off
+``idx_hidden``) into frozensets, so listings drop hidden videos, comments
+and users' content with a set lookup per row (``visible``) instead of a
+join against ``Reports``. Another worker's hide is seen within one flush
+interval. Each process loads the set and starts the thread on the first
+request it serves, so nothing is opened before a server forks.
+
+Counters not yet flushed when a process dies are lost; ``Reports`` stays
+the source of truth and::
+
+    python moderation.py rebuild
+
+recomputes ``report_count`` from the pending reports.
+"""
+import argparse
+import atexit
+import logging
+import os
+import threading
+import time
+
+from db import get_db
+
+TARGET_TYPES = ("video", "comment", "user")
+REASONS = ("spam", "violence", "copyright", "other")
+
+HIDE_THRESHOLD = int(os.environ.get("MODERATION_HIDE_THRESHOLD", "10"))
+FLUSH_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+_pending = {}
+_pending_lock = threading.Lock()
+_hidden = {t: frozenset() for t in TARGET_TYPES}
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def submit(cur, reporter_id, target_type, target_id, reason="other", description=None):
+    """Insert a report; returns False if this reporter already reported the target."""
+    cur.execute("""
+        INSERT IGNORE INTO Reports (reporter_id, target_type, target_id, reason, description)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (reporter_id, target_type, target_id, reason, description))
+    return cur.rowcount == 1
+
+
+def count(target_type, target_id):
+    """Count a committed report towards the next flush."""
+    key = (target_type, int(target_id))
+    with _pending_lock:
+        _pending[key] = _pending.get(key, 0) + 1
+
+
+def flush():
+    """Write the pending counts; returns the number of targets written."""
+    global _pending
+    with _pending_lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return 0
+
+    # 키 순서로 — 여러 워커가 동시에 flush 해도 같은 순서로 잠근다
+    keys = sorted(pending)
+    conn = get_db()
+    cur = conn.cursor(compact=True)
+    try:
+        placeholders = ", ".join(["(%s, %s, %s)"] * len(keys))
+        params = []
+        for k in keys:
+            params.extend((*k, pending[k]))
+        cur.execute(f"""
+            INSERT INTO ReportCounters (target_type, target_id, report_count)
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE report_count = report_count + VALUES(report_count)
+        """, params)
+
+        placeholders = ", ".join(["(%s, %s)"] * len(keys))
+        cur.execute(f"""
+            UPDATE ReportCounters
+            SET hidden_at = NOW()
+            WHERE (target_type, target_id) IN ({placeholders})
+              AND report_count >= %s AND hidden_at IS NULL
+        """, [x for k in keys for x in k] + [HIDE_THRESHOLD])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        # 다음 flush 때 다시 — 그사이 쌓인 몫과 합친다
+        with _pending_lock:
+            for k, n in pending.items():
+                _pending[k] = _pending.get(k, 0) + n
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    return len(keys)
+
+
+def reload_hidden():
+    """Replace the in-process hidden set with the targets hidden in the database."""
+    global _hidden
+    conn = get_db()
+    cur = conn.cursor(compact=True)
+    try:
+        cur.execute("SELECT target_type, target_id FROM ReportCounters WHERE hidden_at IS NOT NULL")
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+    hidden = {t: set() for t in TARGET_TYPES}
+    for target_type, target_id in rows:
+        hidden[target_type].add(target_id)
+    # 참조 한 번 교체 — 읽는 쪽은 잠금 없이 이전 또는 새 집합 하나만 본다
+    _hidden = {t: frozenset(ids) for t, ids in hidden.items()}
+
+
+def is_hidden(target_type, target_id):
+    return target_id in _hidden[target_type]
+
+
+def visible(rows, video_key="video_id", user_key="user_id", comment_key=None):
+    """``rows`` without hidden videos / comments and content of hidden users.
+
+    Keys name the row fields to check; ``None`` skips that kind.
+    """
+    h = _hidden
+    videos, users, comments = h["video"], h["user"], h["comment"]
+    if not (videos or users or comments):
+        return rows
+    return [
+        r for r in rows
+        if not (video_key and r.get(video_key) in videos)
+        and not (user_key and r.get(user_key) in users)
+        and not (comment_key and r.get(comment_key) in comments)
+    ]
+
+
+def resolve(cur, target_type, target_id, hide):
+    """Close the target's pending reports, keeping it hidden (``hide``) or restoring it.
+
+    Returns the number of reports resolved; the caller commits and then
+    calls ``reload_hidden``.
+    """
+    cur.execute("""
+        UPDATE Reports SET status = 'resolved'
+        WHERE target_type = %s AND target_id = %s AND status = 'pending'
+    """, (target_type, target_id))
+    resolved = cur.rowcount
+    cur.execute("""
+        INSERT INTO ReportCounters (target_type, target_id, report_count, hidden_at)
+        VALUES (%s, %s, 0, IF(%s, NOW(), NULL))
+        ON DUPLICATE KEY UPDATE
+            report_count = 0,
+            hidden_at = IF(%s, IFNULL(hidden_at, NOW()), NULL)
+    """, (target_type, target_id, hide, hide))
+    return resolved
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+            reload_hidden()
+        except Exception:
+            logger.exception("moderation flush failed")
+
+
+def _flush_quietly():
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+def _after_fork():
+    # 자식 프로세스: 부모 카운터는 부모가 쓴다 — 빈 카운터, 새 락, flush 스레드 없음으로 시작
+    global _pending, _pending_lock, _flusher_pid, _flusher_lock
+    _pending = {}
+    _pending_lock = threading.Lock()
+    _flusher_pid = None
+    _flusher_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+# 자식도 물려받아 각자 자기 카운터를 쓴다
+atexit.register(_flush_quietly)
+
+
+def _ensure_flusher():
+    """Load the hidden set and start the flush thread (once per PID)."""
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid == pid:
+        return
+    with _flusher_lock:
+        if _flusher_pid == pid:
+            return
+        try:
+            reload_hidden()
+        except Exception:
+            # 테이블이 아직 없으면(마이그레이션 전) 빈 집합으로 시작
+            logger.exception("moderation: hidden set not loaded")
+        threading.Thread(target=_flush_loop, name="moderation-flush", daemon=True).start()
+        _flusher_pid = pid
+
+
+def init_app(app):
+    # 마스터에서 DB 를 열면 fork 된 워커가 그 연결을 나눠 쓴다 — 요청을 받는 프로세스에서 시작한다
+    app.before_request(_ensure_flusher)
+
+
+def rebuild():
+    """Recompute ``report_count`` from pending ``Reports``; returns the number of targets."""
+    conn = get_db()
+    cur = conn.cursor(compact=True)
+    try:
+        cur.execute("UPDATE ReportCounters SET report_count = 0")
+        cur.execute("""
+            INSERT INTO ReportCounters (target_type, target_id, report_count)
+            SELECT target_type, target_id, COUNT(*)
+            FROM Reports
+            WHERE status = 'pending'
+            GROUP BY target_type, target_id
+            ON DUPLICATE KEY UPDATE report_count = VALUES(report_count)
+        """)
+        cur.execute("SELECT COUNT(*) FROM ReportCounters WHERE report_count > 0")
+        n = cur.fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild", help="recompute ReportCounters.report_count from pending Reports")
+    args = ap.parse_args()
+
+    if args.cmd == "rebuild":
+        print(f"rebuilt report counters ({rebuild()} targets with pending reports)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# notify.py
+"""New-video notification fan-out (``NotificationJobs`` -> ``Notifications``).
+
+``POST /videos`` only inserts the video and one ``NotificationJobs`` row
+(``enqueue``) in the same transaction, so a publish costs the same whether
+the channel has ten subscribers or a million. Workers deliver the jobs::
+
+    python notify.py worker              # run forever (several may run at once)
+    python notify.py drain               # deliver everything pending, then exit
+
+A worker claims a job with ``SELECT ... FOR UPDATE SKIP LOCKED`` and a
+lease (``locked_until``); a job whose worker died is picked up again once
+the lease runs out (each chunk re-checks the job's cursor under a row lock,
+so the worker that lost its lease stops instead of delivering twice).
+Subscribers with ``alert_enabled`` are read in ``subscriber_id`` order,
+``CHUNK_SIZE`` at a time, off the covering index ``idx_channel_alert``.
+Per chunk, one transaction does:
+
+* a multi-row ``INSERT IGNORE`` into ``Notifications``
+* a multi-row upsert of ``NotificationCounters.unread``
+* the job's keyset cursor (``last_subscriber_id``) and lease renewal
+
+so a retry resumes after the last committed chunk without double counting.
+``CHUNK_PAUSE_MS`` between chunks keeps a huge channel from saturating the
+database (1M subscribers = 1000 chunks, spread over a few minutes).
+"""
+import argparse
+import logging
+import os
+import time
+
+from db import get_db
+
+CHUNK_SIZE = 1000
+CHUNK_PAUSE_MS = float(os.environ.get("NOTIFY_CHUNK_PAUSE_MS", "50"))
+LEASE_SECONDS = 60
+POLL_SECONDS = 1.0
+MAX_ATTEMPTS = 5
+RETRY_SECONDS = 10
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(cur, video_id, channel_id):
+    """Queue delivery of a new video, inside the publishing transaction."""
+    cur.execute("""
+        INSERT INTO NotificationJobs (video_id, channel_id)
+        VALUES (%s, %s)
+    """, (video_id, channel_id))
+
+
+def claim(conn, cur):
+    """Lease the oldest deliverable job; returns its row or None."""
+    cur.execute("""
+        SELECT job_id, video_id, channel_id, last_subscriber_id, attempts
+        FROM NotificationJobs
+        WHERE status IN ('pending', 'running')
+          AND (locked_until IS NULL OR locked_until < NOW())
+        ORDER BY job_id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    """)
+    job = cur.fetchone()
+    if job is None:
+        conn.rollback()
+        return None
+    cur.execute("""
+        UPDATE NotificationJobs
+        SET status = 'running', attempts = attempts + 1,
+            locked_until = NOW() + INTERVAL %s SECOND
+        WHERE job_id = %s
+    """, (LEASE_SECONDS, job["job_id"]))
+    conn.commit()
+    return job
+
+
+class LeaseLost(Exception):
+    """Another worker took the job over (our lease ran out mid-chunk)."""
+
+
+def deliver_chunk(conn, cur, job):
+    """Deliver the next chunk of ``job``; returns the number of subscribers (0 = finished)."""
+    # 작업 행을 잠그고 커서가 그대로인지 확인 — 임대가 끝나 다른 워커가 이어받았다면 손 뗀다
+    cur.execute("""
+        SELECT last_subscriber_id FROM NotificationJobs WHERE job_id = %s FOR UPDATE
+    """, (job["job_id"],))
+    row = cur.fetchone()
+    if row is None or row["last_subscriber_id"] != job["last_subscriber_id"]:
+        conn.rollback()
+        raise LeaseLost(job["job_id"])
+
+    cur.execute("""
+        SELECT subscriber_id
+        FROM Subscriptions
+        WHERE channel_id = %s AND alert_enabled = 1 AND subscriber_id > %s
+        ORDER BY subscriber_id
+        LIMIT %s
+    """, (job["channel_id"], job["last_subscriber_id"], CHUNK_SIZE))
+    users = [r["subscriber_id"] for r in cur.fetchall()]
+    if not users:
+        conn.rollback()
+        return 0
+
+    # user_id 오름차순 다중 행 — 여러 워커가 겹쳐도 같은 순서로 잠가 데드락을 피한다
+    placeholders = ", ".join(["(%s, %s, %s)"] * len(users))
+    params = []
+    for u in users:
+        params.extend((u, job["video_id"], job["channel_id"]))
+    cur.execute(f"""
+        INSERT IGNORE INTO Notifications (user_id, video_id, channel_id)
+        VALUES {placeholders}
+    """, params)
+
+    placeholders = ", ".join(["(%s, 1)"] * len(users))
+    cur.execute(f"""
+        INSERT INTO NotificationCounters (user_id, unread)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE unread = unread + 1
+    """, users)
+
+    cur.execute("""
+        UPDATE NotificationJobs
+        SET last_subscriber_id = %s, delivered = delivered + %s,
+            locked_until = NOW() + INTERVAL %s SECOND
+        WHERE job_id = %s
+    """, (users[-1], len(users), LEASE_SECONDS, job["job_id"]))
+    conn.commit()
+    job["last_subscriber_id"] = users[-1]
+    return len(users)
+
+
+def _finish(conn, cur, job_id, status, error=None, retry_in=None):
+    cur.execute("""
+        UPDATE NotificationJobs
+        SET status = %s, error = %s,
+            locked_until = IF(%s IS NULL, NULL, NOW() + INTERVAL %s SECOND)
+        WHERE job_id = %s
+    """, (status, error, retry_in, retry_in or 0, job_id))
+    conn.commit()
+
+
+def run_job(conn, cur, job):
+    """Deliver a claimed job to the end; returns the number delivered now."""
+    delivered = 0
+    try:
+        while True:
+            n = deliver_chunk(conn, cur, job)
+            if n == 0:
+                break
+            delivered += n
+            if n == CHUNK_SIZE and CHUNK_PAUSE_MS:
+                time.sleep(CHUNK_PAUSE_MS / 1000.0)
+        _finish(conn, cur, job["job_id"], "done")
+    except LeaseLost:
+        raise
+    except Exception as e:
+        conn.rollback()
+        # 잠시 뒤 (시도마다 더 길게) 다시 — 마지막으로 커밋한 청크 다음부터
+        attempts = job["attempts"] + 1
+        if attempts >= MAX_ATTEMPTS:
+            _finish(conn, cur, job["job_id"], "failed", str(e)[:255])
+        else:
+            _finish(conn, cur, job["job_id"], "running", str(e)[:255], retry_in=RETRY_SECONDS * attempts)
+        raise
+    return delivered
+
+
+def work(stop_when_idle=False):
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    total = 0
+    try:
+        while True:
+            job = claim(conn, cur)
+            if job is None:
+                if stop_when_idle:
+                    return total
+                time.sleep(POLL_SECONDS)
+                continue
+            started = time.perf_counter()
+            try:
+                n = run_job(conn, cur, job)
+            except Exception:
+                logger.exception("job %s (video %s) failed", job["job_id"], job["video_id"])
+                continue
+            total += n
+            logger.info("job %s (video %s): %s notifications in %.1fs",
+                        job["job_id"], job["video_id"], n, time.perf_counter() - started)
+    finally:
+        cur.close()
+        conn.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("worker", help="deliver jobs forever")
+    sub.add_parser("drain", help="deliver pending jobs, then exit")
+    args = ap.parse_args()
+    # 작업별 진행 로그를 콘솔로
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.cmd == "worker":
+        work()
+    else:
+        print(f"delivered {work(stop_when_idle=True)} notifications")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# profiler.py
+"""On-demand sampling profiler for individual requests.
+
+A request is profiled when it carries ``X-Profile: <PROFILE_TOKEN>`` or
+wins the ``PROFILE_SAMPLE_RATE`` draw (default 0, i.e. header only). While
+at least one profiled request is in flight, a single background thread
+wakes every ``PROFILE_INTERVAL_MS`` milliseconds, reads the stacks of the
+profiled threads from ``sys._current_frames()`` and counts them. Requests
+that are not profiled pay for one dict lookup.
+
+Each profile is written to ``PROFILE_DIR`` (default ``profiles/``) as
+collapsed stacks, one ``frame;frame;frame count`` line per distinct stack,
+ready for ``flamegraph.pl`` or speedscope. A JSON sidecar keeps the route,
+duration and a split of the samples:
+
+* ``db`` — the thread was inside the MySQL driver (query on the wire);
+* ``pool_wait`` — blocked in ``db._Pool.acquire`` waiting for a connection;
+* ``python`` — everything else: row building, datetime formatting, JSON.
+
+``/admin/profiles`` lists the sidecars, ``/admin/profiles/<name>`` serves
+the collapsed stacks. Work handed to other threads is only sampled when
+the handoff runs inside ``thread_scope()`` (the dashboard sections do).
+"""
+import contextvars
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import g, request
+
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN")
+SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+INTERVAL = float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+MAX_PROFILES = 200
+MAX_DEPTH = 128
+
+NAME_RE = re.compile(r"^[\w.-]+\.folded$")
+
+_DRIVER_DIRS = (os.sep + "mysql" + os.sep, os.sep + "pymysql" + os.sep)
+_ROOT = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+_lock = threading.Lock()
+_active = {}  # thread ident -> Session
+_wake = threading.Event()
+_sampler = None
+_current = contextvars.ContextVar("profile_session", default=None)
+_labels = {}  # code object -> frame label
+
+
+class Session:
+    __slots__ = ("stacks", "samples", "db", "pool_wait", "started", "threads")
+
+    def __init__(self):
+        self.stacks = Counter()
+        self.samples = 0
+        self.db = 0
+        self.pool_wait = 0
+        self.started = time.perf_counter()
+        self.threads = 0
+
+
+def _label(code):
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        if path.startswith(_ROOT):
+            path = path[len(_ROOT):]
+        else:
+            # site-packages/…/flask/app.py -> flask/app.py
+            parts = path.replace("\\", "/").rsplit("/", 2)
+            path = "/".join(parts[-2:])
+        label = _labels[code] = f"{path}:{code.co_name}"
+    return label
+
+
+def _classify(frame):
+    """'db' when any frame is inside the driver, 'pool_wait' when inside
+    _Pool.acquire, else None (python)."""
+    f = frame
+    while f is not None:
+        code = f.f_code
+        filename = code.co_filename
+        if any(d in filename for d in _DRIVER_DIRS):
+            return "db"
+        if code.co_name == "acquire" and filename.endswith("db.py"):
+            return "pool_wait"
+        f = f.f_back
+    return None
+
+
+def _collapse(frame):
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        stack.append(_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return ";".join(stack)
+
+
+def _sample_loop():
+    while True:
+        _wake.wait()
+        time.sleep(INTERVAL)
+        with _lock:
+            if not _active:
+                _wake.clear()
+                continue
+            targets = list(_active.items())
+        frames = sys._current_frames()
+        for ident, session in targets:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            session.stacks[_collapse(frame)] += 1
+            session.samples += 1
+            kind = _classify(frame)
+            if kind == "db":
+                session.db += 1
+            elif kind == "pool_wait":
+                session.pool_wait += 1
+        del frames
+
+
+def _ensure_sampler():
+    global _sampler
+    if _sampler is None:
+        with _lock:
+            if _sampler is None:
+                _sampler = threading.Thread(target=_sample_loop, name="profiler-sampler", daemon=True)
+                _sampler.start()
+
+
+def _register(session):
+    _ensure_sampler()
+    with _lock:
+        _active[threading.get_ident()] = session
+        session.threads += 1
+    _wake.set()
+
+
+def _unregister():
+    with _lock:
+        _active.pop(threading.get_ident(), None)
+
+
+@contextmanager
+def thread_scope():
+    """Sample the current (worker) thread as part of the request that
+    submitted it, if that request is being profiled. Use it inside a
+    ``contextvars.copy_context().run`` handoff."""
+    session = _current.get()
+    if session is None:
+        yield
+        return
+    _register(session)
+    try:
+        yield
+    finally:
+        _unregister()
+
+
+# ------------------------------------------------------------
+# storage
+# ------------------------------------------------------------
+def _write(session, meta):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    endpoint = re.sub(r"[^\w.-]", "_", meta["endpoint"] or "unmatched")
+    name = f"{datetime.now().strftime('%Y%m%d-%H%M%S%f')[:-3]}_{endpoint}_{os.getpid()}_{random.randrange(16 ** 4):04x}"
+
+    with open(os.path.join(PROFILE_DIR, name + ".folded"), "w", encoding="utf-8") as f:
+        for stack, count in session.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    leaves = Counter()
+    for stack, count in session.stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    meta.update({
+        "name": name + ".folded",
+        "interval_ms": INTERVAL * 1000,
+        "samples": session.samples,
+        "db_samples": session.db,
+        "pool_wait_samples": session.pool_wait,
+        "python_samples": session.samples - session.db - session.pool_wait,
+        "threads": session.threads,
+        "top_self": leaves.most_common(15),
+    })
+    with open(os.path.join(PROFILE_DIR, name + ".json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    _prune()
+    return name + ".folded"
+
+
+def _prune():
+    files = sorted(n for n in os.listdir(PROFILE_DIR) if n.endswith(".json"))
+    for old in files[:-MAX_PROFILES]:
+        for ext in (".json", ".folded"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, old[:-5] + ext))
+            except OSError:
+                pass
+
+
+def list_profiles(limit=50):
+    """Sidecar metadata of stored profiles, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    out = []
+    for name in sorted((n for n in os.listdir(PROFILE_DIR) if n.endswith(".json")), reverse=True)[:limit]:
+        try:
+            with open(os.path.join(PROFILE_DIR, name), encoding="utf-8") as f:
+                out.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def profile_path(name):
+    """Path of a stored ``.folded`` file, or None for unknown / unsafe names."""
+    if not NAME_RE.match(name):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+# ------------------------------------------------------------
+# Flask wiring
+# ------------------------------------------------------------
+def _wanted():
+    token = request.headers.get("X-Profile")
+    if token is not None and PROFILE_TOKEN and hmac.compare_digest(token, PROFILE_TOKEN):
+        return True
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+def init_app(app):
+    if not PROFILE_TOKEN and SAMPLE_RATE <= 0:
+        return
+
+    @app.before_request
+    def _profile_start():
+        if request.path.startswith("/admin/profiles") or not _wanted():
+            return
+        session = Session()
+        g._profile_session = session
+        g._profile_token = _current.set(session)
+        _register(session)
+
+    @app.after_request
+    def _profile_stop(response):
+        session = g.pop("_profile_session", None)
+        if session is None:
+            return response
+        _unregister()
+        token = g.pop("_profile_token", None)
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:
+                pass
+        meta = {
+            "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - session.started) * 1000, 2),
+        }
+        try:
+            response.headers["X-Profile-Id"] = _write(session, meta)
+        except OSError:
+            pass
+        return response
+
+    @app.teardown_request
+    def _profile_cleanup(exc):
+        # after_request가 돌지 않은 요청 (처리되지 않은 예외)
+        if g.pop("_profile_session", None) is not None:
+            _unregister()
@@ -1,3 +1,3 @@
 """routes package initializer"""
 
-__all__ = ["subscriptions", "home", "offline"]
+__all__ = ["subscriptions", "home", "shorts", "mypage", "movies", "support", "admin", "search", "videos", "notifications", "reports"]
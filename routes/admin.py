@@ -0,0 +1,197 @@
+from flask import Blueprint, request, jsonify, send_file
+import functools
+import hmac
+import os
+import hydration
+import jobs
+import moderation
+import profiler
+import slowlog
+from db import get_db
+
+admin_bp = Blueprint("admin", __name__)
+
+# ADMIN_TOKEN이 설정되어 있으면 X-Admin-Token 헤더로 인증,
+# 없으면 로컬(127.0.0.1 / ::1) 요청만 허용
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+
+@admin_bp.before_request
+def _require_admin():
+    if ADMIN_TOKEN:
+        if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+            return jsonify({"error": "Unauthorized"}), 401
+    elif request.remote_addr not in ("127.0.0.1", "::1"):
+        return jsonify({"error": "Unauthorized"}), 401
+
+
+def admin_only(fn):
+    """The same gate for staff routes that live in other blueprints."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        denied = _require_admin()
+        if denied is not None:
+            return denied
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+# --------------------------
+# 1. 느린 쿼리 TOP N
+#    GET /admin/slow-queries?limit=20&sort=total_ms
+#    sort: total_ms / max_ms / count
+# --------------------------
+@admin_bp.get("/slow-queries")
+def slow_queries():
+    sort = request.args.get("sort", "total_ms")
+    if sort not in ("total_ms", "max_ms", "count"):
+        return jsonify({"error": "sort must be total_ms, max_ms or count"}), 400
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = min(max(limit, 1), 200)
+
+    return jsonify({
+        "threshold_ms": slowlog.THRESHOLD_MS,
+        "explain_sample_rate": slowlog.EXPLAIN_SAMPLE,
+        "queries": slowlog.top(limit, sort)
+    })
+
+
+# --------------------------
+# 2. 요청 프로파일 목록 (X-Profile 헤더 / PROFILE_SAMPLE_RATE)
+#    GET /admin/profiles?limit=50
+# --------------------------
+@admin_bp.get("/profiles")
+def profiles():
+    try:
+        limit = int(request.args.get("limit", 50))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = min(max(limit, 1), profiler.MAX_PROFILES)
+
+    return jsonify({
+        "enabled": bool(profiler.PROFILE_TOKEN) or profiler.SAMPLE_RATE > 0,
+        "sample_rate": profiler.SAMPLE_RATE,
+        "interval_ms": profiler.INTERVAL * 1000,
+        "profiles": profiler.list_profiles(limit)
+    })
+
+
+# --------------------------
+# 3. collapsed stack 다운로드 (flamegraph.pl / speedscope 입력)
+#    GET /admin/profiles/<name>
+# --------------------------
+@admin_bp.get("/profiles/<name>")
+def profile_stacks(name):
+    path = profiler.profile_path(name)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(os.path.abspath(path), mimetype="text/plain", as_attachment=False)
+
+
+# --------------------------
+# 4. 모더레이션 큐 — 미처리 신고가 많은 대상부터, 대상별로 묶어서
+#    GET /admin/moderation/queue?limit=20&offset=0
+# --------------------------
+@admin_bp.get("/moderation/queue")
+def moderation_queue():
+    try:
+        limit = int(request.args.get("limit", 20))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    limit = min(max(limit, 1), 100)
+    offset = max(offset, 0)
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    try:
+        # ReportCounters 의 idx_queue 역순 — Reports 전체를 GROUP BY 하지 않는다
+        cur.execute("""
+            SELECT target_type, target_id, report_count, hidden_at
+            FROM ReportCounters
+            WHERE report_count > 0
+            ORDER BY report_count DESC
+            LIMIT %s OFFSET %s
+        """, (limit, offset))
+        targets = cur.fetchall()
+
+        reasons = {}
+        if targets:
+            # 페이지 대상들의 사유별 건수 (uk_target_reporter 범위)
+            placeholders = ", ".join(["(%s, %s)"] * len(targets))
+            cur.execute(f"""
+                SELECT target_type, target_id, reason, COUNT(*) AS n, MIN(created_at) AS first_at
+                FROM Reports
+                WHERE (target_type, target_id) IN ({placeholders}) AND status = 'pending'
+                GROUP BY target_type, target_id, reason
+            """, [x for t in targets for x in (t["target_type"], t["target_id"])])
+            for r in cur.fetchall():
+                reasons.setdefault((r["target_type"], r["target_id"]), []).append(r)
+
+        videos = hydration.video_cards([t["target_id"] for t in targets if t["target_type"] == "video"], cur)
+    finally:
+        cur.close()
+        conn.close()
+
+    items = []
+    for t in targets:
+        rs = reasons.get((t["target_type"], t["target_id"]), [])
+        item = {
+            "target_type": t["target_type"],
+            "target_id": t["target_id"],
+            "report_count": t["report_count"],
+            "hidden": t["hidden_at"] is not None,
+            "hidden_at": t["hidden_at"],
+            "first_reported_at": min((r["first_at"] for r in rs), default=None),
+            "reasons": {r["reason"]: r["n"] for r in rs},
+        }
+        v = videos.get(t["target_id"]) if t["target_type"] == "video" else None
+        if v is not None:
+            item["title"] = v["title"]
+            item["thumbnail_url"] = v["thumbnail_url"]
+            item["channel_id"] = v["user_id"]
+        items.append(item)
+
+    return jsonify({"threshold": moderation.HIDE_THRESHOLD, "items": items})
+
+
+# --------------------------
+# 5. 신고 처리 — 대상의 미처리 신고를 모두 resolved 로
+#    POST /admin/moderation/<target_type>/<target_id>  body: { "action": "hide" }
+#    action: hide (숨김 유지/적용) / dismiss (노출 복구)
+# --------------------------
+@admin_bp.post("/moderation/<target_type>/<int:target_id>")
+def moderation_resolve(target_type, target_id):
+    if target_type not in moderation.TARGET_TYPES:
+        return jsonify({"error": "target_type must be video, comment or user"}), 400
+    action = (request.get_json(silent=True) or {}).get("action")
+    if action not in ("hide", "dismiss"):
+        return jsonify({"error": "action must be hide or dismiss"}), 400
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    try:
+        resolved = moderation.resolve(cur, target_type, target_id, action == "hide")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    # 이 워커는 바로, 다른 워커는 다음 flush 주기에 반영
+    moderation.reload_hidden()
+    return jsonify({"message": "OK", "resolved": resolved})
+
+
+# --------------------------
+# 6. 백그라운드 작업 저널 (jobs.py) — 종류/상태별 건수와 가장 오래된 작업
+#    GET /admin/jobs
+# --------------------------
+@admin_bp.get("/jobs")
+def job_stats():
+    return jsonify({"workers": jobs.WORKERS, "jobs": jobs.stats()})
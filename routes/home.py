@@ -1,6 +1,14 @@
 from flask import Blueprint, jsonify, request
 from db import get_db
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+import affinity
+import cache
+import hydration
+import lookups
+import moderation
+import singleflight
+import trending
 
 home_bp = Blueprint('home', __name__)
 
@@ -33,42 +41,162 @@ def time_ago(dt):
     return f"{int(weeks)}주 전"
 
 
+def pretty_views(n):
+    """조회수 표기 (12345 -> "1.2만") — MySQL ROUND(n / 10000, 1) 과 같은 반올림"""
+    for unit, suffix in ((100_000_000, "억"), (10_000, "만")):
+        if n >= unit:
+            # 나눗셈 결과는 소수 4자리(div_precision_increment)에서 한 번, ROUND에서 한 번 반올림된다
+            v = (Decimal(n) / unit).quantize(Decimal("0.0001"), ROUND_HALF_UP).quantize(Decimal("0.1"), ROUND_HALF_UP)
+            return f"{v}{suffix}"
+    return str(n)
+
+
+# 시간대 가중치(10 / 1)는 타입 단위라, 타입별 조회수 상위 20개 안에 전체 상위 20개가 모두 들어 있다.
+# 타입마다 idx_type_views 역순으로 20개씩만 읽고 그 안에서 가중 정렬 (Videos 전체 스캔 + filesort 대신)
+TIME_BASED_QUERY = """
+    SELECT 
+        V.video_id,
+        V.view_count,
+        CASE
+            WHEN HOUR(NOW()) BETWEEN 18 AND 23 AND VT.type_name = 'video'  THEN 10
+            WHEN HOUR(NOW()) BETWEEN  6 AND 17 AND VT.type_name = 'shorts' THEN 10
+            ELSE 1
+        END AS type_weight
+    FROM VideoType VT
+    CROSS JOIN LATERAL (
+        SELECT v.video_id, v.view_count, v.upload_date
+        FROM Videos v
+        WHERE v.type_id = VT.type_id
+          AND v.visibility = 'public'
+        ORDER BY v.view_count DESC, v.upload_date DESC
+        LIMIT 20
+    ) V
+    ORDER BY (V.view_count * type_weight) DESC, V.upload_date DESC
+    LIMIT 20;
+"""
+
+# ?order=trending: 같은 구조로 타입별 idx_type_trend 역순 20개.
+# trend_score 는 로그 값이라 가중치 곱 대신 ln(가중치)를 더한다
+TRENDING_TIME_QUERY = """
+    SELECT
+        V.video_id,
+        V.view_count,
+        CASE
+            WHEN HOUR(NOW()) BETWEEN 18 AND 23 AND VT.type_name = 'video'  THEN 10
+            WHEN HOUR(NOW()) BETWEEN  6 AND 17 AND VT.type_name = 'shorts' THEN 10
+            ELSE 1
+        END AS type_weight
+    FROM VideoType VT
+    CROSS JOIN LATERAL (
+        SELECT v.video_id, v.view_count, v.trend_score
+        FROM Videos v
+        WHERE v.type_id = VT.type_id
+          AND v.visibility = 'public'
+          AND v.trend_score IS NOT NULL
+        ORDER BY v.trend_score DESC
+        LIMIT 20
+    ) V
+    ORDER BY (V.trend_score + LN(type_weight)) DESC
+    LIMIT 20;
+"""
+
+# ?order= 로 고를 수 있는 순위 (popular: 누적 조회수, trending: trending.py 감쇠 점수)
+ORDERS = ("popular", "trending")
+
+
+def _time_based(cur, order="popular"):
+    # 모든 사용자에게 같은 결과 — 동시 요청은 실행 하나를 공유
+    ranked = singleflight.query(cur, TRENDING_TIME_QUERY if order == "trending" else TIME_BASED_QUERY)
+    cards = {v["video_id"]: v for v in hydration.videos_with_channels([r["video_id"] for r in ranked], cur)}
+
+    rows = []
+    for r in ranked:
+        v = cards.get(r["video_id"])
+        if v is None:
+            continue
+        rows.append({
+            "video_id": v["video_id"],
+            "title": v["title"],
+            "video_type": v["type_name"],
+            "view_count": r["view_count"],
+            "upload_date": v["upload_date"],
+            "user_id": v["user_id"],
+            "uploader_name": v["channel"]["username"],
+            "profile_img": v["channel"]["profile_img"],
+            "type_weight": r["type_weight"],
+            "uploaded_before": time_ago(v["upload_date"]),
+        })
+    return moderation.visible(rows)
+
+
+def _recent_watched(cur, user_id):
+    cur.execute("""
+        SELECT wh.video_id, wh.watched_at
+        FROM WatchHistory wh
+        WHERE wh.user_id = %s
+        ORDER BY wh.watched_at DESC
+        LIMIT 5;
+    """, (user_id,))
+    watched = cur.fetchall()
+    cards = {v["video_id"]: v for v in hydration.videos_with_channels([r["video_id"] for r in watched], cur)}
+
+    rows = []
+    for r in watched:
+        v = cards.get(r["video_id"])
+        if v is None:
+            continue
+        rows.append({
+            "watched_at": r["watched_at"],
+            "video_id": v["video_id"],
+            "title": v["title"],
+            "video_type": v["type_name"],
+            "pretty_views": pretty_views(v["view_count"]),
+            "raw_views": v["view_count"],
+            "upload_date": v["upload_date"],
+            "creator_id": v["user_id"],
+            "creator_name": v["channel"]["username"],
+            "creator_profile_image": v["channel"]["profile_img"],
+            "uploaded_before": time_ago(v["upload_date"]),
+        })
+    return rows
+
+
+# 사용자별 홈 섹션: 1분간 그대로, 이후 1시간까지는 바로 내주고 백그라운드 갱신.
+# 본인 시청 기록이 바뀌면(POST /watch) user:<id>:history 로 즉시 무효화
+HOME_CACHE = cache.SWRCache("home_user", soft_ttl=60, ttl=3600)
+
+
+def _user_section(user_id, name, fn):
+    def load():
+        conn = get_db()
+        cur = conn.cursor(dictionary=True)
+        try:
+            return fn(cur, user_id)
+        finally:
+            cur.close()
+            conn.close()
+
+    return HOME_CACHE.get_or_load((user_id, name), load, tags=(f"user:{user_id}:history",))
+
+
+def _visible_section(user_id, name, fn):
+    # 캐시된 목록에서도 신고로 숨겨진 영상/크리에이터는 읽을 때 뺀다 (moderation.py)
+    return moderation.visible(_user_section(user_id, name, fn), user_key="creator_id")
+
+
 # ==================================================
 # 1) 시간대 기반 추천
 # ==================================================
 @home_bp.route("/time", methods=["GET"])
 def home_time():
+    order = request.args.get("order", "popular")
+    if order not in ORDERS:
+        return jsonify({"error": "order must be popular or trending"}), 400
+
     conn = get_db()
     cur = conn.cursor(dictionary=True)
 
-    query = """
-        SELECT 
-            V.video_id,
-            V.title,
-            VT.type_name AS video_type,
-            V.view_count,
-            V.upload_date,
-            U.user_id,
-            U.username AS uploader_name,
-            U.profile_img,
-            CASE
-                WHEN HOUR(NOW()) BETWEEN 18 AND 23 AND VT.type_name = 'video'  THEN 10
-                WHEN HOUR(NOW()) BETWEEN  6 AND 17 AND VT.type_name = 'shorts' THEN 10
-                ELSE 1
-            END AS type_weight
-        FROM Videos V
-        JOIN Users U ON U.user_id = V.user_id
-        JOIN VideoType VT ON V.type_id = VT.type_id
-        WHERE V.visibility = 'public'
-        ORDER BY (V.view_count * type_weight) DESC, V.upload_date DESC
-        LIMIT 20;
-    """
-
-    cur.execute(query)
-    rows = cur.fetchall()
-
-    for r in rows:
-        r["uploaded_before"] = time_ago(r["upload_date"])
+    rows = _time_based(cur, order)
 
     cur.close()
     conn.close()
@@ -81,148 +209,160 @@ def home_time():
 @home_bp.route("/watch/recent", methods=["GET"])
 def recent_watch():
     user_id = request.args.get("user_id", 1)  # 기본값 1
-    
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
+    return jsonify(_visible_section(user_id, "recent_watched", _recent_watched))
 
-    query = """
-        SELECT 
-            wh.watched_at,
-            v.video_id,
-            v.title,
-            vt.type_name AS video_type,
-            CASE
-                WHEN v.view_count >= 100000000 THEN CONCAT(ROUND(v.view_count / 100000000, 1), '억')
-                WHEN v.view_count >= 10000       THEN CONCAT(ROUND(v.view_count / 10000, 1), '만')
-                ELSE v.view_count
-            END AS pretty_views,
-            v.view_count AS raw_views,
-            v.upload_date,
-            u.user_id AS creator_id,
-            u.username AS creator_name,
-            u.profile_img AS creator_profile_image
-        FROM WatchHistory wh
-        JOIN Videos v ON wh.video_id = v.video_id
-        JOIN Users u  ON v.user_id  = u.user_id
-        JOIN VideoType vt ON v.type_id = vt.type_id
-        WHERE wh.user_id = %s
-        ORDER BY wh.watched_at DESC
-        LIMIT 5;
-    """
 
-    cur.execute(query, (user_id,))
-    rows = cur.fetchall()
+# ==================================================
+# 2-1) 시청 기록 저장
+#      POST /watch  body: { "user_id": 3, "video_id": 10, "position": 120, "finished": false }
+#      클라이언트는 시청 중 몇 초마다 위치를 저장한다 — 선호도/트렌딩에는 시청 세션마다 한 번만 반영
+# ==================================================
+# 마지막 저장 후 이만큼 지나서 다시 오면 새 시청으로 본다
+WATCH_SESSION_GAP_MINUTES = 30
 
-    for r in rows:
-        r["uploaded_before"] = time_ago(r["upload_date"])
 
-    cur.close()
-    conn.close()
-    return jsonify(rows)
+@home_bp.route("/watch", methods=["POST"])
+def record_watch():
+    body = request.get_json(silent=True) or {}
+    user_id = body.get("user_id")
+    video_id = body.get("video_id")
+    position = body.get("position", 0)
+    finished = bool(body.get("finished", False))
 
+    if None in (user_id, video_id):
+        return jsonify({"error": "user_id and video_id required"}), 400
 
-# ==================================================
-# 3) 광고 추천 (최근 7일 시청 기록 기반)
-# ==================================================
-@home_bp.route("/ads/recommend", methods=["GET"])
-def ads_recommend():
-    user_id = request.args.get("user_id", 1)  # 기본값 1
-    
     conn = get_db()
     cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("""
+            SELECT watched_at < NOW() - INTERVAL %s MINUTE AS new_session
+            FROM WatchHistory
+            WHERE user_id = %s AND video_id = %s
+        """, (WATCH_SESSION_GAP_MINUTES, user_id, video_id))
+        prev = cur.fetchone()
+        new_session = prev is None or bool(prev["new_session"])
+
+        cur.execute("""
+            INSERT INTO WatchHistory (user_id, video_id, last_position, is_finished)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                last_position = VALUES(last_position),
+                is_finished = VALUES(is_finished),
+                watched_at = CURRENT_TIMESTAMP
+        """, (user_id, video_id, position, finished))
+        # 선호도 프로필은 같은 트랜잭션에서 갱신 (타입/크리에이터는 카드에서)
+        video = None
+        if new_session:
+            video = hydration.video_cards([video_id], cur).get(int(video_id))
+            if video is not None:
+                affinity.record_watch(cur, user_id, video["type_id"], video["user_id"])
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
 
-    query = """
-        SELECT
-            top_type.type_name AS video_type,
-            CASE
-                WHEN top_type.type_name = 'video'  THEN '일반 동영상 광고'
-                WHEN top_type.type_name = 'shorts' THEN '쇼츠 전용 광고'
-                WHEN top_type.type_name = 'live'   THEN '라이브 스트리밍 광고'
-                ELSE '기본 광고'
-            END AS recommended_ad,
-            CASE
-                WHEN top_type.type_name = 'video'  THEN 'https://cdn.example.com/ad/video_banner.png'
-                WHEN top_type.type_name = 'shorts' THEN 'https://cdn.example.com/ad/shorts_banner.png'
-                WHEN top_type.type_name = 'live'   THEN 'https://cdn.example.com/ad/live_banner.png'
-                ELSE 'https://cdn.example.com/ad/default_banner.png'
-            END AS ad_image_url
-        FROM (
-            SELECT vt.type_name
-            FROM WatchHistory wh
-            JOIN Videos v    ON wh.video_id = v.video_id
-            JOIN VideoType vt ON v.type_id  = vt.type_id
-            WHERE wh.user_id = %s
-              AND wh.watched_at >= NOW() - INTERVAL 7 DAY
-            GROUP BY vt.type_name
-            ORDER BY COUNT(*) DESC
-            LIMIT 1
-        ) AS top_type;
-    """
+    cache.invalidate(f"user:{user_id}:history")
+    # 트렌딩은 커밋 뒤 버퍼에만 — Videos 행은 trending.py flush 가 잠근다
+    if video is not None:
+        trending.record_view(video_id)
+    return jsonify({"message": "OK"})
 
-    cur.execute(query, (user_id,))
-    row = cur.fetchone()
-    
-    # 시청 기록이 없으면 기본 광고
-    if not row:
-        row = {
+
+# ==================================================
+# 3) 광고 추천 (최근 시청 타입 기반)
+# ==================================================
+ADS = {
+    "video":  ("일반 동영상 광고", "https://cdn.example.com/ad/video_banner.png"),
+    "shorts": ("쇼츠 전용 광고", "https://cdn.example.com/ad/shorts_banner.png"),
+    "live":   ("라이브 스트리밍 광고", "https://cdn.example.com/ad/live_banner.png"),
+}
+DEFAULT_AD = ("기본 광고", "https://cdn.example.com/ad/default_banner.png")
+
+# 타입 점수 반감기 3.5일 → 7일 전 시청 1회가 0.25. 그보다 약하면 "최근 7일 기록 없음"으로 보고 기본 광고
+MIN_AD_SCORE = 0.25
+
+
+def _recommended_ad(cur, user_id):
+    best = affinity.load(cur, user_id).top_type()
+
+    # 최근 시청 기록이 없으면 기본 광고
+    if best is None or best[1] < MIN_AD_SCORE:
+        return {
             "video_type": "General",
-            "recommended_ad": "기본 광고",
-            "ad_image_url": "https://cdn.example.com/ad/default_banner.png"
+            "recommended_ad": DEFAULT_AD[0],
+            "ad_image_url": DEFAULT_AD[1],
         }
 
-    cur.close()
-    conn.close()
-    return jsonify(row)
+    type_name = {t["type_id"]: t["type_name"] for t in lookups.video_types(cur)}.get(best[0])
+    ad, image = ADS.get(type_name, DEFAULT_AD)
+    return {"video_type": type_name, "recommended_ad": ad, "ad_image_url": image}
+
+
+@home_bp.route("/ads/recommend", methods=["GET"])
+def ads_recommend():
+    user_id = request.args.get("user_id", 1)  # 기본값 1
+    return jsonify(_user_section(user_id, "ads", _recommended_ad))
 
 
 # ==================================================
-# 4) 크리에이터 TOP2 → 조회수 TOP4
+# 4) 크리에이터 TOP2 → 조회수(또는 트렌딩) TOP4
 # ==================================================
-@home_bp.route("/creators/top", methods=["GET"])
-def top_creators():
-    user_id = request.args.get("user_id", 1)  # 기본값 1
-    
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
+_CREATOR_VIDEO_ORDER = {
+    "popular": "v.view_count DESC, v.upload_date DESC",
+    "trending": "v.trend_score DESC, v.view_count DESC",
+}
 
-    query = """
-        WITH top_creators AS (
-            SELECT v.user_id AS creator_id
-            FROM WatchHistory wh
-            JOIN Videos v ON wh.video_id = v.video_id
-            WHERE wh.user_id = %s
-            GROUP BY v.user_id
-            ORDER BY COUNT(*) DESC
-            LIMIT 2
-        )
-        SELECT 
-            v.video_id,
-            v.user_id AS creator_id,
-            u.username AS creator_name,
-            u.profile_img AS creator_profile_image,
-            v.title,
-            vt.type_name AS video_type,
-            CASE
-                WHEN v.view_count >= 100000000 THEN CONCAT(ROUND(v.view_count / 100000000, 1), '억')
-                WHEN v.view_count >= 10000       THEN CONCAT(ROUND(v.view_count / 10000, 1), '만')
-                ELSE v.view_count
-            END AS pretty_views,
-            v.view_count AS raw_views,
-            v.upload_date
+
+def _top_creator_videos(cur, user_id, order="popular"):
+    creators = affinity.load(cur, user_id).top_creators(2)
+    if not creators:
+        return []
+
+    placeholders = ", ".join(["%s"] * len(creators))
+    cur.execute(f"""
+        SELECT v.video_id, v.view_count
         FROM Videos v
-        JOIN top_creators tc ON v.user_id = tc.creator_id
-        JOIN Users u         ON v.user_id = u.user_id
-        JOIN VideoType vt    ON v.type_id = vt.type_id
-        ORDER BY v.view_count DESC, v.upload_date DESC
+        WHERE v.user_id IN ({placeholders})
+        ORDER BY {_CREATOR_VIDEO_ORDER[order]}
         LIMIT 4;
-    """
+    """, tuple(creators))
+    ranked = cur.fetchall()
+    cards = {v["video_id"]: v for v in hydration.videos_with_channels([r["video_id"] for r in ranked], cur)}
+
+    rows = []
+    for r in ranked:
+        v = cards.get(r["video_id"])
+        if v is None:
+            continue
+        rows.append({
+            "video_id": v["video_id"],
+            "creator_id": v["user_id"],
+            "creator_name": v["channel"]["username"],
+            "creator_profile_image": v["channel"]["profile_img"],
+            "title": v["title"],
+            "video_type": v["type_name"],
+            "pretty_views": pretty_views(r["view_count"]),
+            "raw_views": r["view_count"],
+            "upload_date": v["upload_date"],
+        })
+    return rows
 
-    cur.execute(query, (user_id,))
-    rows = cur.fetchall()
 
-    cur.close()
-    conn.close()
-    return jsonify(rows)
+@home_bp.route("/creators/top", methods=["GET"])
+def top_creators():
+    user_id = request.args.get("user_id", 1)  # 기본값 1
+    order = request.args.get("order", "popular")
+    if order not in ORDERS:
+        return jsonify({"error": "order must be popular or trending"}), 400
+    if order == "popular":
+        return jsonify(_visible_section(user_id, "top_creators", _top_creator_videos))
+    return jsonify(_visible_section(
+        user_id, "top_creators:trending", lambda cur, uid: _top_creator_videos(cur, uid, "trending"),
+    ))
 
 
 # ==================================================
@@ -262,10 +402,12 @@ def post_random():
         LEFT JOIN Users u_top ON c_top.user_id = u_top.user_id
         WHERE p.visibility = 'public'
         ORDER BY RAND()
-        LIMIT 1;
+        LIMIT 5;
     """
     cur.execute(query_post)
-    post = cur.fetchone()
+    # 후보 몇 개 중 숨겨지지 않은 첫 번째 (정렬 비용은 LIMIT 1 과 같다)
+    posts = moderation.visible(cur.fetchall(), video_key="post_id", user_key="author_id")
+    post = posts[0] if posts else None
 
     if not post:
         cur.close()
@@ -297,6 +439,7 @@ def shorts_random():
                 ELSE v.title
             END AS short_title,
             v.view_count AS views,
+            u.user_id,
             u.username,
             u.profile_img
         FROM Videos v
@@ -309,7 +452,7 @@ def shorts_random():
     """
 
     cur.execute(query)
-    rows = cur.fetchall()
+    rows = moderation.visible(cur.fetchall(), video_key="short_id")
 
     cur.close()
     conn.close()
@@ -322,146 +465,21 @@ def shorts_random():
 @home_bp.route("/full", methods=["GET"])
 def home_full():
     user_id = request.args.get("user_id", 1)  # 기본값 1
-    
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
 
     result = {}
 
     # ----------------------
-    # 시간대 기반 추천
-    cur.execute("""
-        SELECT 
-            V.video_id,
-            V.title,
-            VT.type_name AS video_type,
-            V.view_count,
-            V.upload_date,
-            U.user_id,
-            U.username AS uploader_name,
-            U.profile_img,
-            CASE
-                WHEN HOUR(NOW()) BETWEEN 18 AND 23 AND VT.type_name = 'video'  THEN 10
-                WHEN HOUR(NOW()) BETWEEN  6 AND 17 AND VT.type_name = 'shorts' THEN 10
-                ELSE 1
-            END AS type_weight
-        FROM Videos V
-        JOIN Users U ON U.user_id = V.user_id
-        JOIN VideoType VT ON V.type_id = VT.type_id
-        WHERE V.visibility = 'public'
-        ORDER BY (V.view_count * type_weight) DESC, V.upload_date DESC
-        LIMIT 20;
-    """)
-    rows = cur.fetchall()
-    for r in rows:
-        r["uploaded_before"] = time_ago(r["upload_date"])
-    result["time_based"] = rows
-
-    # ----------------------
-    # 최근 본 영상 5개
-    query = """
-        SELECT 
-            wh.watched_at,
-            v.video_id,
-            v.title,
-            vt.type_name AS video_type,
-            CASE
-                WHEN v.view_count >= 100000000 THEN CONCAT(ROUND(v.view_count / 100000000, 1), '억')
-                WHEN v.view_count >= 10000       THEN CONCAT(ROUND(v.view_count / 10000, 1), '만')
-                ELSE v.view_count
-            END AS pretty_views,
-            v.view_count AS raw_views,
-            v.upload_date,
-            u.user_id AS creator_id,
-            u.username AS creator_name,
-            u.profile_img AS creator_profile_image
-        FROM WatchHistory wh
-        JOIN Videos v ON wh.video_id = v.video_id
-        JOIN Users u  ON v.user_id  = u.user_id
-        JOIN VideoType vt ON v.type_id = vt.type_id
-        WHERE wh.user_id = %s
-        ORDER BY wh.watched_at DESC
-        LIMIT 5;
-    """
-    cur.execute(query, (user_id,))
-    rows = cur.fetchall()
-    for r in rows:
-        r["uploaded_before"] = time_ago(r["upload_date"])
-    result["recent_watched"] = rows
+    # 사용자별 섹션 (캐시) — 미스 때 섹션이 커넥션을 직접 잡으므로 아래 conn보다 먼저
+    result["recent_watched"] = _visible_section(user_id, "recent_watched", _recent_watched)
+    result["ads"] = _user_section(user_id, "ads", _recommended_ad)
+    result["top_creators"] = _visible_section(user_id, "top_creators", _top_creator_videos)
 
-    # ----------------------
-    # 광고 (최근 7일 시청 기록 기반)
-    cur.execute("""
-        SELECT
-            top_type.type_name AS video_type,
-            CASE
-                WHEN top_type.type_name = 'video'  THEN '일반 동영상 광고'
-                WHEN top_type.type_name = 'shorts' THEN '쇼츠 전용 광고'
-                WHEN top_type.type_name = 'live'   THEN '라이브 스트리밍 광고'
-                ELSE '기본 광고'
-            END AS recommended_ad,
-            CASE
-                WHEN top_type.type_name = 'video'  THEN 'https://cdn.example.com/ad/video_banner.png'
-                WHEN top_type.type_name = 'shorts' THEN 'https://cdn.example.com/ad/shorts_banner.png'
-                WHEN top_type.type_name = 'live'   THEN 'https://cdn.example.com/ad/live_banner.png'
-                ELSE 'https://cdn.example.com/ad/default_banner.png'
-            END AS ad_image_url
-        FROM (
-            SELECT vt.type_name
-            FROM WatchHistory wh
-            JOIN Videos v    ON wh.video_id = v.video_id
-            JOIN VideoType vt ON v.type_id  = vt.type_id
-            WHERE wh.user_id = %s
-              AND wh.watched_at >= NOW() - INTERVAL 7 DAY
-            GROUP BY vt.type_name
-            ORDER BY COUNT(*) DESC
-            LIMIT 1
-        ) AS top_type;
-    """, (user_id,))
-    ad_row = cur.fetchone()
-    if not ad_row:
-        ad_row = {
-            "video_type": "General",
-            "recommended_ad": "기본 광고",
-            "ad_image_url": "https://cdn.example.com/ad/default_banner.png"
-        }
-    result["ads"] = ad_row
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
 
     # ----------------------
-    # TOP2 → 조회수 TOP4
-    query = """
-        WITH top_creators AS (
-            SELECT v.user_id AS creator_id
-            FROM WatchHistory wh
-            JOIN Videos v ON wh.video_id = v.video_id
-            WHERE wh.user_id = %s
-            GROUP BY v.user_id
-            ORDER BY COUNT(*) DESC
-            LIMIT 2
-        )
-        SELECT 
-            v.video_id,
-            v.user_id AS creator_id,
-            u.username AS creator_name,
-            u.profile_img AS creator_profile_image,
-            v.title,
-            vt.type_name AS video_type,
-            CASE
-                WHEN v.view_count >= 100000000 THEN CONCAT(ROUND(v.view_count / 100000000, 1), '억')
-                WHEN v.view_count >= 10000       THEN CONCAT(ROUND(v.view_count / 10000, 1), '만')
-                ELSE v.view_count
-            END AS pretty_views,
-            v.view_count AS raw_views,
-            v.upload_date
-        FROM Videos v
-        JOIN top_creators tc ON v.user_id = tc.creator_id
-        JOIN Users u         ON v.user_id = u.user_id
-        JOIN VideoType vt    ON v.type_id = vt.type_id
-        ORDER BY v.view_count DESC, v.upload_date DESC
-        LIMIT 4;
-    """
-    cur.execute(query, (user_id,))
-    result["top_creators"] = cur.fetchall()
+    # 시간대 기반 추천
+    result["time_based"] = _time_based(cur)
 
     # ----------------------
     # 랜덤 영상 (type_name='video') + 베스트 댓글
@@ -493,9 +511,10 @@ def home_full():
         LEFT JOIN Users u_top ON c_top.user_id = u_top.user_id
         WHERE p.visibility = 'public'
         ORDER BY RAND()
-        LIMIT 1;
+        LIMIT 5;
     """)
-    post = cur.fetchone()
+    posts = moderation.visible(cur.fetchall(), video_key="post_id", user_key="author_id")
+    post = posts[0] if posts else None
     if post:
         post["uploaded_before"] = time_ago(post["upload_date"])
     result["random_post"] = post
@@ -511,6 +530,7 @@ def home_full():
                 ELSE v.title
             END AS short_title,
             v.view_count AS views,
+            u.user_id,
             u.username,
             u.profile_img
         FROM Videos v
@@ -521,7 +541,7 @@ def home_full():
         ORDER BY RAND()
         LIMIT 6;
     """)
-    result["random_shorts"] = cur.fetchall()
+    result["random_shorts"] = moderation.visible(cur.fetchall(), video_key="short_id")
 
     cur.close()
     conn.close()
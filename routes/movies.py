@@ -0,0 +1,141 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime
+from db import get_db
+from entitlements import entitlements
+from catalog import movie_catalog, SORTS
+
+movies_bp = Blueprint("movies", __name__)
+
+
+def _positive_int(value):
+    """``value`` as an int >= 1 (JSON number or digit string), else None."""
+    if isinstance(value, (bool, float)):
+        return None
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return None
+    return n if n >= 1 else None
+
+
+# ----------------------------
+# 1) 재생 권한 확인 (GET)
+#    GET /movies/<movie_id>/playable?user_id=3
+#    재생 시작마다 호출 — DB 대신 메모리 캐시(entitlements)에서 판단
+# ----------------------------
+@movies_bp.route("/movies/<int:movie_id>/playable", methods=["GET"])
+def movie_playable(movie_id):
+    user_id = request.args.get("user_id", type=int)
+    if user_id is None:
+        return jsonify({"error": "user_id required"}), 400
+
+    try:
+        playable, reason, expires_at = entitlements.can_play(user_id, movie_id)
+        premium = entitlements.premium_active(user_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({
+        "user_id": user_id,
+        "movie_id": movie_id,
+        "playable": playable,
+        "reason": reason,
+        "expires_at": datetime.fromtimestamp(expires_at) if expires_at else None,
+        "premium": premium
+    })
+
+
+# ----------------------------
+# 2) 영화 구매 / 대여 (POST)
+#    POST /movies/<movie_id>/purchase
+#    body: { "user_id": 3, "type": "rent", "rent_days": 2 }  # type: "buy" or "rent"
+# ----------------------------
+@movies_bp.route("/movies/<int:movie_id>/purchase", methods=["POST"])
+def movie_purchase(movie_id):
+    body = request.get_json(silent=True) or {}
+    user_id = body.get("user_id")
+    purchase_type = body.get("type", "buy")
+    rent_days = body.get("rent_days", 2)
+
+    if user_id is None:
+        return jsonify({"error": "user_id required"}), 400
+    if purchase_type not in ("buy", "rent"):
+        return jsonify({"error": "type must be 'buy' or 'rent'"}), 400
+    if purchase_type == "rent":
+        rent_days = _positive_int(rent_days)
+        if rent_days is None:
+            return jsonify({"error": "rent_days must be a positive integer"}), 400
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    try:
+        cur.execute("SELECT price FROM Movies WHERE movie_id = %s;", (movie_id,))
+        movie = cur.fetchone()
+        if not movie:
+            cur.close()
+            conn.close()
+            return jsonify({"error": "Movie not found"}), 404
+
+        if purchase_type == "rent":
+            cur.execute("""
+                INSERT INTO MoviePurchases (user_id, movie_id, type, price_paid, expired_at)
+                VALUES (%s, %s, 'rent', %s, NOW() + INTERVAL %s DAY);
+            """, (user_id, movie_id, movie["price"], rent_days))
+        else:
+            cur.execute("""
+                INSERT INTO MoviePurchases (user_id, movie_id, type, price_paid)
+                VALUES (%s, %s, 'buy', %s);
+            """, (user_id, movie_id, movie["price"]))
+        purchase_id = cur.lastrowid
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        cur.close()
+        conn.close()
+        return jsonify({"error": str(e)}), 500
+
+    cur.close()
+    conn.close()
+
+    # 구매 즉시 재생 가능하도록 캐시 무효화
+    entitlements.invalidate(user_id)
+
+    return jsonify({"message": "Purchased", "purchase_id": purchase_id}), 201
+
+
+# ----------------------------
+# 3) 영화 카탈로그 (GET)
+#    GET /movies/catalog?min_year=2000&max_year=2020&min_price=0&max_price=5000
+#        &min_duration=60&max_duration=180&sort=newest&limit=20&offset=0
+#    sort: newest / oldest / price_asc / price_desc / duration_asc / duration_desc / title
+# ----------------------------
+@movies_bp.route("/movies/catalog", methods=["GET"])
+def movie_catalog_list():
+    sort = request.args.get("sort", "newest")
+    if sort not in SORTS:
+        return jsonify({"error": f"sort must be one of {', '.join(SORTS)}"}), 400
+
+    limit = request.args.get("limit", default=20, type=int)
+    offset = request.args.get("offset", default=0, type=int)
+    limit = min(max(limit, 1), 100)
+    offset = max(offset, 0)
+
+    ranges = {}
+    for col, arg in (("release_year", "year"), ("price", "price"), ("duration", "duration")):
+        lo = request.args.get(f"min_{arg}", type=float)
+        hi = request.args.get(f"max_{arg}", type=float)
+        if lo is not None or hi is not None:
+            ranges[col] = (lo, hi)
+
+    try:
+        total, rows = movie_catalog.query(ranges, sort=sort, limit=limit, offset=offset)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({
+        "movies": rows,
+        "total": total,
+        "limit": limit,
+        "offset": offset
+    })
@@ -1,6 +1,15 @@
 from flask import Blueprint, request, jsonify
-from db import get_db
-from datetime import datetime
+from db import get_db, fetch_compact
+import cache
+import lookups
+from entitlements import entitlements
+import profiler
+from datetime import datetime, timedelta
+from analytics import GRANULARITIES, HOURLY_RETENTION_DAYS, SERIES_SOURCES, fill_series, next_bucket, truncate
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import os
+import time
 
 yt_bp = Blueprint("yt", __name__)
 
@@ -9,12 +18,7 @@ yt_bp = Blueprint("yt", __name__)
 # 1) Profile + Summary
 #    GET /yt_profile/<user_id>
 # ============================================================
-@yt_bp.route("/yt_profile/<int:user_id>", methods=["GET"])
-def yt_profile(user_id):
-    """프로필 정보 + 각종 요약 통계"""
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
+def _load_profile(cur, user_id):
     # 프로필 정보
     cur.execute("""
         SELECT 
@@ -30,9 +34,7 @@ def yt_profile(user_id):
     profile = cur.fetchone()
 
     if not profile:
-        cur.close()
-        conn.close()
-        return jsonify({"success": False, "error": "User not found"}), 404
+        return None
 
     # 요약 정보
     summary = {}
@@ -88,11 +90,8 @@ def yt_profile(user_id):
     """, (user_id,))
     premium_info = cur.fetchone()
     if premium_info:
-        # is_active를 Python에서 계산 (end_date > 현재 시간)
-        if premium_info.get("end_date"):
-            premium_info["is_active"] = premium_info["end_date"] > datetime.now()
-        else:
-            premium_info["is_active"] = False
+        # 재생 판단과 같은 기준 (entitlements 캐시, 만료 시각에 정확히 꺼짐)
+        premium_info["is_active"] = entitlements.premium_active(user_id, cur)
     summary["premium"] = premium_info if premium_info else None
 
     # 고객센터 문의 수
@@ -103,42 +102,38 @@ def yt_profile(user_id):
     """, (user_id,))
     summary["support_ticket_count"] = cur.fetchone()["cnt"]
 
+    return {
+        "profile": profile,
+        "summary": summary
+    }
+
+
+@yt_bp.route("/yt_profile/<int:user_id>", methods=["GET"])
+def yt_profile(user_id):
+    """프로필 정보 + 각종 요약 통계"""
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    data = _load_profile(cur, user_id)
+
     cur.close()
     conn.close()
 
-    # datetime 변환
-    if profile.get("join_date"):
-        profile["join_date"] = profile["join_date"].strftime('%Y-%m-%d %H:%M:%S')
-    
-    if summary["premium"]:
-        if summary["premium"].get("start_date"):
-            summary["premium"]["start_date"] = summary["premium"]["start_date"].strftime('%Y-%m-%d %H:%M:%S')
-        if summary["premium"].get("end_date"):
-            summary["premium"]["end_date"] = summary["premium"]["end_date"].strftime('%Y-%m-%d %H:%M:%S')
+    if not data:
+        return jsonify({"success": False, "error": "User not found"}), 404
 
-    return jsonify({
-        "success": True,
-        "profile": profile,
-        "summary": summary
-    })
+    return jsonify({"success": True, **data})
 
 
 # ============================================================
 # 2) Watch History (Videos + Shorts + Live)
-#    GET /yt_history?user_id=<user_id>&type=<all|video|shorts|live>
+#    GET /yt_history?user_id=<user_id>&type=<all|video|shorts|live>&format=<rows|columnar>
+#    format=columnar: {"columns": [...], "rows": [[...], ...]} — 대량 기록용
 # ============================================================
-@yt_bp.route("/yt_history", methods=["GET"])
-def yt_history():
-    """시청 기록 조회 (필터: video/shorts/live/all)"""
-    user_id = request.args.get("user_id")
-    type_filter = request.args.get("type", "all")
+RESPONSE_FORMATS = ("rows", "columnar")
 
-    if not user_id:
-        return jsonify({"success": False, "error": "user_id is required"}), 400
-
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
 
+def _load_history(cur, user_id, type_filter="all", limit=None, columnar=False):
     sql = """
         SELECT 
             h.history_id,
@@ -167,40 +162,57 @@ def yt_history():
     params = [user_id]
 
     if type_filter != "all":
-        sql += " AND vt.type_name = %s"
-        params.append(type_filter)
+        sql += " AND v.type_id = %s"
+        # compact 커서는 lookups 로 넘기지 않는다
+        params.append(lookups.type_id(type_filter, None if columnar else cur))
 
     sql += " ORDER BY h.watched_at DESC"
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
 
     cur.execute(sql, tuple(params))
+    if columnar:
+        columns, rows = fetch_compact(cur)
+        return {"count": len(rows), "columns": columns, "rows": rows}
     rows = cur.fetchall()
 
+    return {
+        "count": len(rows),
+        "history": rows
+    }
+
+
+@yt_bp.route("/yt_history", methods=["GET"])
+def yt_history():
+    """시청 기록 조회 (필터: video/shorts/live/all)"""
+    user_id = request.args.get("user_id")
+    type_filter = request.args.get("type", "all")
+    fmt = request.args.get("format", "rows")
+
+    if not user_id:
+        return jsonify({"success": False, "error": "user_id is required"}), 400
+    if fmt not in RESPONSE_FORMATS:
+        return jsonify({"success": False, "error": "format must be rows or columnar"}), 400
+
+    columnar = fmt == "columnar"
+    conn = get_db()
+    cur = conn.cursor(compact=True) if columnar else conn.cursor(dictionary=True)
+
+    data = _load_history(cur, user_id, type_filter, columnar=columnar)
+
     cur.close()
     conn.close()
 
-    # datetime 변환
-    for row in rows:
-        if row.get("watched_at"):
-            row["watched_at"] = row["watched_at"].strftime('%Y-%m-%d %H:%M:%S')
-
-    return jsonify({
-        "success": True,
-        "count": len(rows),
-        "history": rows
-    })
+    return jsonify({"success": True, **data})
 
 
 # ============================================================
 # 3) Playlists (재생목록 목록)
 #    GET /yt_playlists/<user_id>
 # ============================================================
-@yt_bp.route("/yt_playlists/<int:user_id>", methods=["GET"])
-def yt_playlists(user_id):
-    """사용자의 재생목록 조회"""
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("""
+def _load_playlists(cur, user_id, limit=None):
+    sql = """
         SELECT 
             p.playlist_id,
             p.title,
@@ -212,41 +224,40 @@ def yt_playlists(user_id):
         WHERE p.user_id = %s
         GROUP BY p.playlist_id, p.title, p.is_public, p.created_at
         ORDER BY p.created_at DESC
-    """, (user_id,))
+    """
+    params = [user_id]
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
 
+    cur.execute(sql, tuple(params))
     rows = cur.fetchall()
 
+    return {
+        "count": len(rows),
+        "playlists": rows
+    }
+
+
+@yt_bp.route("/yt_playlists/<int:user_id>", methods=["GET"])
+def yt_playlists(user_id):
+    """사용자의 재생목록 조회"""
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    data = _load_playlists(cur, user_id)
+
     cur.close()
     conn.close()
 
-    # datetime 변환
-    for row in rows:
-        if row.get("created_at"):
-            row["created_at"] = row["created_at"].strftime('%Y-%m-%d %H:%M:%S')
-
-    return jsonify({
-        "success": True,
-        "count": len(rows),
-        "playlists": rows
-    })
+    return jsonify({"success": True, **data})
 
 
 # ============================================================
 # 4) My Videos (업로드한 영상)
-#    GET /yt_myvideos?user_id=<user_id>&type=<all|video|shorts|live>
+#    GET /yt_myvideos?user_id=<user_id>&type=<all|video|shorts|live>&format=<rows|columnar>
 # ============================================================
-@yt_bp.route("/yt_myvideos", methods=["GET"])
-def yt_myvideos():
-    """사용자가 업로드한 영상 조회"""
-    user_id = request.args.get("user_id")
-    type_filter = request.args.get("type", "all")
-
-    if not user_id:
-        return jsonify({"success": False, "error": "user_id is required"}), 400
-
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
+def _load_myvideos(cur, user_id, type_filter="all", limit=None, columnar=False):
     sql = """
         SELECT
             v.video_id,
@@ -267,10 +278,134 @@ def yt_myvideos():
     params = [user_id]
 
     if type_filter != "all":
-        sql += " AND vt.type_name = %s"
-        params.append(type_filter)
+        sql += " AND v.type_id = %s"
+        # compact 커서는 lookups 로 넘기지 않는다
+        params.append(lookups.type_id(type_filter, None if columnar else cur))
 
     sql += " ORDER BY v.upload_date DESC"
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+
+    cur.execute(sql, tuple(params))
+    if columnar:
+        columns, rows = fetch_compact(cur)
+        return {"count": len(rows), "columns": columns, "rows": rows}
+    rows = cur.fetchall()
+
+    return {
+        "count": len(rows),
+        "videos": rows
+    }
+
+
+# 업로드 목록: 영상별 카운트가 바뀌면(shorts 좋아요/댓글) video:<id>, 업로드/삭제는 user:<id>:videos
+MYVIDEOS_CACHE = cache.Cache("yt_myvideos", ttl=60)
+
+
+def _myvideos_tags(user_id, data):
+    if "columns" in data:
+        idx = data["columns"].index("video_id")
+        video_ids = [r[idx] for r in data["rows"]]
+    else:
+        video_ids = [r["video_id"] for r in data["videos"]]
+    return [f"user:{user_id}:videos"] + [f"video:{vid}" for vid in video_ids]
+
+
+@yt_bp.route("/yt_myvideos", methods=["GET"])
+def yt_myvideos():
+    """사용자가 업로드한 영상 조회"""
+    user_id = request.args.get("user_id")
+    type_filter = request.args.get("type", "all")
+    fmt = request.args.get("format", "rows")
+
+    if not user_id:
+        return jsonify({"success": False, "error": "user_id is required"}), 400
+    if fmt not in RESPONSE_FORMATS:
+        return jsonify({"success": False, "error": "format must be rows or columnar"}), 400
+
+    columnar = fmt == "columnar"
+
+    def load():
+        conn = get_db()
+        cur = conn.cursor(compact=True) if columnar else conn.cursor(dictionary=True)
+        try:
+            return _load_myvideos(cur, user_id, type_filter, columnar=columnar)
+        finally:
+            cur.close()
+            conn.close()
+
+    data = MYVIDEOS_CACHE.get_or_load((user_id, type_filter, fmt), load, tags=lambda d: _myvideos_tags(user_id, d))
+
+    return jsonify({"success": True, **data})
+
+
+# ============================================================
+# 4-1) My Videos Analytics (영상별 기간 통계)
+#      GET /yt_myvideos/analytics?user_id=<user_id>&video_id=<video_id>
+#          &granularity=<hour|day|month>&from=YYYY-MM-DD&to=YYYY-MM-DD
+#      video_id 생략 시 사용자의 전체 영상 합계
+# ============================================================
+# granularity -> (기본 조회 기간, 최대 조회 기간). 시간 단위는 보존 기간(7일)까지만 있다
+ANALYTICS_RANGES = {
+    "hour": (timedelta(days=2), timedelta(days=HOURLY_RETENTION_DAYS)),
+    "day": (timedelta(days=28), timedelta(days=366)),
+    "month": (timedelta(days=365), timedelta(days=3660)),
+}
+
+
+@yt_bp.route("/yt_myvideos/analytics", methods=["GET"])
+def yt_myvideos_analytics():
+    """업로드 영상의 시간/일/월 단위 조회·좋아요·댓글 추이"""
+    user_id = request.args.get("user_id", type=int)
+    video_id = request.args.get("video_id", type=int)
+    granularity = request.args.get("granularity", "day")
+
+    if not user_id:
+        return jsonify({"success": False, "error": "user_id is required"}), 400
+    if granularity not in GRANULARITIES:
+        return jsonify({"success": False, "error": "granularity must be hour, day or month"}), 400
+
+    default_range, max_range = ANALYTICS_RANGES[granularity]
+    to_arg = request.args.get("to")
+    try:
+        end = datetime.fromisoformat(to_arg) if to_arg else datetime.now()
+        start = datetime.fromisoformat(request.args["from"]) if request.args.get("from") else end - default_range
+    except ValueError:
+        return jsonify({"success": False, "error": "from/to must be ISO dates (YYYY-MM-DD[ HH:MM])"}), 400
+
+    # 'to'에 날짜만 주면 그날 전체를 포함
+    if to_arg and len(to_arg) == 10:
+        end += timedelta(days=1) - timedelta(microseconds=1)
+    start = truncate(start, granularity)
+    end = next_bucket(truncate(end, granularity), granularity)
+    if start >= end or end - start > max_range:
+        return jsonify({"success": False, "error": f"range must be positive and at most {max_range.days} days"}), 400
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    stored, bucket_of = SERIES_SOURCES[granularity]
+    bucket = bucket_of.format(col="r.bucket_start")
+    sql = f"""
+        SELECT
+            {bucket} AS bucket_start,
+            SUM(r.views) AS views,
+            SUM(r.likes) AS likes,
+            SUM(r.comments) AS comments
+        FROM Videos v
+        JOIN VideoStatsRollup r ON r.video_id = v.video_id
+        WHERE v.user_id = %s
+          AND r.granularity IN ({", ".join(["%s"] * len(stored))})
+          AND r.bucket_start >= %s AND r.bucket_start < %s
+    """
+    params = [user_id, *stored, start, end]
+
+    if video_id:
+        sql += " AND v.video_id = %s"
+        params.append(video_id)
+
+    sql += f" GROUP BY {bucket} ORDER BY {bucket}"
 
     cur.execute(sql, tuple(params))
     rows = cur.fetchall()
@@ -278,15 +413,13 @@ def yt_myvideos():
     cur.close()
     conn.close()
 
-    # datetime 변환
-    for row in rows:
-        if row.get("upload_date"):
-            row["upload_date"] = row["upload_date"].strftime('%Y-%m-%d %H:%M:%S')
-
     return jsonify({
         "success": True,
-        "count": len(rows),
-        "videos": rows
+        "video_id": video_id,
+        "granularity": granularity,
+        "from": start,
+        "to": end,
+        "series": fill_series(rows, start, end, granularity)
     })
 
 
@@ -294,13 +427,8 @@ def yt_myvideos():
 # 5) Offline Saved Videos (오프라인 저장 영상)
 #    GET /yt_offline/<user_id>
 # ============================================================
-@yt_bp.route("/yt_offline/<int:user_id>", methods=["GET"])
-def yt_offline(user_id):
-    """오프라인 저장 영상 조회"""
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("""
+def _load_offline(cur, user_id, limit=None):
+    sql = """
         SELECT
             o.user_id,
             o.video_id,
@@ -319,38 +447,41 @@ def yt_offline(user_id):
         JOIN Users u ON v.user_id = u.user_id
         WHERE o.user_id = %s
         ORDER BY o.saved_at DESC
-    """, (user_id,))
+    """
+    params = [user_id]
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
 
+    cur.execute(sql, tuple(params))
     rows = cur.fetchall()
 
+    return {
+        "count": len(rows),
+        "offline_videos": rows
+    }
+
+
+@yt_bp.route("/yt_offline/<int:user_id>", methods=["GET"])
+def yt_offline(user_id):
+    """오프라인 저장 영상 조회"""
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    data = _load_offline(cur, user_id)
+
     cur.close()
     conn.close()
 
-    # datetime 변환
-    for row in rows:
-        if row.get("saved_at"):
-            row["saved_at"] = row["saved_at"].strftime('%Y-%m-%d %H:%M:%S')
-        if row.get("expired_at"):
-            row["expired_at"] = row["expired_at"].strftime('%Y-%m-%d %H:%M:%S')
-
-    return jsonify({
-        "success": True,
-        "count": len(rows),
-        "offline_videos": rows
-    })
+    return jsonify({"success": True, **data})
 
 
 # ============================================================
 # 6) Movie Purchases (영화 구매/대여 내역)
 #    GET /yt_movies/<user_id>
 # ============================================================
-@yt_bp.route("/yt_movies/<int:user_id>", methods=["GET"])
-def yt_movies(user_id):
-    """영화 구매/대여 내역 조회"""
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("""
+def _load_movies(cur, user_id, limit=None):
+    sql = """
         SELECT 
             mp.purchase_id,
             mp.movie_id,
@@ -366,39 +497,40 @@ def yt_movies(user_id):
         JOIN Movies m ON mp.movie_id = m.movie_id
         WHERE mp.user_id = %s
         ORDER BY mp.created_at DESC
-    """, (user_id,))
+    """
+    params = [user_id]
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
 
+    cur.execute(sql, tuple(params))
     rows = cur.fetchall()
 
+    return {
+        "count": len(rows),
+        "purchases": rows
+    }
+
+
+@yt_bp.route("/yt_movies/<int:user_id>", methods=["GET"])
+def yt_movies(user_id):
+    """영화 구매/대여 내역 조회"""
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    data = _load_movies(cur, user_id)
+
     cur.close()
     conn.close()
 
-    # datetime 및 decimal 변환
-    for row in rows:
-        if row.get("created_at"):
-            row["created_at"] = row["created_at"].strftime('%Y-%m-%d %H:%M:%S')
-        if row.get("expired_at"):
-            row["expired_at"] = row["expired_at"].strftime('%Y-%m-%d %H:%M:%S')
-        if row.get("price_paid"):
-            row["price_paid"] = float(row["price_paid"])
-
-    return jsonify({
-        "success": True,
-        "count": len(rows),
-        "purchases": rows
-    })
+    return jsonify({"success": True, **data})
 
 
 # ============================================================
 # 7) Premium Info (프리미엄 정보)
 #    GET /yt_premium/<user_id>
 # ============================================================
-@yt_bp.route("/yt_premium/<int:user_id>", methods=["GET"])
-def yt_premium(user_id):
-    """프리미엄 멤버십 정보 조회"""
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
+def _load_premium(cur, user_id):
     cur.execute("""
         SELECT 
             user_id,
@@ -411,44 +543,40 @@ def yt_premium(user_id):
 
     row = cur.fetchone()
 
+    if not row:
+        return None
+
+    # 재생 판단과 같은 기준 (entitlements 캐시, 만료 시각에 정확히 꺼짐)
+    row["is_active"] = entitlements.premium_active(user_id, cur)
+
+    return {"premium": row}
+
+
+@yt_bp.route("/yt_premium/<int:user_id>", methods=["GET"])
+def yt_premium(user_id):
+    """프리미엄 멤버십 정보 조회"""
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    data = _load_premium(cur, user_id)
+
     cur.close()
     conn.close()
 
-    if not row:
+    if not data:
         return jsonify({
             "success": False,
             "message": "No premium subscription found"
         })
 
-    # is_active를 Python에서 계산 (end_date > 현재 시간)
-    if row.get("end_date"):
-        is_active = row["end_date"] > datetime.now()
-        row["is_active"] = is_active
-    else:
-        row["is_active"] = False
-
-    # datetime 변환
-    if row.get("start_date"):
-        row["start_date"] = row["start_date"].strftime('%Y-%m-%d %H:%M:%S')
-    if row.get("end_date"):
-        row["end_date"] = row["end_date"].strftime('%Y-%m-%d %H:%M:%S')
-
-    return jsonify({
-        "success": True,
-        "premium": row
-    })
+    return jsonify({"success": True, **data})
 
 
 # ============================================================
 # 8) Watch Time Statistics (시청 시간 통계)
 #    GET /yt_watchtime/<user_id>
 # ============================================================
-@yt_bp.route("/yt_watchtime/<int:user_id>", methods=["GET"])
-def yt_watchtime(user_id):
-    """시청 시간 통계 조회"""
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
+def _load_watchtime(cur, user_id):
     cur.execute("""
         SELECT 
             watchtime_id,
@@ -463,36 +591,38 @@ def yt_watchtime(user_id):
 
     row = cur.fetchone()
 
+    if not row:
+        return None
+
+    return {"watchtime": row}
+
+
+@yt_bp.route("/yt_watchtime/<int:user_id>", methods=["GET"])
+def yt_watchtime(user_id):
+    """시청 시간 통계 조회"""
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    data = _load_watchtime(cur, user_id)
+
     cur.close()
     conn.close()
 
-    if not row:
+    if not data:
         return jsonify({
             "success": False,
             "message": "No watch time statistics found"
         })
 
-    # datetime 변환
-    if row.get("updated_at"):
-        row["updated_at"] = row["updated_at"].strftime('%Y-%m-%d %H:%M:%S')
-
-    return jsonify({
-        "success": True,
-        "watchtime": row
-    })
+    return jsonify({"success": True, **data})
 
 
 # ============================================================
 # 9) Support Tickets (고객센터 문의 내역)
-#    GET /yt_support/<user_id>
+#    GET /yt_support/<user_id>?limit=20&offset=0  (limit 생략 시 전체)
 # ============================================================
-@yt_bp.route("/yt_support/<int:user_id>", methods=["GET"])
-def yt_support(user_id):
-    """고객센터 문의 내역 조회"""
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("""
+def _load_support(cur, user_id, limit=None, offset=0):
+    sql = """
         SELECT 
             ticket_id,
             user_id,
@@ -503,21 +633,139 @@ def yt_support(user_id):
             created_at
         FROM SupportTickets
         WHERE user_id = %s
-        ORDER BY created_at DESC
-    """, (user_id,))
+        ORDER BY created_at DESC, ticket_id DESC
+    """
+    params = [user_id]
+    if limit:
+        sql += " LIMIT %s OFFSET %s"
+        params += [limit, offset]
 
+    cur.execute(sql, tuple(params))
     rows = cur.fetchall()
 
+    return {
+        "count": len(rows),
+        "tickets": rows
+    }
+
+
+@yt_bp.route("/yt_support/<int:user_id>", methods=["GET"])
+def yt_support(user_id):
+    """고객센터 문의 내역 조회"""
+    try:
+        limit = int(request.args["limit"]) if "limit" in request.args else None
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"success": False, "error": "limit and offset must be integers"}), 400
+    if limit is not None:
+        limit = min(max(limit, 1), 100)
+    offset = max(offset, 0)
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    data = _load_support(cur, user_id, limit=limit, offset=offset)
+
     cur.close()
     conn.close()
 
-    # datetime 변환
-    for row in rows:
-        if row.get("created_at"):
-            row["created_at"] = row["created_at"].strftime('%Y-%m-%d %H:%M:%S')
+    return jsonify({"success": True, **data})
 
-    return jsonify({
+
+# ============================================================
+# 10) Dashboard (마이페이지 전체 — 섹션 병렬 조회)
+#     GET /yt_dashboard/<user_id>?sections=profile,history&history_limit=10
+# ============================================================
+# section name -> (loader, takes a limit)
+DASHBOARD_SECTIONS = {
+    "profile": (_load_profile, False),
+    "history": (_load_history, True),
+    "playlists": (_load_playlists, True),
+    "myvideos": (_load_myvideos, True),
+    "offline": (_load_offline, True),
+    "movies": (_load_movies, True),
+    "premium": (_load_premium, False),
+    "watchtime": (_load_watchtime, False),
+    "support": (_load_support, True),
+}
+
+DASHBOARD_DEFAULT_LIMIT = 20
+DASHBOARD_MAX_LIMIT = 100
+
+# 섹션별로 풀에서 커넥션을 하나씩 사용 — 동시 실행 수 = 최대 커넥션 점유 수
+_dashboard_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("DASHBOARD_WORKERS", "8")),
+    thread_name_prefix="dashboard",
+)
+
+
+def _run_section(name, user_id, limit):
+    loader, takes_limit = DASHBOARD_SECTIONS[name]
+    started = time.perf_counter()
+    with profiler.thread_scope():
+        conn = get_db()
+        cur = conn.cursor(dictionary=True)
+        try:
+            if takes_limit:
+                data = loader(cur, user_id, limit=limit)
+            else:
+                data = loader(cur, user_id)
+        finally:
+            cur.close()
+            conn.close()
+    return data, (time.perf_counter() - started) * 1000
+
+
+@yt_bp.route("/yt_dashboard/<int:user_id>", methods=["GET"])
+def yt_dashboard(user_id):
+    """마이페이지 섹션을 한 번에 조회 (섹션별 병렬 실행 + 소요 시간)"""
+    started = time.perf_counter()
+
+    requested = request.args.get("sections")
+    if requested:
+        names = [n.strip() for n in requested.split(",") if n.strip()]
+        unknown = [n for n in names if n not in DASHBOARD_SECTIONS]
+        if unknown:
+            return jsonify({
+                "success": False,
+                "error": f"unknown sections: {', '.join(unknown)}"
+            }), 400
+    else:
+        names = list(DASHBOARD_SECTIONS)
+
+    limits = {}
+    for name in names:
+        try:
+            limit = int(request.args.get(f"{name}_limit", DASHBOARD_DEFAULT_LIMIT))
+        except ValueError:
+            return jsonify({"success": False, "error": f"{name}_limit must be an integer"}), 400
+        limits[name] = min(max(limit, 1), DASHBOARD_MAX_LIMIT)
+
+    # copy_context: 섹션 스레드의 쿼리도 이 요청의 DB 통계(Server-Timing)에 집계
+    futures = {
+        name: _dashboard_executor.submit(
+            contextvars.copy_context().run, _run_section, name, user_id, limits[name]
+        )
+        for name in names
+    }
+
+    sections, timings, errors = {}, {}, {}
+    for name, future in futures.items():
+        try:
+            sections[name], timings[name] = future.result()
+            timings[name] = round(timings[name], 2)
+        except Exception as e:
+            # 한 섹션 실패가 전체 응답을 막지 않도록
+            sections[name] = None
+            errors[name] = str(e)
+
+    result = {
         "success": True,
-        "count": len(rows),
-        "tickets": rows
-    })
+        "user_id": user_id,
+        "sections": sections,
+        "timings_ms": timings,
+        "total_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+    if errors:
+        result["errors"] = errors
+    return jsonify(result)
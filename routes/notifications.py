@@ -0,0 +1,103 @@
+from flask import Blueprint, request, jsonify
+from db import get_db
+import hydration
+
+notifications_bp = Blueprint("notifications", __name__)
+
+MAX_LIMIT = 50
+
+
+# ----------------------------
+# 1) 알림함 (GET)
+#    GET /notifications/<user_id>?limit=20&before=12345
+#    최신순, before(마지막으로 받은 notification_id) 기준 키셋 페이지
+# ----------------------------
+@notifications_bp.route("/notifications/<int:user_id>", methods=["GET"])
+def list_notifications(user_id):
+    limit = min(request.args.get("limit", default=20, type=int), MAX_LIMIT)
+    before = request.args.get("before", type=int)
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("SELECT unread FROM NotificationCounters WHERE user_id = %s;", (user_id,))
+        counter = cur.fetchone()
+        cur.execute("""
+            SELECT notification_id, video_id, is_read, created_at
+            FROM Notifications
+            WHERE user_id = %s AND (%s IS NULL OR notification_id < %s)
+            ORDER BY notification_id DESC
+            LIMIT %s;
+        """, (user_id, before, before, limit))
+        items = cur.fetchall()
+        cards = {v["video_id"]: v for v in hydration.videos_with_channels([n["video_id"] for n in items], cur)}
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    rows = []
+    for n in items:
+        v = cards.get(n["video_id"])
+        # 알림 이후 삭제/비공개 전환된 영상은 보여주지 않는다
+        if v is None or v["visibility"] == "private":
+            continue
+        rows.append({
+            "notification_id": n["notification_id"],
+            "is_read": n["is_read"],
+            "created_at": n["created_at"],
+            "video_id": v["video_id"],
+            "title": v["title"],
+            "thumbnail_url": v["thumbnail_url"],
+            "duration": v["duration"],
+            "channel_id": v["user_id"],
+            "channel_name": v["channel"]["username"],
+            "channel_profile": v["channel"]["profile_img"],
+        })
+    return jsonify({
+        "unread": counter["unread"] if counter else 0,
+        "items": rows,
+        "next_before": items[-1]["notification_id"] if len(items) == limit else None,
+    })
+
+
+# ----------------------------
+# 2) 알림 읽음 처리 (POST)
+#    POST /notifications/<user_id>/read  body: { "notification_ids": [1, 2] }
+#    notification_ids 생략 시 전체 읽음
+# ----------------------------
+@notifications_bp.route("/notifications/<int:user_id>/read", methods=["POST"])
+def mark_read(user_id):
+    body = request.get_json(silent=True) or {}
+    ids = body.get("notification_ids")
+    if ids is not None and (not isinstance(ids, list) or not ids):
+        return jsonify({"error": "notification_ids must be a non-empty list"}), 400
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    try:
+        if ids is None:
+            cur.execute("UPDATE Notifications SET is_read = 1 WHERE user_id = %s AND is_read = 0;", (user_id,))
+            cur.execute("UPDATE NotificationCounters SET unread = 0 WHERE user_id = %s;", (user_id,))
+        else:
+            placeholders = ", ".join(["%s"] * len(ids))
+            cur.execute(f"""
+                UPDATE Notifications SET is_read = 1
+                WHERE user_id = %s AND is_read = 0 AND notification_id IN ({placeholders});
+            """, (user_id, *ids))
+            # 실제로 바뀐 행 수만큼만 — 이미 읽은 알림을 다시 보내도 카운터는 그대로
+            if cur.rowcount:
+                cur.execute("""
+                    UPDATE NotificationCounters SET unread = GREATEST(CAST(unread AS SIGNED) - %s, 0)
+                    WHERE user_id = %s;
+                """, (cur.rowcount, user_id))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    return jsonify({"message": "OK"})
@@ -0,0 +1,44 @@
+from flask import Blueprint, request, jsonify
+from db import get_db
+import moderation
+
+reports_bp = Blueprint("reports", __name__)
+
+
+# ----------------------------
+# 1) 신고 접수 (POST)
+#    POST /reports  body: { "reporter_id": 3, "target_type": "video", "target_id": 10,
+#                           "reason": "spam", "description": "..." }
+#    같은 사용자의 같은 대상 재신고는 200 으로 무시 (moderation.py)
+# ----------------------------
+@reports_bp.route("/reports", methods=["POST"])
+def submit_report():
+    body = request.get_json(silent=True) or {}
+    reporter_id = body.get("reporter_id")
+    target_type = body.get("target_type")
+    target_id = body.get("target_id")
+    reason = body.get("reason", "other")
+
+    if None in (reporter_id, target_type, target_id):
+        return jsonify({"error": "reporter_id, target_type and target_id required"}), 400
+    if target_type not in moderation.TARGET_TYPES:
+        return jsonify({"error": "target_type must be video, comment or user"}), 400
+    if reason not in moderation.REASONS:
+        return jsonify({"error": f"reason must be one of {', '.join(moderation.REASONS)}"}), 400
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    try:
+        created = moderation.submit(cur, reporter_id, target_type, target_id, reason, body.get("description"))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    if not created:
+        return jsonify({"message": "Already reported"})
+    moderation.count(target_type, target_id)
+    return jsonify({"message": "Reported"}), 201
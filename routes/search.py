@@ -0,0 +1,56 @@
+from flask import Blueprint, request, jsonify
+import hydration
+from search import search_index
+
+search_bp = Blueprint("search", __name__)
+
+MAX_LIMIT = 50
+
+
+# ----------------------------
+# 1) 영상 검색 (GET)
+#    GET /search?q=먹방 브이로그&limit=20&offset=0
+#    텍스트 관련도 + 조회수 순 (search.py)
+# ----------------------------
+@search_bp.route("/search", methods=["GET"])
+def search_videos():
+    q = request.args.get("q", "").strip()
+    limit = min(max(request.args.get("limit", default=20, type=int), 1), MAX_LIMIT)
+    offset = max(request.args.get("offset", default=0, type=int), 0)
+    if not q:
+        return jsonify({"error": "q required"}), 400
+
+    total, hits = search_index.search(q, limit=limit, offset=offset)
+    # 인덱스 이후 비공개/삭제된 영상은 카드에서 걸러진다 (카드는 캐시, 미스만 DB)
+    cards = {v["video_id"]: v for v in hydration.videos_with_channels([vid for vid, _ in hits])}
+
+    rows = []
+    for vid, score in hits:
+        v = cards.get(vid)
+        if v is None or v["visibility"] != "public":
+            continue
+        rows.append({
+            "video_id": v["video_id"],
+            "title": v["title"],
+            "thumbnail_url": v["thumbnail_url"],
+            "duration": v["duration"],
+            "type_name": v["type_name"],
+            "view_count": v["view_count"],
+            "upload_date": v["upload_date"],
+            "channel_id": v["user_id"],
+            "channel_name": v["channel"]["username"],
+            "channel_profile": v["channel"]["profile_img"],
+            "score": round(score, 4),
+        })
+    return jsonify({"total": total, "results": rows})
+
+
+# ----------------------------
+# 2) 검색어 자동완성 (GET)
+#    GET /search/autocomplete?q=먹방 브&limit=10
+# ----------------------------
+@search_bp.route("/search/autocomplete", methods=["GET"])
+def search_autocomplete():
+    q = request.args.get("q", "")
+    limit = min(max(request.args.get("limit", default=10, type=int), 1), MAX_LIMIT)
+    return jsonify(search_index.autocomplete(q, limit=limit))
@@ -1,52 +1,123 @@
 from flask import Blueprint, request, jsonify
-from db import get_db
+from db import get_db, fetch_compact
+import cache
+import hydration
+import jobs
+import moderation
+import recommend
+import singleflight
+import trending
 
 shorts_bp = Blueprint("shorts", __name__)
 
 
+# ----------------------------
+# 0) 쓰기 뒤의 파생 작업 (jobs.py)
+#    요청은 자기 변경만 커밋하고 반환, Videos 의 반정규화 카운트 재계산과
+#    그 카운트를 담은 카드 무효화는 백그라운드에서 (같은 영상의 연속 요청은 한 번으로 합쳐진다)
+# ----------------------------
+def _recount(sql, video_id):
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, (video_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    cache.invalidate(f"video:{video_id}")
+
+
+@jobs.handler("recount_likes")
+def recount_likes(video_id):
+    _recount("""
+        UPDATE Videos v
+        SET v.like_count = (
+            SELECT COUNT(*) FROM VideoLikes vl WHERE vl.video_id = v.video_id AND vl.is_dislike = 0
+        )
+        WHERE v.video_id = %s;
+    """, video_id)
+
+
+@jobs.handler("recount_comments")
+def recount_comments(video_id):
+    _recount("""
+        UPDATE Videos v
+        SET v.comment_count = (
+            SELECT COUNT(*) FROM Comments c WHERE c.video_id = v.video_id
+        )
+        WHERE v.video_id = %s;
+    """, video_id)
+
+
+def _defer_recount(kind, video_id):
+    jobs.enqueue(kind, {"video_id": int(video_id)}, key=f"{kind}:{video_id}")
+
+
 # ----------------------------
 # 1) Shorts 리스트 (GET)
-#    GET /shorts/list?user_id=3&offset=0&limit=20
+#    GET /shorts/list?user_id=3&offset=0&limit=20&order=trending
+#    order: popular (누적 조회수, 기본) | trending (trending.py 감쇠 점수)
 # ----------------------------
+LIST_ORDERS = {
+    "popular": "v.view_count DESC, v.upload_date DESC",
+    "trending": "v.trend_score DESC",
+}
+
+
 @shorts_bp.route("/shorts/list", methods=["GET"])
 def shorts_list():
     try:
         user_id = request.args.get("user_id", type=int)  # optional but recommended
         offset = request.args.get("offset", default=0, type=int)
         limit = request.args.get("limit", default=20, type=int)
+        order = request.args.get("order", "popular")
+        if order not in LIST_ORDERS:
+            return jsonify({"error": "order must be popular or trending"}), 400
 
         conn = get_db()
         cur = conn.cursor(dictionary=True)
 
-        sql = """
-        SELECT 
-            v.video_id AS shorts_id,
-            v.user_id AS channel_id,
-            u.username AS channel_name,
-            v.title,
-            v.video_url,
-            v.thumbnail_url,
-            v.duration,
-            v.view_count,
-            v.like_count,
-            v.comment_count,
-            v.upload_date
+        sql = f"""
+        SELECT v.video_id, v.view_count
         FROM Videos v
-        JOIN Users u ON v.user_id = u.user_id
         WHERE v.type_id = 2
           AND (%s IS NULL OR v.user_id NOT IN (
                 SELECT blocked_user_id FROM BlockList WHERE user_id = %s
           ))
-        ORDER BY v.view_count DESC, v.upload_date DESC
+        ORDER BY {LIST_ORDERS[order]}
         LIMIT %s OFFSET %s;
         """
         # pass user_id twice for the subquery; if user_id is None, the WHERE clause becomes true due to (%s IS NULL OR ...)
         cur.execute(sql, (user_id, user_id, limit, offset))
-        rows = cur.fetchall()
+        ranked = cur.fetchall()
+        cards = {v["video_id"]: v for v in hydration.videos_with_channels([r["video_id"] for r in ranked], cur)}
         cur.close()
         conn.close()
 
-        return jsonify(rows)
+        rows = []
+        for r in ranked:
+            v = cards.get(r["video_id"])
+            if v is None:
+                continue
+            rows.append({
+                "shorts_id": v["video_id"],
+                "channel_id": v["user_id"],
+                "channel_name": v["channel"]["username"],
+                "title": v["title"],
+                "video_url": v["video_url"],
+                "thumbnail_url": v["thumbnail_url"],
+                "duration": v["duration"],
+                "view_count": r["view_count"],
+                "like_count": v["like_count"],
+                "comment_count": v["comment_count"],
+                "upload_date": v["upload_date"],
+            })
+
+        return jsonify(moderation.visible(rows, video_key="shorts_id", user_key="channel_id"))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -61,12 +132,12 @@ def shorts_detail(shorts_id):
     conn = get_db()
     cur = conn.cursor(dictionary=True)
 
+    # 영상 정보는 사용자와 무관 — 인기 shorts의 동시 요청은 실행 하나를 공유
     sql = """
     SELECT
         v.*,
         u.username AS channel_name,
-        IFNULL(l.like_count, 0) AS like_count,
-        IF(vl.user_id IS NULL, 0, 1) AS is_liked
+        IFNULL(l.like_count, 0) AS like_count
     FROM Videos v
     JOIN Users u ON u.user_id = v.user_id
     LEFT JOIN (
@@ -75,13 +146,16 @@ def shorts_detail(shorts_id):
         WHERE is_dislike = 0
         GROUP BY video_id
     ) l ON l.video_id = v.video_id
-    LEFT JOIN VideoLikes vl ON vl.video_id = v.video_id AND vl.user_id = %s
     WHERE v.video_id = %s AND v.type_id = 2
     LIMIT 1;
     """
     try:
-        cur.execute(sql, (user_id, shorts_id))
-        row = cur.fetchone()
+        row = singleflight.query(cur, sql, (shorts_id,), one=True)
+        if row:
+            row["is_liked"] = 0
+            if user_id is not None:
+                cur.execute("SELECT 1 AS x FROM VideoLikes WHERE video_id = %s AND user_id = %s;", (shorts_id, user_id))
+                row["is_liked"] = 1 if cur.fetchone() else 0
         cur.close()
         conn.close()
 
@@ -97,7 +171,11 @@ def shorts_detail(shorts_id):
 # ----------------------------
 # 3) Shorts Mix 추천 (GET)
 #    GET /shorts/mix?shorts_id=1&user_id=3
+#    함께 시청된 shorts (recommend.py 인덱스) → 부족하면 랜덤으로 채움
 # ----------------------------
+MIX_SIZE = 20
+
+
 @shorts_bp.route("/shorts/mix", methods=["GET"])
 def shorts_mix():
     shorts_id = request.args.get("shorts_id", type=int)
@@ -107,30 +185,46 @@ def shorts_mix():
 
     conn = get_db()
     cur = conn.cursor(dictionary=True)
-
-    sql = """
-    SELECT
-        v.video_id AS shorts_id,
-        v.user_id AS channel_id,
-        u.username AS channel_name,
-        v.title,
-        v.video_url,
-        v.thumbnail_url,
-        v.duration,
-        v.view_count
-    FROM Videos v
-    JOIN Users u ON u.user_id = v.user_id
-    WHERE v.type_id = 2
-      AND v.video_id != %s
-      AND (%s IS NULL OR v.user_id NOT IN (SELECT blocked_user_id FROM BlockList WHERE user_id = %s))
-    ORDER BY RAND()
-    LIMIT 20;
-    """
     try:
-        cur.execute(sql, (shorts_id, user_id, user_id))
-        rows = cur.fetchall()
+        blocked = set()
+        if user_id is not None:
+            cur.execute("SELECT blocked_user_id FROM BlockList WHERE user_id = %s;", (user_id,))
+            blocked = {r["blocked_user_id"] for r in cur.fetchall()}
+
+        # 인덱스에는 K개까지 있어 차단/삭제로 빠지는 몫을 감당한다
+        similar = [vid for vid, _ in recommend.shorts_index.neighbors(shorts_id)]
+        picked = [
+            v for v in moderation.visible(hydration.videos_with_channels(similar, cur))
+            if v["user_id"] not in blocked and v["type_id"] == recommend.SHORTS_TYPE_ID
+        ][:MIX_SIZE]
+
+        # 인덱스에 없는 (새) shorts 이거나 이웃이 모자라면 예전처럼 랜덤
+        if len(picked) < MIX_SIZE:
+            seen = [shorts_id] + [v["video_id"] for v in picked]
+            placeholders = ", ".join(["%s"] * len(seen))
+            cur.execute(f"""
+            SELECT v.video_id
+            FROM Videos v
+            WHERE v.type_id = 2
+              AND v.video_id NOT IN ({placeholders})
+              AND (%s IS NULL OR v.user_id NOT IN (SELECT blocked_user_id FROM BlockList WHERE user_id = %s))
+            ORDER BY RAND()
+            LIMIT %s;
+            """, (*seen, user_id, user_id, MIX_SIZE - len(picked)))
+            picked += moderation.visible(hydration.videos_with_channels([r["video_id"] for r in cur.fetchall()], cur))
         cur.close()
         conn.close()
+
+        rows = [{
+            "shorts_id": v["video_id"],
+            "channel_id": v["user_id"],
+            "channel_name": v["channel"]["username"],
+            "title": v["title"],
+            "video_url": v["video_url"],
+            "thumbnail_url": v["thumbnail_url"],
+            "duration": v["duration"],
+            "view_count": v["view_count"],
+        } for v in picked]
         return jsonify(rows)
     except Exception as e:
         cur.close()
@@ -140,12 +234,17 @@ def shorts_mix():
 
 # ----------------------------
 # 4) 댓글 리스트 조회 (GET)
-#    GET /shorts/comments/<shorts_id>
+#    GET /shorts/comments/<shorts_id>?format=columnar
+#    format=columnar: {"columns": [...], "rows": [[...], ...]}
 # ----------------------------
+COMMENTS_CACHE = cache.Cache("shorts_comments", ttl=300)
+
+
 @shorts_bp.route("/shorts/comments/<int:shorts_id>", methods=["GET"])
 def get_comments(shorts_id):
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
+    fmt = request.args.get("format", "rows")
+    if fmt not in ("rows", "columnar"):
+        return jsonify({"error": "format must be rows or columnar"}), 400
 
     sql = """
     SELECT
@@ -160,15 +259,33 @@ def get_comments(shorts_id):
     WHERE c.video_id = %s
     ORDER BY c.created_at ASC;
     """
+
+    def load():
+        conn = get_db()
+        cur = conn.cursor(compact=True) if fmt == "columnar" else conn.cursor(dictionary=True)
+        try:
+            cur.execute(sql, (shorts_id,))
+            if fmt == "columnar":
+                columns, rows = fetch_compact(cur)
+                return {"columns": columns, "rows": rows}
+            return cur.fetchall()
+        finally:
+            cur.close()
+            conn.close()
+
     try:
-        cur.execute(sql, (shorts_id,))
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return jsonify(rows)
+        data = COMMENTS_CACHE.get_or_load((shorts_id, fmt), load, tags=(f"video:{shorts_id}:comments",))
+        # 신고로 숨겨진 댓글/작성자는 캐시에서 꺼낸 뒤 뺀다 (moderation.py)
+        if fmt == "columnar":
+            i, j = data["columns"].index("comment_id"), data["columns"].index("user_id")
+            data["rows"] = [
+                r for r in data["rows"]
+                if not moderation.is_hidden("comment", r[i]) and not moderation.is_hidden("user", r[j])
+            ]
+        else:
+            data = moderation.visible(data, video_key=None, comment_key="comment_id")
+        return jsonify(data)
     except Exception as e:
-        cur.close()
-        conn.close()
         return jsonify({"error": str(e)}), 500
 
 
@@ -205,16 +322,6 @@ def comment_write():
             cur.execute(sql, (shorts_id, user_id, content))
         conn.commit()
 
-        # Recalculate and update Videos.comment_count (cache consistency)
-        cur.execute("""
-            UPDATE Videos v
-            SET v.comment_count = (
-                SELECT COUNT(*) FROM Comments c WHERE c.video_id = v.video_id
-            )
-            WHERE v.video_id = %s;
-        """, (shorts_id,))
-        conn.commit()
-
     except Exception as e:
         conn.rollback()
         cur.close()
@@ -223,6 +330,8 @@ def comment_write():
 
     cur.close()
     conn.close()
+    cache.invalidate(f"video:{shorts_id}:comments")
+    _defer_recount("recount_comments", shorts_id)
     return jsonify({"message": "Comment Added"}), 201
 
 
@@ -259,18 +368,10 @@ def comment_delete(comment_id):
         cur.execute("DELETE FROM Comments WHERE comment_id = %s;", (comment_id,))
         conn.commit()
 
-        # 갱신: 댓글 카운트
-        cur.execute("""
-            UPDATE Videos v
-            SET v.comment_count = (
-                SELECT COUNT(*) FROM Comments c WHERE c.video_id = v.video_id
-            )
-            WHERE v.video_id = %s;
-        """, (video_id,))
-        conn.commit()
-
         cur.close()
         conn.close()
+        cache.invalidate(f"video:{video_id}:comments")
+        _defer_recount("recount_comments", video_id)
         return jsonify({"message": "Deleted"})
     except Exception as e:
         conn.rollback()
@@ -290,14 +391,16 @@ def likes_info(shorts_id):
     cur = conn.cursor(dictionary=True)
 
     try:
-        # like_count (is_dislike = 0)
-        cur.execute("SELECT COUNT(*) AS like_count FROM VideoLikes WHERE video_id = %s AND is_dislike = 0;", (shorts_id,))
-        like_row = cur.fetchone()
+        # like_count (is_dislike = 0) — 카운트는 동시 요청끼리 공유
+        like_row = singleflight.query(
+            cur, "SELECT COUNT(*) AS like_count FROM VideoLikes WHERE video_id = %s AND is_dislike = 0;", (shorts_id,), one=True
+        )
         like_count = like_row["like_count"] if like_row else 0
 
         # dislike_count (optional)
-        cur.execute("SELECT COUNT(*) AS dislike_count FROM VideoLikes WHERE video_id = %s AND is_dislike = 1;", (shorts_id,))
-        dis_row = cur.fetchone()
+        dis_row = singleflight.query(
+            cur, "SELECT COUNT(*) AS dislike_count FROM VideoLikes WHERE video_id = %s AND is_dislike = 1;", (shorts_id,), one=True
+        )
         dislike_count = dis_row["dislike_count"] if dis_row else 0
 
         is_liked = 0
@@ -351,16 +454,8 @@ def like_action(shorts_id):
         ON DUPLICATE KEY UPDATE is_dislike = VALUES(is_dislike), created_at = NOW();
         """
         cur.execute(sql, (shorts_id, user_id, is_dislike))
-        conn.commit()
-
-        # Recalculate and update Videos.like_count (only non-dislike)
-        cur.execute("""
-            UPDATE Videos v
-            SET v.like_count = (
-                SELECT COUNT(*) FROM VideoLikes vl WHERE vl.video_id = v.video_id AND vl.is_dislike = 0
-            )
-            WHERE v.video_id = %s;
-        """, (shorts_id,))
+        # 새 좋아요(rowcount 1 = INSERT)만 트렌딩에 반영 — 같은 좋아요를 다시 눌러도 점수는 그대로
+        new_like = cur.rowcount == 1 and not is_dislike
         conn.commit()
 
     except Exception as e:
@@ -371,6 +466,9 @@ def like_action(shorts_id):
 
     cur.close()
     conn.close()
+    if new_like:
+        trending.record_like(shorts_id)
+    _defer_recount("recount_likes", shorts_id)
     return jsonify({"message": "OK"})
 
 
@@ -391,16 +489,6 @@ def unlike_action(shorts_id):
         cur.execute("DELETE FROM VideoLikes WHERE video_id = %s AND user_id = %s;", (shorts_id, user_id))
         conn.commit()
 
-        # Recalculate and update Videos.like_count
-        cur.execute("""
-            UPDATE Videos v
-            SET v.like_count = (
-                SELECT COUNT(*) FROM VideoLikes vl WHERE vl.video_id = v.video_id AND vl.is_dislike = 0
-            )
-            WHERE v.video_id = %s;
-        """, (shorts_id,))
-        conn.commit()
-
     except Exception as e:
         conn.rollback()
         cur.close()
@@ -409,4 +497,5 @@ def unlike_action(shorts_id):
 
     cur.close()
     conn.close()
+    _defer_recount("recount_likes", shorts_id)
     return jsonify({"message": "Deleted"})
@@ -1,9 +1,54 @@
+from datetime import datetime
+
 from flask import Blueprint, request, jsonify
 from db import get_db
-import datetime
+import cache
+import hydration
+import jobs
+import lookups
 
 bp = Blueprint("subscriptions", __name__)
 
+
+# 구독/취소 뒤 Users.subscriber_count 재계산은 백그라운드로 (jobs.py) — 채널별로 합쳐진다
+@jobs.handler("recount_subscribers")
+def recount_subscribers(channel_id):
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE Users u
+            SET u.subscriber_count = (
+                SELECT COUNT(*) FROM Subscriptions s WHERE s.channel_id = u.user_id
+            )
+            WHERE u.user_id = %s
+        """, (channel_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _defer_recount(channel_id):
+    jobs.enqueue("recount_subscribers", {"channel_id": channel_id}, key=f"recount_subscribers:{channel_id}")
+
+
+def _subscription_names(cur, user_id, channel_id):
+    # 이름/핸들은 채널 카드(캐시)에서 — Users 두 번 조인해 다시 읽지 않는다
+    cards = hydration.channel_cards([user_id, channel_id], cur)
+    subscriber, channel = cards.get(user_id), cards.get(channel_id)
+    if subscriber is None or channel is None:
+        return None
+    return {
+        "subscriber_name": subscriber["username"],
+        "subscriber_handle": subscriber["handle"],
+        "channel_name": channel["username"],
+        "channel_handle": channel["handle"],
+    }
+
 # --------------------------
 # 1. 상단 사용자 헤더
 # --------------------------
@@ -46,7 +91,7 @@ def get_header(user_id):
 # --------------------------
 @bp.get("/filters")
 def get_filters():
-    return jsonify({
+    resp = jsonify({
         "filters": [
             "전체",
             "오늘",
@@ -57,6 +102,9 @@ def get_filters():
             "시청하지않음"
         ]
     })
+    # 고정 목록 — 클라이언트/CDN이 하루 동안 재사용
+    resp.headers["Cache-Control"] = "public, max-age=86400"
+    return resp
 
 
 # --------------------------
@@ -71,22 +119,9 @@ def get_feed(user_id):
     cur = conn.cursor(dictionary=True)
 
     query = """
-    SELECT 
-        v.video_id,
-        v.title,
-        v.thumbnail_url,
-        v.duration,
-        v.upload_date,
-        TIMESTAMPDIFF(MINUTE, v.upload_date, NOW()) AS minutes_diff,
-                vt.type_name,
-        u.user_id AS channel_id,
-        u.username AS channel_name,
-        u.profile_img AS channel_profile,
-                COALESCE(v.view_count, 0) AS view_count
+    SELECT v.video_id, COALESCE(v.view_count, 0) AS view_count
     FROM Subscriptions s
     JOIN Videos v ON s.channel_id = v.user_id
-    JOIN Users u ON u.user_id = v.user_id
-    JOIN VideoType vt ON vt.type_id = v.type_id
     WHERE s.subscriber_id = %s
       AND v.visibility = 'public'
     """
@@ -95,8 +130,8 @@ def get_feed(user_id):
 
     # 타입 필터
     if filter_type and filter_type != "all":
-        query += " AND vt.type_name = %s "
-        params.append(filter_type)
+        query += " AND v.type_id = %s "
+        params.append(lookups.type_id(filter_type, cur))
 
     # 오늘 업로드
     if filter_opt == "today":
@@ -128,19 +163,38 @@ def get_feed(user_id):
     query += " ORDER BY v.upload_date DESC LIMIT 20;"
 
     cur.execute(query, params)
-    rows = cur.fetchall()
+    ranked = cur.fetchall()
+    cards = {v["video_id"]: v for v in hydration.videos_with_channels([r["video_id"] for r in ranked], cur)}
 
     cur.close()
     conn.close()
 
-    # minutes_diff -> time_ago
-    for row in rows:
-        minutes = row.pop("minutes_diff", None)
-        if minutes is None:
+    now = datetime.now()
+    rows = []
+    for r in ranked:
+        v = cards.get(r["video_id"])
+        if v is None:
+            continue
+        row = {
+            "video_id": v["video_id"],
+            "title": v["title"],
+            "thumbnail_url": v["thumbnail_url"],
+            "duration": v["duration"],
+            "upload_date": v["upload_date"],
+            "type_name": v["type_name"],
+            "channel_id": v["user_id"],
+            "channel_name": v["channel"]["username"],
+            "channel_profile": v["channel"]["profile_img"],
+            "view_count": r["view_count"],
+        }
+        rows.append(row)
+
+        # upload_date -> time_ago
+        if v["upload_date"] is None:
             row["time_ago"] = None
             continue
 
-        m = int(minutes)
+        m = int((now - v["upload_date"]).total_seconds() // 60)
         if m < 1:
             row["time_ago"] = "방금 전"
         elif m < 60:
@@ -156,20 +210,6 @@ def get_feed(user_id):
         else:
             row["time_ago"] = f"{m // (60 * 24 * 365)}년 전"
 
-    # Convert non-JSON-serializable types to strings (datetime, date, timedelta)
-    for row in rows:
-        for k, v in list(row.items()):
-            if isinstance(v, datetime.datetime):
-                row[k] = v.strftime("%Y-%m-%d %H:%M:%S")
-            elif isinstance(v, datetime.date):
-                row[k] = v.strftime("%Y-%m-%d")
-            elif isinstance(v, datetime.timedelta):
-                total = int(v.total_seconds())
-                hh = total // 3600
-                mm = (total % 3600) // 60
-                ss = total % 60
-                row[k] = f"{hh:02d}:{mm:02d}:{ss:02d}"
-
     return jsonify({"feed": rows})
 
 
@@ -191,26 +231,24 @@ def subscribe_channel(user_id, channel_id):
             """,
             (user_id, channel_id)
         )
+        created = cur.rowcount == 1  # 2 = 이미 구독 중 (created_at 만 갱신)
+        cur.execute(
+            "SELECT created_at FROM Subscriptions WHERE subscriber_id = %s AND channel_id = %s",
+            (user_id, channel_id)
+        )
+        row = cur.fetchone()
         conn.commit()
-        
-        # 구독 정보 조회
-        cur.execute("""
-            SELECT 
-                s.subscriber_id,
-                u1.username AS subscriber_name,
-                u1.handle AS subscriber_handle,
-                s.channel_id,
-                u2.username AS channel_name,
-                u2.handle AS channel_handle,
-                s.created_at
-            FROM Subscriptions s
-            JOIN Users u1 ON s.subscriber_id = u1.user_id
-            JOIN Users u2 ON s.channel_id = u2.user_id
-            WHERE s.subscriber_id = %s AND s.channel_id = %s
-        """, (user_id, channel_id))
-        
-        subscription = cur.fetchone()
-        
+        cache.invalidate(f"user:{user_id}:subscriptions")
+        if created:
+            _defer_recount(channel_id)
+
+        subscription = {
+            "subscriber_id": user_id,
+            "channel_id": channel_id,
+            "created_at": row["created_at"] if row else None,
+            **(_subscription_names(cur, user_id, channel_id) or {}),
+        }
+
         return jsonify({
             "success": True, 
             "action": "subscribed",
@@ -233,27 +271,17 @@ def unsubscribe_channel(user_id, channel_id):
     conn = get_db()
     cur = conn.cursor(dictionary=True)
 
-    # 삭제 전 정보 조회
-    cur.execute("""
-        SELECT 
-            u1.username AS subscriber_name,
-            u1.handle AS subscriber_handle,
-            u2.username AS channel_name,
-            u2.handle AS channel_handle
-        FROM Subscriptions s
-        JOIN Users u1 ON s.subscriber_id = u1.user_id
-        JOIN Users u2 ON s.channel_id = u2.user_id
-        WHERE s.subscriber_id = %s AND s.channel_id = %s
-    """, (user_id, channel_id))
-    
-    subscription_info = cur.fetchone()
-
     cur.execute(
         "DELETE FROM Subscriptions WHERE subscriber_id = %s AND channel_id = %s",
         (user_id, channel_id)
     )
     affected_rows = cur.rowcount
     conn.commit()
+    subscription_info = None
+    if affected_rows:
+        cache.invalidate(f"user:{user_id}:subscriptions")
+        _defer_recount(channel_id)
+        subscription_info = _subscription_names(cur, user_id, channel_id)
 
     cur.close()
     conn.close()
@@ -278,6 +306,9 @@ def unsubscribe_channel(user_id, channel_id):
 #    GET /<user_id>/subscriptions?limit=20&offset=0
 #    반환: channel_id, channel_name, channel_profile, subscribed_at
 # --------------------------
+SUBSCRIPTIONS_CACHE = cache.Cache("subscriptions", ttl=300)
+
+
 @bp.get("/<int:user_id>/subscriptions")
 def get_subscriptions(user_id):
     # pagination params
@@ -295,33 +326,38 @@ def get_subscriptions(user_id):
     if offset < 0:
         offset = 0
 
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
-    # total count
-    count_q = "SELECT COUNT(*) AS total FROM Subscriptions WHERE subscriber_id = %s"
-    cur.execute(count_q, (user_id,))
-    total_row = cur.fetchone()
-    total = total_row["total"] if total_row else 0
-
-    # list: 유튜브 앱 기준 — 사용자가 구독한 채널의 채널명과 프로필 이미지만 반환
-    query = """
-    SELECT
-        DISTINCT u.user_id AS channel_id,
-        u.username AS channel_name,
-        u.profile_img AS channel_profile
-    FROM Subscriptions s
-    JOIN Users u ON s.channel_id = u.user_id
-    WHERE s.subscriber_id = %s
-    ORDER BY u.username ASC
-    LIMIT %s OFFSET %s
-    """
+    def load():
+        conn = get_db()
+        cur = conn.cursor(dictionary=True)
+        try:
+            # total count
+            count_q = "SELECT COUNT(*) AS total FROM Subscriptions WHERE subscriber_id = %s"
+            cur.execute(count_q, (user_id,))
+            total_row = cur.fetchone()
+            total = total_row["total"] if total_row else 0
+
+            # list: 유튜브 앱 기준 — 사용자가 구독한 채널의 채널명과 프로필 이미지만 반환
+            query = """
+            SELECT
+                DISTINCT u.user_id AS channel_id,
+                u.username AS channel_name,
+                u.profile_img AS channel_profile
+            FROM Subscriptions s
+            JOIN Users u ON s.channel_id = u.user_id
+            WHERE s.subscriber_id = %s
+            ORDER BY u.username ASC
+            LIMIT %s OFFSET %s
+            """
 
-    cur.execute(query, (user_id, limit, offset))
-    rows = cur.fetchall()
+            cur.execute(query, (user_id, limit, offset))
+            return total, cur.fetchall()
+        finally:
+            cur.close()
+            conn.close()
 
-    cur.close()
-    conn.close()
+    total, rows = SUBSCRIPTIONS_CACHE.get_or_load(
+        (user_id, limit, offset), load, tags=(f"user:{user_id}:subscriptions",)
+    )
 
     return jsonify({
         "subscriptions": rows,
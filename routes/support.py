@@ -0,0 +1,172 @@
+from flask import Blueprint, request, jsonify
+from db import get_db
+from datetime import datetime
+from routes.admin import admin_only
+
+support_bp = Blueprint("support", __name__)
+
+STATUSES = ("open", "in_progress", "closed")
+TYPES = ("bug", "feature", "account", "other")
+MAX_BULK = 1000
+
+QUEUE_COLUMNS = """
+    ticket_id,
+    user_id,
+    type,
+    subject,
+    status,
+    created_at
+"""
+
+
+def _encode_cursor(row):
+    return f"{row['created_at'].strftime('%Y-%m-%d %H:%M:%S')},{row['ticket_id']}"
+
+
+def _decode_cursor(value):
+    created, ticket_id = value.rsplit(",", 1)
+    return datetime.fromisoformat(created), int(ticket_id)
+
+
+# --------------------------
+# 1. 상담원 큐 (오래된 순, keyset paging)
+#    GET /support/queue?status=open&type=bug&limit=50&cursor=<created_at,ticket_id>
+#    type 생략 시 유형별 인덱스 구간을 UNION ALL로 합쳐 정렬
+#    상담원 전용 — admin 과 같은 인증 (X-Admin-Token 또는 로컬)
+# --------------------------
+@support_bp.get("/queue")
+@admin_only
+def get_queue():
+    status = request.args.get("status", "open")
+    ticket_type = request.args.get("type")
+    cursor = request.args.get("cursor")
+
+    if status not in STATUSES:
+        return jsonify({"error": f"status must be one of {', '.join(STATUSES)}"}), 400
+    if ticket_type and ticket_type not in TYPES:
+        return jsonify({"error": f"type must be one of {', '.join(TYPES)}"}), 400
+
+    try:
+        limit = int(request.args.get("limit", 50))
+        after = _decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return jsonify({"error": "limit must be an integer and cursor must come from next_cursor"}), 400
+    limit = min(max(limit, 1), 200)
+
+    # (status, type, created_at) 인덱스를 그대로 타는 구간 조회 하나
+    part = f"""
+        SELECT {QUEUE_COLUMNS}
+        FROM SupportTickets
+        WHERE status = %s AND type = %s
+    """
+    if after:
+        part += " AND (created_at > %s OR (created_at = %s AND ticket_id > %s))"
+    part += " ORDER BY created_at ASC, ticket_id ASC LIMIT %s"
+
+    types = [ticket_type] if ticket_type else list(TYPES)
+    params = []
+    for t in types:
+        params += [status, t]
+        if after:
+            params += [after[0], after[0], after[1]]
+        params.append(limit)
+
+    if len(types) == 1:
+        query = part
+    else:
+        query = " UNION ALL ".join(f"({part})" for _ in types)
+        query = f"SELECT * FROM ({query}) q ORDER BY created_at ASC, ticket_id ASC LIMIT %s"
+        params.append(limit)
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    cur.execute(query, tuple(params))
+    rows = cur.fetchall()
+
+    cur.close()
+    conn.close()
+
+    next_cursor = _encode_cursor(rows[-1]) if len(rows) == limit else None
+
+    return jsonify({
+        "tickets": rows,
+        "limit": limit,
+        "next_cursor": next_cursor
+    })
+
+
+# --------------------------
+# 2. 상태별 티켓 수 (트리거로 유지되는 SupportTicketCounts)
+#    GET /support/counts
+# --------------------------
+@support_bp.get("/counts")
+def get_counts():
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    cur.execute("SELECT status, type, ticket_count FROM SupportTicketCounts")
+    rows = cur.fetchall()
+
+    cur.close()
+    conn.close()
+
+    counts = {s: {"total": 0, "by_type": {t: 0 for t in TYPES}} for s in STATUSES}
+    for row in rows:
+        counts[row["status"]]["by_type"][row["type"]] = row["ticket_count"]
+        counts[row["status"]]["total"] += row["ticket_count"]
+
+    return jsonify({"counts": counts})
+
+
+# --------------------------
+# 3. 일괄 상태 변경 (UPDATE 한 번)
+#    POST /support/tickets/status
+#    body: { "ticket_ids": [1, 2, 3], "status": "closed", "from_status": "in_progress" }
+#    from_status(선택): 현재 상태가 일치하는 티켓만 변경
+#    상담원 전용 — admin 과 같은 인증 (X-Admin-Token 또는 로컬)
+# --------------------------
+@support_bp.post("/tickets/status")
+@admin_only
+def bulk_update_status():
+    body = request.json or {}
+    ticket_ids = body.get("ticket_ids") or []
+    status = body.get("status")
+    from_status = body.get("from_status")
+
+    if status not in STATUSES or (from_status and from_status not in STATUSES):
+        return jsonify({"error": f"status must be one of {', '.join(STATUSES)}"}), 400
+    if not ticket_ids or len(ticket_ids) > MAX_BULK:
+        return jsonify({"error": f"ticket_ids must contain 1..{MAX_BULK} ids"}), 400
+    try:
+        ticket_ids = [int(t) for t in ticket_ids]
+    except (TypeError, ValueError):
+        return jsonify({"error": "ticket_ids must be integers"}), 400
+
+    placeholders = ", ".join(["%s"] * len(ticket_ids))
+    query = f"UPDATE SupportTickets SET status = %s WHERE ticket_id IN ({placeholders})"
+    params = [status] + ticket_ids
+    if from_status:
+        query += " AND status = %s"
+        params.append(from_status)
+
+    conn = get_db()
+    cur = conn.cursor()
+
+    try:
+        cur.execute(query, tuple(params))
+        affected_rows = cur.rowcount
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    return jsonify({
+        "success": True,
+        "status": status,
+        "updated": affected_rows,
+        "requested": len(ticket_ids)
+    })
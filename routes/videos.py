@@ -0,0 +1,63 @@
+from flask import Blueprint, request, jsonify
+from db import get_db
+import cache
+import lookups
+import notify
+from search import search_index
+
+videos_bp = Blueprint("videos", __name__)
+
+VISIBILITIES = ("public", "unlisted", "private")
+MAX_TITLE = 150
+
+
+# ----------------------------
+# 1) 영상 게시 (POST)
+#    POST /videos  body: { "user_id": 3, "title": "...", "description": "...",
+#                          "video_url": "...", "thumbnail_url": "...", "duration": 120,
+#                          "type": "video", "visibility": "public" }
+#    구독자 알림은 작업 한 행만 쌓고 notify.py 워커가 나눠서 보낸다
+# ----------------------------
+@videos_bp.route("/videos", methods=["POST"])
+def publish_video():
+    body = request.get_json(silent=True) or {}
+    user_id = body.get("user_id")
+    title = (body.get("title") or "").strip()
+    description = body.get("description")
+    video_url = body.get("video_url")
+    visibility = body.get("visibility", "public")
+
+    if None in (user_id, video_url) or not title:
+        return jsonify({"error": "user_id, title and video_url required"}), 400
+    if len(title) > MAX_TITLE:
+        return jsonify({"error": f"title must be at most {MAX_TITLE} characters"}), 400
+    if visibility not in VISIBILITIES:
+        return jsonify({"error": "visibility must be public, unlisted or private"}), 400
+    type_id = lookups.type_id(body.get("type", "video"))
+    if type_id is None:
+        return jsonify({"error": "Unknown type"}), 400
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("""
+            INSERT INTO Videos (user_id, type_id, title, description, video_url,
+                                thumbnail_url, duration, visibility)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, (user_id, type_id, title, description, video_url,
+              body.get("thumbnail_url"), body.get("duration"), visibility))
+        video_id = cur.lastrowid
+        # 영상과 알림 작업은 함께 커밋 — 게시됐는데 알림이 빠지는 일이 없다
+        if visibility == "public":
+            notify.enqueue(cur, video_id, user_id)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    cache.invalidate(f"user:{user_id}:videos")
+    search_index.upsert(video_id, title, description, 0, visibility)
+    return jsonify({"message": "Published", "video_id": video_id}), 201
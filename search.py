@@ -0,0 +1,597 @@
+# search.py
+"""In-process full-text search over public videos (``/search``).
+
+Tokens (after NFKC + lower-casing, split on ``\\w+``):
+
+* title       — character bigrams of every non-ASCII word (``"먹방브이로그"``
+  -> ``먹방, 방브, 브이, 이로, 로그``), so Korean titles match without a
+  morphological analyser; ASCII and one-letter words are kept whole
+* description — the first ``DESC_WORDS`` distinct words, whole
+  (``w:<word>``); bigrams of full descriptions would multiply the index size
+
+A document matches when it covers at least ``MIN_COVERAGE`` of the query's
+title bigrams or of its words. Relevance is ``Σ idf · tf`` (title terms
+weigh ``TITLE_WEIGHT``), normalized by the query's own maximum, plus
+``VIEWS_WEIGHT · log1p(views) / log1p(max views)`` so a popular exact match
+outranks an obscure one.
+
+Layout: an immutable main segment of NumPy arrays — postings as CSR
+(``indptr`` per term, ``docs`` int32, ``tf`` uint8) over documents sorted
+by ``video_id`` — plus a small in-memory delta segment for documents added
+since. ``upsert`` (publish / edit) marks the old version dead and appends
+the new one to the delta; once the delta holds ``DELTA_MAX`` documents both
+are merged into a new main segment (dead documents dropped). Autocomplete
+uses a sorted array of title words with a popularity score, so a prefix is
+two binary searches.
+
+Persistence: ``python search.py build`` (cron, e.g. nightly) writes an
+``.npz`` snapshot; ``init_app`` loads it at startup and each worker then
+catches up with videos whose id is above the snapshot's (every
+``REFRESH_AFTER`` seconds, and picks up a newer snapshot file). Edits made
+through another worker reach this one with the next snapshot. Numbers at
+1M videos: ``python -m tools.bench_search``.
+"""
+import argparse
+import bisect
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+
+import numpy as np
+
+from db import get_db
+
+INDEX_PATH = os.environ.get(
+    "SEARCH_INDEX",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "search_index.npz"),
+)
+
+TITLE_WEIGHT = 3
+DESC_WEIGHT = 1
+DESC_WORDS = 16
+MIN_COVERAGE = 0.5
+VIEWS_WEIGHT = 0.3
+
+DELTA_MAX = 50_000
+REFRESH_AFTER = 30.0
+FETCH_CHUNK = 10_000
+
+_WORD = re.compile(r"\w+")
+_WORD_PREFIX = "w:"
+
+
+# ------------------------------------------------------------
+# tokenization
+# ------------------------------------------------------------
+def normalize(text):
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def words(text):
+    return _WORD.findall(normalize(text))
+
+
+def grams(word):
+    # 라틴 문자 단어는 띄어쓰기로 충분히 갈린다 — 바이그램("th", "er")은 거의 모든 문서에 걸린다
+    if len(word) < 2 or word.isascii():
+        return [word]
+    return [word[i:i + 2] for i in range(len(word) - 1)]
+
+
+def doc_tokens(title, description):
+    """``{token: tf}`` of one video (tf already field-weighted, capped at 255)."""
+    tokens = {}
+    for w in words(title):
+        for g in grams(w):
+            tokens[g] = tokens.get(g, 0) + TITLE_WEIGHT
+    seen = 0
+    for w in words(description):
+        if len(w) < 2:
+            continue
+        key = _WORD_PREFIX + w
+        if key not in tokens:
+            if seen == DESC_WORDS:
+                break
+            seen += 1
+        tokens[key] = tokens.get(key, 0) + DESC_WEIGHT
+    return {t: min(tf, 255) for t, tf in tokens.items()}
+
+
+def query_tokens(q):
+    """``(title bigrams, description words)`` of a query, deduplicated."""
+    ws = words(q)
+    title = list(dict.fromkeys(g for w in ws for g in grams(w)))
+    desc = list(dict.fromkeys(_WORD_PREFIX + w for w in ws if len(w) >= 2))
+    return title, desc
+
+
+# ------------------------------------------------------------
+# segments
+# ------------------------------------------------------------
+class _Segment:
+    """Immutable postings over documents ``0 .. n-1`` sorted by ``video_id``."""
+
+    def __init__(self, terms, indptr, docs, tf, ids, views, words_, word_scores):
+        self.terms = terms                      # [str], term id -> token
+        self.term_ids = {t: i for i, t in enumerate(terms)}
+        self.indptr = indptr
+        self.docs = docs
+        self.tf = tf
+        self.ids = ids
+        self.views = views
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.words = words_                     # sorted [str]
+        self.word_scores = word_scores
+
+    @classmethod
+    def empty(cls):
+        return cls([], np.zeros(1, dtype=np.int64), np.empty(0, np.int32), np.empty(0, np.uint8),
+                   np.empty(0, np.int64), np.empty(0, np.int64), [], np.empty(0, np.float32))
+
+    def postings(self, token):
+        tid = self.term_ids.get(token)
+        if tid is None:
+            return None
+        lo, hi = self.indptr[tid], self.indptr[tid + 1]
+        return self.docs[lo:hi], self.tf[lo:hi]
+
+    def arrays(self):
+        """NumPy arrays of the segment (the two string lists packed) for ``np.savez``."""
+        terms, term_offsets = _pack_strings(self.terms)
+        words_, word_offsets = _pack_strings(self.words)
+        return {
+            "terms": terms, "term_offsets": term_offsets, "indptr": self.indptr, "docs": self.docs,
+            "tf": self.tf, "ids": self.ids, "views": self.views,
+            "words": words_, "word_offsets": word_offsets, "word_scores": self.word_scores,
+        }
+
+    @classmethod
+    def from_arrays(cls, a):
+        return cls(
+            _unpack_strings(a["terms"], a["term_offsets"]), a["indptr"], a["docs"], a["tf"],
+            a["ids"], a["views"], _unpack_strings(a["words"], a["word_offsets"]), a["word_scores"],
+        )
+
+
+def _pack_strings(strings):
+    # 고정 폭 유니코드 배열은 가장 긴 문자열 × 4바이트씩 차지 — UTF-8 바이트열 + 오프셋으로 저장
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob, offsets):
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+class _Delta:
+    """Documents added after the main segment (positions continue after it)."""
+
+    def __init__(self, base):
+        self.base = base
+        self.postings = {}                      # token -> (array('i') docs, array('B') tf)
+        self.ids = np.zeros(DELTA_MAX, dtype=np.int64)
+        self.views = np.zeros(DELTA_MAX, dtype=np.int64)
+        self.alive = np.zeros(DELTA_MAX, dtype=bool)
+        self.pos_of = {}                        # video_id -> position
+        self.n = 0
+        self.words = []                         # sorted
+        self.word_scores = {}
+
+
+class _State:
+    __slots__ = ("main", "delta")
+
+    def __init__(self, main):
+        self.main = main
+        self.delta = _Delta(len(main.ids))
+
+
+def _word_scores(ids_words, views):
+    """Title-word popularity for autocomplete: docs containing it, view-weighted."""
+    scores = {}
+    for doc_words, v in zip(ids_words, views):
+        s = 1.0 + math.log1p(v)
+        for w in doc_words:
+            scores[w] = scores.get(w, 0.0) + s
+    return scores
+
+
+def build_segment(rows):
+    """Main segment from ``(video_id, title, description, view_count)`` rows."""
+    rows = sorted(rows, key=lambda r: r[0])
+    term_ids = {}
+    term_col, doc_col, tf_col = array("i"), array("i"), array("B")
+    for pos, (_, title, description, _) in enumerate(rows):
+        for token, tf in doc_tokens(title, description).items():
+            tid = term_ids.setdefault(token, len(term_ids))
+            term_col.append(tid)
+            doc_col.append(pos)
+            tf_col.append(tf)
+
+    terms = list(term_ids)
+    term_col = np.frombuffer(term_col, dtype=np.int32)
+    # 문서 순서로 쌓였으므로 term 기준 안정 정렬이면 term 안에서 문서 순서가 유지된다
+    order = np.argsort(term_col, kind="stable")
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_col, minlength=len(terms)), out=indptr[1:])
+
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    views = np.fromiter((r[3] or 0 for r in rows), dtype=np.int64, count=len(rows))
+    scores = _word_scores((set(words(r[1])) for r in rows), views.tolist())
+    ws = sorted(scores)
+    return _Segment(
+        terms, indptr,
+        np.frombuffer(doc_col, dtype=np.int32)[order], np.frombuffer(tf_col, dtype=np.uint8)[order],
+        ids, views, ws, np.array([scores[w] for w in ws], dtype=np.float32),
+    )
+
+
+def merge(state):
+    """New main segment from ``state.main`` + ``state.delta``, dead documents dropped."""
+    main, delta = state.main, state.delta
+    n_main, n = len(main.ids), len(main.ids) + delta.n
+    ids = np.concatenate((main.ids, delta.ids[:delta.n]))
+    views = np.concatenate((main.views, delta.views[:delta.n]))
+    alive = np.concatenate((main.alive, delta.alive[:delta.n]))
+
+    keep = np.flatnonzero(alive)
+    keep = keep[np.argsort(ids[keep], kind="stable")]
+    new_pos = np.full(n, -1, dtype=np.int64)
+    new_pos[keep] = np.arange(len(keep))
+
+    # 어휘: 기존 term id 유지, 델타에만 있는 토큰은 뒤에 추가
+    terms = list(main.terms)
+    term_ids = dict(main.term_ids)
+    d_term, d_doc, d_tf = [], [], []
+    for token, (docs, tfs) in delta.postings.items():
+        tid = term_ids.setdefault(token, len(term_ids))
+        if tid == len(terms):
+            terms.append(token)
+        d_term.append(np.full(len(docs), tid, dtype=np.int64))
+        d_doc.append(np.frombuffer(docs, dtype=np.int32))
+        d_tf.append(np.frombuffer(tfs, dtype=np.uint8))
+
+    term_col = np.concatenate([np.repeat(np.arange(len(main.terms)), np.diff(main.indptr))] + d_term)
+    doc_col = new_pos[np.concatenate([main.docs] + d_doc)]
+    tf_col = np.concatenate([main.tf] + d_tf)
+    live = doc_col >= 0
+    term_col, doc_col, tf_col = term_col[live], doc_col[live], tf_col[live]
+    order = np.lexsort((doc_col, term_col))
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_col, minlength=len(terms)), out=indptr[1:])
+
+    # 자동완성 점수는 더하기만 한다 (수정 전 제목 단어는 다음 전체 빌드에서 빠진다)
+    scores = dict(zip(main.words, main.word_scores.tolist()))
+    for w, s in delta.word_scores.items():
+        scores[w] = scores.get(w, 0.0) + s
+    ws = sorted(scores)
+    return _Segment(
+        terms, indptr, doc_col[order].astype(np.int32), tf_col[order],
+        ids[keep], views[keep], ws, np.array([scores[w] for w in ws], dtype=np.float32),
+    )
+
+
+# ------------------------------------------------------------
+# index
+# ------------------------------------------------------------
+class SearchIndex:
+    def __init__(self, path=INDEX_PATH, refresh_after=REFRESH_AFTER):
+        self.path = path
+        self.refresh_after = refresh_after
+        self._state = _State(_Segment.empty())
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._mtime = None
+        # 따라잡기가 읽어 온 마지막 video_id — upsert 는 올리지 않는다
+        self._caught_up_id = 0
+        self._refreshed_at = 0.0
+
+    # ---------------- loading ----------------
+    def install(self, segment):
+        """Swap in a main segment (also used by the benchmark)."""
+        with self._lock:
+            # 상태 객체 하나를 교체 — 검색 중인 쪽은 이전 (main, delta) 쌍을 그대로 본다
+            self._state = _State(segment)
+            self._caught_up_id = int(segment.ids[-1]) if len(segment.ids) else 0
+            self._refreshed_at = time.time()
+
+    def load(self):
+        """Load the snapshot at ``path``; returns False if there is none."""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with np.load(self.path) as z:
+                segment = _Segment.from_arrays(z)
+        except OSError:
+            return False
+        self.install(segment)
+        self._mtime = mtime
+        return True
+
+    def save(self, path=None):
+        """Merge the delta and write the snapshot atomically."""
+        path = path or self.path
+        with self._lock:
+            segment = merge(self._state)
+            self._state = _State(segment)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **segment.arrays())
+        os.replace(tmp, path)
+
+    # ---------------- writes ----------------
+    def upsert(self, video_id, title, description, view_count=0, visibility="public"):
+        """Index a published / edited video (non-public ones are removed)."""
+        video_id = int(video_id)
+        with self._lock:
+            st = self._state
+            self._kill(st, video_id)
+            if visibility != "public":
+                return
+            d = st.delta
+            if d.n == DELTA_MAX:
+                st = self._state = _State(merge(st))
+                d = st.delta
+            pos = d.n
+            for token, tf in doc_tokens(title, description).items():
+                docs, tfs = d.postings.setdefault(token, (array("i"), array("B")))
+                docs.append(d.base + pos)
+                tfs.append(tf)
+            d.ids[pos] = video_id
+            d.views[pos] = view_count or 0
+            d.alive[pos] = True
+            d.pos_of[video_id] = pos
+            s = 1.0 + math.log1p(view_count or 0)
+            for w in set(words(title)):
+                if w not in d.word_scores:
+                    bisect.insort(d.words, w)
+                d.word_scores[w] = d.word_scores.get(w, 0.0) + s
+            d.n = pos + 1
+
+    def remove(self, video_id):
+        with self._lock:
+            self._kill(self._state, int(video_id))
+
+    @staticmethod
+    def _kill(st, video_id):
+        pos = st.delta.pos_of.pop(video_id, None)
+        if pos is not None:
+            st.delta.alive[pos] = False
+        i = int(np.searchsorted(st.main.ids, video_id))
+        if i < len(st.main.ids) and st.main.ids[i] == video_id:
+            st.main.alive[i] = False
+
+    # ---------------- catch-up ----------------
+    def _fetch_new(self, after_id):
+        conn = get_db()
+        cur = conn.cursor(compact=True)
+        try:
+            cur.execute("""
+                SELECT video_id, title, description, view_count
+                FROM Videos
+                WHERE video_id > %s AND visibility = 'public'
+                ORDER BY video_id
+                LIMIT %s
+            """, (after_id, FETCH_CHUNK))
+            return cur.fetchall()
+        finally:
+            cur.close()
+            conn.close()
+
+    def refresh(self):
+        """Pick up a newer snapshot file, then videos published since."""
+        try:
+            if os.path.getmtime(self.path) != self._mtime:
+                self.load()
+        except OSError:
+            pass
+        # 한 번에 DELTA_MAX 건까지 — 스냅샷 없이 시작했다면 여러 번에 나눠 채워진다.
+        # 이 워커가 직접 upsert 한 영상보다 id 가 작은, 다른 워커의 게시도 여기서 들어온다
+        for _ in range(DELTA_MAX // FETCH_CHUNK):
+            rows = self._fetch_new(self._caught_up_id)
+            for video_id, title, description, views in rows:
+                self.upsert(video_id, title, description, views)
+            if rows:
+                self._caught_up_id = int(rows[-1][0])
+            if len(rows) < FETCH_CHUNK:
+                break
+        self._refreshed_at = time.time()
+
+    def _maybe_refresh(self):
+        if time.time() - self._refreshed_at < self.refresh_after:
+            return
+        # 이미 다른 스레드가 갱신 중이면 지금 인덱스로 응답
+        if self._refresh_lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+
+    # ---------------- reads ----------------
+    @staticmethod
+    def _gather(st, pos, main_col, delta_col):
+        out = np.empty(len(pos), dtype=main_col.dtype)
+        in_main = pos < st.delta.base
+        out[in_main] = main_col[pos[in_main]]
+        out[~in_main] = delta_col[pos[~in_main] - st.delta.base]
+        return out
+
+    def _postings(self, st, token):
+        parts = []
+        p = st.main.postings(token)
+        if p is not None:
+            parts.append(p)
+        d = st.delta.postings.get(token)
+        if d is not None:
+            # 복사본으로 — 버퍼 뷰를 쥐고 있으면 upsert의 append가 BufferError
+            parts.append((np.array(d[0], dtype=np.int32), np.array(d[1], dtype=np.uint8)))
+        return parts
+
+    def search(self, q, limit=20, offset=0):
+        """``(total, [(video_id, score), ...])`` best first."""
+        self._maybe_refresh()
+        st = self._state
+        n_docs = st.delta.base + st.delta.n
+        title_q, desc_q = query_tokens(q)
+        if not n_docs or not (title_q or desc_q):
+            return 0, []
+
+        docs, contrib, is_title = [], [], []
+        max_text = 0.0
+        for tokens, title in ((title_q, True), (desc_q, False)):
+            for token in tokens:
+                parts = self._postings(st, token)
+                df = sum(len(p[0]) for p in parts)
+                idf = math.log(1.0 + n_docs / (df + 1))
+                max_text += idf * (TITLE_WEIGHT if title else DESC_WEIGHT)
+                for d, tf in parts:
+                    docs.append(d)
+                    contrib.append(tf.astype(np.float32) * idf)
+                    is_title.append(np.full(len(d), title))
+        if not docs:
+            return 0, []
+
+        docs = np.concatenate(docs)
+        contrib = np.concatenate(contrib)
+        is_title = np.concatenate(is_title)
+        if len(docs) > n_docs // 16:
+            # 흔한 단어: 정렬(np.unique) 대신 문서 수 길이의 bincount 로 누적
+            title_hits = np.bincount(docs[is_title], minlength=n_docs)
+            desc_hits = np.bincount(docs[~is_title], minlength=n_docs)
+            uniq = np.flatnonzero(title_hits + desc_hits)
+            text = np.bincount(docs, weights=contrib, minlength=n_docs)[uniq]
+            title_hits, desc_hits = title_hits[uniq], desc_hits[uniq]
+        else:
+            uniq, inv = np.unique(docs, return_inverse=True)
+            text = np.bincount(inv, weights=contrib)
+            title_hits = np.bincount(inv[is_title], minlength=len(uniq))
+            desc_hits = np.bincount(inv[~is_title], minlength=len(uniq))
+
+        alive = self._gather(st, uniq, st.main.alive, st.delta.alive)
+        covered = np.zeros(len(uniq), dtype=bool)
+        if title_q:
+            covered |= title_hits >= MIN_COVERAGE * len(title_q)
+        if desc_q:
+            covered |= desc_hits >= MIN_COVERAGE * len(desc_q)
+        sel = np.flatnonzero(alive & covered)
+        total = int(sel.size)
+        if not total:
+            return 0, []
+
+        views = self._gather(st, uniq[sel], st.main.views, st.delta.views)
+        max_views = max(int(st.main.views.max(initial=0)), int(st.delta.views[:st.delta.n].max(initial=0)))
+        score = text[sel] / max_text + VIEWS_WEIGHT * np.log1p(views) / math.log1p(max(max_views, 1))
+        end = offset + limit
+        if end < total:
+            top = np.argpartition(-score, end - 1)[:end]
+        else:
+            top = np.arange(total)
+        top = top[np.argsort(-score[top], kind="stable")][offset:end]
+        ids = self._gather(st, uniq[sel[top]], st.main.ids, st.delta.ids)
+        return total, list(zip(ids.tolist(), score[top].tolist()))
+
+    def autocomplete(self, prefix, limit=10):
+        """Title words starting with the query's last word, most popular first.
+
+        Earlier words of the query are kept, so ``"먹방 브"`` completes to
+        ``"먹방 브이로그"``.
+        """
+        self._maybe_refresh()
+        ws = words(prefix)
+        if not ws:
+            return []
+        head, last = ws[:-1], ws[-1]
+        st = self._state
+
+        cands = {}
+        lo = bisect.bisect_left(st.main.words, last)
+        hi = bisect.bisect_left(st.main.words, last + "\uffff", lo)
+        if hi > lo:
+            scores = st.main.word_scores[lo:hi]
+            top = np.argsort(-scores, kind="stable")[:limit] if hi - lo > limit else np.arange(hi - lo)
+            for i in top.tolist():
+                cands[st.main.words[lo + i]] = float(scores[i])
+        d = st.delta
+        i = bisect.bisect_left(d.words, last)
+        while i < len(d.words) and d.words[i].startswith(last):
+            w = d.words[i]
+            cands[w] = cands.get(w, 0.0) + d.word_scores[w]
+            i += 1
+
+        best = sorted(cands.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+        return [" ".join(head + [w]) for w, _ in best]
+
+    def stats(self):
+        st = self._state
+        return {
+            "documents": int(st.main.alive.sum()) + int(st.delta.alive[:st.delta.n].sum()),
+            "terms": len(st.main.terms),
+            "postings": len(st.main.docs),
+            "delta": st.delta.n,
+            "bytes": sum(a.nbytes for a in st.main.arrays().values()),  # 직렬화 크기 (dict/list 제외)
+        }
+
+
+# process-wide instance used by the routes
+search_index = SearchIndex()
+
+
+def init_app(app):
+    search_index.load()
+
+
+def build(path=INDEX_PATH):
+    """Full rebuild from ``Videos`` into a snapshot file."""
+    started = time.perf_counter()
+    rows = []
+    conn = get_db()
+    cur = conn.cursor(compact=True)
+    try:
+        last = 0
+        while True:
+            cur.execute("""
+                SELECT video_id, title, description, view_count
+                FROM Videos
+                WHERE video_id > %s AND visibility = 'public'
+                ORDER BY video_id
+                LIMIT %s
+            """, (last, FETCH_CHUNK * 10))
+            chunk = cur.fetchall()
+            if not chunk:
+                break
+            rows.extend(chunk)
+            last = chunk[-1][0]
+    finally:
+        cur.close()
+        conn.close()
+    fetched = time.perf_counter()
+
+    index = SearchIndex(path)
+    index.install(build_segment(rows))
+    index.save(path)
+    s = index.stats()
+    print(f"{s['documents']:,} videos, {s['terms']:,} terms, {s['postings']:,} postings, "
+          f"{s['bytes'] / 1e6:.0f} MB (fetch {fetched - started:.1f}s, "
+          f"index {time.perf_counter() - fetched:.1f}s) -> {path}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="rebuild the search snapshot from Videos")
+    b.add_argument("--out", default=INDEX_PATH)
+    args = ap.parse_args()
+
+    build(args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# singleflight.py
+"""Coalesce identical concurrent reads into one DB execution.
+
+``query(cur, sql, params)`` keys the call on the whitespace-normalized
+statement plus its parameters. The first caller for a key (the leader)
+executes it; callers that arrive while it is still running wait for the
+leader and receive a copy of its rows instead of running the same query
+again. Once the leader finishes, the key is released — nothing is cached
+beyond the in-flight window.
+
+Waiting is bounded by ``SINGLEFLIGHT_WAIT_MS`` (default 2000): a follower
+whose leader has not finished by then runs the query itself. If the
+leader raises, its followers re-raise the same exception.
+
+Counted in ``singleflight_requests_total`` by result: ``executed``
+(leader), ``shared`` (a saved execution) and ``timeout``.
+"""
+import os
+import pickle
+import re
+import threading
+
+import metrics
+
+WAIT_SECONDS = float(os.environ.get("SINGLEFLIGHT_WAIT_MS", "2000")) / 1000.0
+
+_SPACE = re.compile(r"\s+")
+
+
+class _Call:
+    __slots__ = ("done", "waiters", "snapshot", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.snapshot = None
+        self.error = None
+
+
+class Group:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, timeout=WAIT_SECONDS):
+        """Run ``fn()`` once per ``key`` among concurrent callers.
+
+        The leader gets ``fn``'s own return value; followers get a copy
+        (so none of them can modify what another caller holds).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                call.waiters += 1
+                leader = False
+
+        if not leader:
+            if call.done.wait(timeout):
+                metrics.SINGLEFLIGHT.inc(("shared",))
+                if call.error is not None:
+                    raise call.error
+                return pickle.loads(call.snapshot)
+            metrics.SINGLEFLIGHT.inc(("timeout",))
+            return fn()
+
+        metrics.SINGLEFLIGHT.inc(("executed",))
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            call.error = e
+            call.done.set()
+            raise
+        with self._lock:
+            del self._calls[key]
+            # 기다리는 쪽이 있을 때만 스냅샷 — 이후 도착한 요청은 새로 실행
+            if call.waiters:
+                call.snapshot = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        call.done.set()
+        return result
+
+
+_group = Group()
+
+
+def normalize(sql):
+    return _SPACE.sub(" ", sql).strip().rstrip(";")
+
+
+def query(cur, sql, params=None, one=False):
+    """``fetchall()`` (or ``fetchone()`` with ``one=True``) of ``sql``,
+    shared with identical concurrent calls."""
+    def run():
+        cur.execute(sql, params)
+        return cur.fetchone() if one else cur.fetchall()
+
+    # 커서 종류(dict / tuple 행)가 다르면 결과도 다르다
+    kind = type(getattr(cur, "_cur", cur)).__name__
+    key = (normalize(sql), repr(params), one, kind)
+    return _group.do(key, run)
@@ -0,0 +1,188 @@
+# slowlog.py
+"""Slow-query capture with sampled ``EXPLAIN FORMAT=JSON``.
+
+Statements whose wall time (execute + fetch) reaches ``DB_SLOW_QUERY_MS``
+are:
+
+* written with their parameters to a rotating local log
+  (``DB_SLOW_QUERY_LOG``, default ``logs/slow_query.log``);
+* aggregated in memory per fingerprint (count / total / max time), which
+  ``/admin/slow-queries`` lists as the top offenders;
+* for reads, sampled for an ``EXPLAIN FORMAT=JSON`` that runs on a
+  dedicated side connection in a background thread, so the request that
+  hit the slow path never waits for it. The plan is scanned for full table
+  scans, filesorts and temporary tables, and those flags are kept with the
+  fingerprint.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+import instrumentation
+
+THRESHOLD_MS = float(os.environ.get("DB_SLOW_QUERY_MS", "200"))
+EXPLAIN_SAMPLE = float(os.environ.get("DB_SLOW_EXPLAIN_SAMPLE", "0.2"))
+# same fingerprint is re-explained at most this often
+EXPLAIN_INTERVAL = 300.0
+LOG_PATH = os.environ.get("DB_SLOW_QUERY_LOG", os.path.join("logs", "slow_query.log"))
+MAX_FINGERPRINTS = 500
+
+_EXPLAINABLE = ("SELE", "WITH", "(SEL")
+
+logger = logging.getLogger("db_tp.slow_queries")
+logger.propagate = False
+
+_lock = threading.Lock()
+_stats = {}  # fingerprint -> dict
+_explain_queue = queue.Queue(maxsize=100)
+_worker = None
+
+
+def _ensure_log_handler():
+    if logger.handlers:
+        return
+    os.makedirs(os.path.dirname(LOG_PATH) or ".", exist_ok=True)
+    handler = RotatingFileHandler(LOG_PATH, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+def _short_repr(params, limit=500):
+    text = repr(params)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def record(sql, params, ms):
+    """Called by the DB cursor once a statement crosses ``THRESHOLD_MS``."""
+    fp = instrumentation.fingerprint(sql)
+    now = time.time()
+
+    with _lock:
+        st = _stats.get(fp)
+        if st is None:
+            if len(_stats) >= MAX_FINGERPRINTS:
+                # 누적 시간이 가장 작은 항목을 밀어냄
+                del _stats[min(_stats, key=lambda k: _stats[k]["total_ms"])]
+            st = _stats[fp] = {
+                "fingerprint": fp, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "last_params": None, "last_seen": 0.0, "explain": None, "explained_at": 0.0,
+            }
+        st["count"] += 1
+        st["total_ms"] += ms
+        st["max_ms"] = max(st["max_ms"], ms)
+        st["last_params"] = _short_repr(params)
+        st["last_seen"] = now
+        want_explain = (
+            sql.lstrip()[:4].upper() in _EXPLAINABLE
+            and now - st["explained_at"] >= EXPLAIN_INTERVAL
+            and random.random() < EXPLAIN_SAMPLE
+        )
+        if want_explain:
+            st["explained_at"] = now
+
+    try:
+        _ensure_log_handler()
+        logger.info(json.dumps({"ms": round(ms, 2), "sql": fp, "params": _short_repr(params)}, ensure_ascii=False, default=str))
+    except OSError:
+        pass
+
+    if want_explain:
+        _start_worker()
+        try:
+            _explain_queue.put_nowait((fp, sql, params))
+        except queue.Full:
+            pass
+
+
+# ------------------------------------------------------------
+# EXPLAIN on a side connection
+# ------------------------------------------------------------
+def summarize_plan(plan):
+    """Walk an ``EXPLAIN FORMAT=JSON`` document and pull out the red flags."""
+    full_scans, flags = [], set()
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get("access_type") == "ALL":
+                full_scans.append(node.get("table_name"))
+            if node.get("using_filesort"):
+                flags.add("filesort")
+            if node.get("using_temporary_table"):
+                flags.add("temporary")
+            for v in node.values():
+                walk(v)
+        elif isinstance(node, list):
+            for v in node:
+                walk(v)
+
+    walk(plan)
+    return {
+        "full_scan": bool(full_scans),
+        "full_scan_tables": sorted({t for t in full_scans if t}),
+        "filesort": "filesort" in flags,
+        "temporary": "temporary" in flags,
+        "query_cost": (plan.get("query_block", {}).get("cost_info", {}) or {}).get("query_cost"),
+    }
+
+
+def _explain_loop():
+    import db  # db imports this module; resolve lazily
+
+    conn = None
+    while True:
+        fp, sql, params = _explain_queue.get()
+        try:
+            if conn is None:
+                conn, _ = db.connect_raw()
+            cur = conn.cursor()
+            cur.execute("EXPLAIN FORMAT=JSON " + sql.strip().rstrip(";"), params)
+            row = cur.fetchone()
+            cur.close()
+            conn.rollback()
+            raw = row[0] if isinstance(row, (tuple, list)) else next(iter(row.values()))
+            summary = summarize_plan(json.loads(raw))
+        except Exception as e:
+            summary = {"error": str(e)}
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+        with _lock:
+            if fp in _stats:
+                _stats[fp]["explain"] = summary
+        try:
+            logger.info(json.dumps({"explain": fp, "plan": summary}, ensure_ascii=False, default=str))
+        except OSError:
+            pass
+
+
+def _start_worker():
+    global _worker
+    if _worker is not None:
+        return
+    with _lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_explain_loop, name="slowlog-explain", daemon=True)
+            _worker.start()
+
+
+def top(limit=20, sort="total_ms"):
+    """Top offenders, most expensive first."""
+    with _lock:
+        rows = [dict(st) for st in _stats.values()]
+    rows.sort(key=lambda st: st[sort], reverse=True)
+    for st in rows[:limit]:
+        st["avg_ms"] = round(st["total_ms"] / st["count"], 2)
+        st["total_ms"] = round(st["total_ms"], 2)
+        st["max_ms"] = round(st["max_ms"], 2)
+        st["last_seen"] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(st["last_seen"]))
+        st.pop("explained_at", None)
+    return rows[:limit]
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 패키지 설치 없이 저장소 루트의 모듈을 그대로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
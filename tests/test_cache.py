@@ -0,0 +1,94 @@
+import pytest
+
+import cache
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    b = cache.LRUBackend(max_entries=100, max_bytes=1 << 20)
+    monkeypatch.setattr(cache, "_backend", b)
+    return b
+
+
+def test_hit_after_load(backend):
+    c = cache.Cache("t", ttl=60)
+    calls = []
+    load = lambda: calls.append(1) or "v"
+    assert c.get_or_load("k", load, tags=("video:1",)) == "v"
+    assert c.get_or_load("k", load, tags=("video:1",)) == "v"
+    assert len(calls) == 1
+
+
+def test_invalidate_marks_tagged_entries_stale(backend):
+    c = cache.Cache("t", ttl=60)
+    c.get_or_load("a", lambda: "old-a", tags=("video:1",))
+    c.get_or_load("b", lambda: "old-b", tags=("video:2",))
+    cache.invalidate("video:1")
+    assert c.get_or_load("a", lambda: "new-a", tags=("video:1",)) == "new-a"
+    assert c.get_or_load("b", lambda: "new-b", tags=("video:2",)) == "old-b"
+
+
+def test_write_during_load_invalidates_the_loaded_value(backend):
+    c = cache.Cache("t", ttl=60)
+
+    def load():
+        # 로드 도중 커밋된 쓰기 — 시계는 로드 전에 읽혔으므로 이 값은 이미 stale
+        cache.invalidate("video:1")
+        return "raced"
+
+    assert c.get_or_load("k", load, tags=lambda v: ("video:1",)) == "raced"
+    assert c.get_or_load("k", lambda: "fresh", tags=lambda v: ("video:1",)) == "fresh"
+
+
+def test_loaded_at_from_an_earlier_snapshot(backend):
+    c = cache.Cache("t", ttl=60)
+    checkout_clock = cache.clock()
+    cache.invalidate("video:1")  # 라우트 스냅샷 이후, 캐시 로드 전의 쓰기
+    c.get_many([1], lambda ks: {1: "snapshot"}, tags=lambda k, v: ("video:1",), loaded_at=checkout_clock)
+    assert c.get_many([1], lambda ks: {1: "fresh"}, tags=lambda k, v: ("video:1",)) == {1: "fresh"}
+
+
+def test_get_many_loads_only_misses_in_one_call(backend):
+    c = cache.Cache("t", ttl=60)
+    c.get_many([1, 2], lambda ks: {k: k * 10 for k in ks}, tags=lambda k, v: (f"video:{k}",))
+    cache.invalidate("video:2")
+
+    seen = []
+
+    def load(ks):
+        seen.append(list(ks))
+        return {k: k * 100 for k in ks if k != 4}
+
+    assert c.get_many([1, 2, 3, 4, 2], load, tags=lambda k, v: (f"video:{k}",)) == {1: 10, 2: 200, 3: 300}
+    assert seen == [[2, 3, 4]]
+    # 없는 키는 캐시하지 않는다
+    assert c.get_many([4], lambda ks: {4: "now"}, tags=lambda k, v: ()) == {4: "now"}
+
+
+def test_values_are_copies(backend):
+    c = cache.Cache("t", ttl=60)
+    c.get_or_load("k", lambda: {"n": 1})
+    got = c.get_or_load("k", lambda: None)
+    got["n"] = 2
+    assert c.get_or_load("k", lambda: None) == {"n": 1}
+
+
+def test_lru_evicts_by_entries_and_bytes():
+    b = cache.LRUBackend(max_entries=2, max_bytes=10)
+    b.set("a", b"1234", 60)
+    b.set("b", b"1234", 60)
+    b.get("a")
+    b.set("c", b"1234", 60)
+    assert b.get("b") is None and b.get("a") == b"1234"
+    b.set("d", b"12345678", 60)
+    assert b.stats()["bytes"] <= 10
+    assert b.get("d") == b"12345678"
+    b.set("huge", b"x" * 11, 60)
+    assert b.get("huge") is None
+
+
+def test_clock_is_zero_when_caching_is_off(monkeypatch):
+    monkeypatch.setattr(cache, "_backend", False)
+    assert cache.clock() == 0
+    c = cache.Cache("t", ttl=60)
+    assert c.get_or_load("k", lambda: "v") == "v"
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+import cache
+import entitlements
+
+
+class RouteCursor:
+    """Stands in for a route cursor: the clock read at checkout."""
+
+    def __init__(self):
+        self.cache_clock = cache.clock()
+
+
+@pytest.fixture
+def ents(monkeypatch):
+    monkeypatch.setattr(cache, "_backend", cache.LRUBackend())
+    c = entitlements.EntitlementCache()
+    db = {"owned": set(), "rented": {}, "premium_until": None, "loads": 0}
+
+    def query(cur, user_id, clock):
+        db["loads"] += 1
+        return entitlements._UserEntitlements(
+            db["premium_until"], set(db["owned"]), dict(db["rented"]), time.time(), clock,
+        )
+
+    monkeypatch.setattr(c, "_query", query)
+    return c, db
+
+
+def test_refusals_are_served_from_memory(ents):
+    c, db = ents
+    for _ in range(10):
+        assert c.can_play(1, 5, RouteCursor()) == (False, "none", None)
+        assert not c.premium_active(1, RouteCursor())
+    assert db["loads"] == 1
+
+
+def test_invalidation_from_another_worker_reaches_the_deny_path(ents):
+    c, db = ents
+    c.can_play(1, 5, RouteCursor())
+    db["owned"].add(5)
+    # 다른 워커의 구매: 이 프로세스의 엔트리는 그대로, 공유 태그만 찍힌다
+    cache.invalidate(entitlements._tag(1))
+    assert c.can_play(1, 5, RouteCursor()) == (True, "owned", None)
+    assert c.can_play(1, 5, RouteCursor()) == (True, "owned", None)
+    assert db["loads"] == 2
+
+
+def test_rental_expires_without_reload(ents):
+    c, db = ents
+    db["rented"] = {7: time.time() + 0.05}
+    assert c.can_play(1, 7, RouteCursor())[1] == "rented"
+    time.sleep(0.06)
+    assert c.can_play(1, 7, RouteCursor()) == (False, "none", None)
+    assert db["loads"] == 1
+
+
+def test_load_racing_an_invalidate_is_not_cached(ents):
+    c, db = ents
+    cur = RouteCursor()  # 스냅샷은 구매 전에 잡혔다
+    db["owned"].add(5)
+    c.invalidate(1)
+    c.premium_active(1, cur)
+    assert 1 not in c._users
@@ -0,0 +1,146 @@
+import json
+import os
+import time
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOURNAL_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(jobs, "_schema_ready", False)
+    monkeypatch.setattr(jobs, "_shared", None)
+    monkeypatch.setattr(jobs, "_handlers", {})
+    conn = jobs._connect()
+    yield conn
+    conn.close()
+    if jobs._shared is not None:
+        jobs._shared.close()
+
+
+def _row(db, job_id):
+    return db.execute("SELECT status, attempts, run_after, error FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+
+
+def _expire_lease(db, job_id):
+    db.execute("UPDATE jobs SET run_after = 0 WHERE job_id = ?", (job_id,))
+
+
+def test_pending_key_dedupes(db):
+    assert jobs.enqueue("recount", {"video_id": 1}, key="recount:1")
+    assert not jobs.enqueue("recount", {"video_id": 1}, key="recount:1")
+    assert jobs.enqueue("recount", {"video_id": 2}, key="recount:2")
+    assert jobs.enqueue("recount", {"video_id": 1})  # key 없으면 매번 새 작업
+    assert db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 3
+
+
+def test_running_job_does_not_absorb_a_new_one(db):
+    jobs.enqueue("recount", {"video_id": 1}, key="recount:1")
+    job = jobs._claim(db)
+    assert job is not None
+    # 실행 중에 들어온 쓰기는 자기 작업을 받는다
+    assert jobs.enqueue("recount", {"video_id": 1}, key="recount:1")
+
+
+def test_success_deletes_the_job(db):
+    seen = []
+    jobs.handler("recount")(lambda video_id: seen.append(video_id))
+    jobs.enqueue("recount", {"video_id": 7})
+    job = jobs._claim(db)
+    assert jobs._run(db, job)
+    assert seen == [7]
+    assert db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 0
+
+
+def test_failure_retries_with_backoff_then_fails(db):
+    def boom(video_id):
+        raise RuntimeError("db down")
+
+    jobs.handler("recount")(boom)
+    jobs.enqueue("recount", {"video_id": 1})
+    job_id = None
+    for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+        job = jobs._claim(db)
+        assert job is not None, attempt
+        job_id = job[0]
+        before = time.time()
+        assert not jobs._run(db, job)
+        status, attempts, run_after, error = _row(db, job_id)
+        assert attempts == attempt and error == "db down"
+        if attempt < jobs.MAX_ATTEMPTS:
+            assert status == "pending"
+            assert run_after >= before + jobs.RETRY_SECONDS * 2 ** (attempt - 1) - 0.01
+            db.execute("UPDATE jobs SET run_after = 0 WHERE job_id = ?", (job_id,))
+        else:
+            assert status == "failed"
+    assert jobs._claim(db) is None
+
+
+def test_retry_merges_with_a_newer_pending_job(db):
+    jobs.handler("recount")(lambda video_id: 1 / 0)
+    jobs.enqueue("recount", {"video_id": 1}, key="recount:1")
+    job = jobs._claim(db)
+    jobs.enqueue("recount", {"video_id": 1}, key="recount:1")
+    jobs._run(db, job)
+    assert db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'pending'").fetchone()[0] == 1
+
+
+def test_missing_handler_is_a_failure(db):
+    jobs.enqueue("nobody", {})
+    job = jobs._claim(db)
+    assert not jobs._run(db, job)
+    assert "no handler" in _row(db, job[0])[3]
+
+
+def test_expired_lease_is_claimed_again(db):
+    jobs.enqueue("recount", {"video_id": 1})
+    job = jobs._claim(db)
+    assert jobs._claim(db) is None  # 임대 중
+    _expire_lease(db, job[0])
+    again = jobs._claim(db)
+    assert again[0] == job[0] and again[3] == 1
+
+
+def test_lease_expiring_max_attempts_times_fails_the_job(db):
+    jobs.enqueue("hangs", {})
+    for _ in range(jobs.MAX_ATTEMPTS):
+        job = jobs._claim(db)
+        assert job is not None
+        _expire_lease(db, job[0])
+    assert jobs._claim(db) is None
+    status, attempts, _, error = _row(db, job[0])
+    assert status == "failed" and attempts == jobs.MAX_ATTEMPTS
+    assert error == f"lease expired {jobs.MAX_ATTEMPTS} times"
+
+
+def test_requeue_failed(db):
+    jobs.enqueue("nobody", {})
+    db.execute("UPDATE jobs SET status = 'failed', attempts = 5")
+    assert jobs.requeue_failed() == 1
+    assert [(s["status"], s["count"]) for s in jobs.stats()] == [("pending", 1)]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_child_gets_own_connection_and_no_workers(db, monkeypatch):
+    monkeypatch.setattr(jobs, "_workers", ["parent-worker"])
+    jobs.enqueue("recount", {"video_id": 1})
+    parent_shared = jobs._shared
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            state = [jobs._shared is None, jobs._workers == []]
+            jobs.enqueue("recount", {"video_id": 2})
+            state.append(jobs._shared is not parent_shared)
+            os.write(w, json.dumps(state).encode())
+        finally:
+            os._exit(0)
+    os.close(w)
+    with os.fdopen(r) as f:
+        state = json.loads(f.read())
+    os.waitpid(pid, 0)
+    assert state == [True, True, True]
+    assert jobs._shared is parent_shared
+    assert db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 2
@@ -0,0 +1,73 @@
+import pytest
+
+import cache
+import lookups
+
+TYPES = [(1, "video"), (2, "shorts"), (3, "live")]
+
+
+class FakeCursor:
+    """VideoType / empty listing results as tuple (compact) or dict rows."""
+
+    def __init__(self, compact):
+        self.compact = compact
+        self.statements = []
+        self.description = None
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if "FROM VideoType" in sql:
+            columns, rows = ("type_id", "type_name"), TYPES
+        else:
+            columns, rows = ("video_id", "title"), []
+        self.description = [(c,) for c in columns]
+        self._rows = [r if self.compact else dict(zip(columns, r)) for r in rows]
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self):
+        self.cursors = []
+
+    def cursor(self, dictionary=False, compact=False):
+        cur = FakeCursor(compact)
+        self.cursors.append(cur)
+        return cur
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setattr(cache, "_backend", cache.LRUBackend())
+    conn = FakeConn()
+    monkeypatch.setattr(lookups, "get_db", lambda: conn)
+    return conn
+
+
+def test_compact_cursor_miss_caches_dict_rows(backend):
+    assert lookups.type_id("shorts", FakeCursor(compact=True)) == 2
+    # 이후 dict 커서 경로도 같은 캐시 항목을 그대로 읽는다
+    assert lookups.type_id("live", FakeCursor(compact=False)) == 3
+    assert lookups.video_types()[0] == {"type_id": 1, "type_name": "video"}
+
+
+def test_columnar_listing_then_dict_listing(backend):
+    mypage = pytest.importorskip("routes.mypage")
+    compact = FakeCursor(compact=True)
+    data = mypage._load_history(compact, 1, "shorts", columnar=True)
+    assert data == {"count": 0, "columns": ["video_id", "title"], "rows": []}
+    # compact 커서로는 VideoType 을 읽지 않는다 (lookups 자체 커넥션, dict 커서)
+    assert not any("FROM VideoType" in s for s in compact.statements)
+    assert [c.compact for c in backend.cursors] == [False]
+
+    rows = FakeCursor(compact=False)
+    assert mypage._load_myvideos(rows, 1, "live")["count"] == 0
+    assert lookups.type_id("video", rows) == 1
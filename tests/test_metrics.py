@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import metrics
+
+
+def test_exited_thread_shards_fold_into_base():
+    c = metrics.Counter("test_folded_total", "test")
+    threads = [threading.Thread(target=lambda: c.inc(("x",))) for _ in range(200)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert c.collect() == {("x",): 200}
+    assert c._shards == []
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_child_starts_with_own_key_and_no_values():
+    c = metrics.Counter("test_fork_total", "test")
+    c.inc(amount=5)
+    parent_key = metrics._process_key
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            c.inc()
+            os.write(w, json.dumps([metrics._process_key != parent_key, c.collect().get((), 0)]).encode())
+        finally:
+            os._exit(0)
+    os.close(w)
+    with os.fdopen(r) as f:
+        new_key, child_value = json.loads(f.read())
+    os.waitpid(pid, 0)
+    assert new_key and child_value == 1
+    assert c.collect() == {(): 5}
+
+
+def test_files_of_gone_processes_are_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    c = metrics.Counter("test_files_total", "test")
+
+    def write(key, value, age=0.0):
+        path = tmp_path / f"metrics_{key}.json"
+        path.write_text(json.dumps({"test_files_total": [[[], value]]}))
+        t = time.time() - age
+        os.utime(path, (t, t))
+        return path
+
+    live = write(f"{os.getppid()}_1", 3)
+    dead = write("999999999_1", 100)
+    stale = write(f"{os.getppid()}_2", 1000, age=metrics.STALE_AFTER + 1)
+    assert metrics._merged()["test_files_total"] == {(): 3}
+    assert live.exists() and not dead.exists() and not stale.exists()
+    assert c.collect() == {}
@@ -0,0 +1,89 @@
+import pytest
+
+import search
+
+ROWS = [
+    (1, "먹방 브이로그", "오늘은 떡볶이 먹방", 100),
+    (2, "먹방 브이로그 모음", "인기 먹방", 1_000_000),
+    (3, "캠핑 브이로그", "주말 캠핑", 500),
+    (4, "Python tutorial", "learn python basics", 10),
+    (5, "요리 강좌", "김치찌개 만들기", 50),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    # 스냅샷 파일 없음 + 갱신 주기 무한대 — DB 따라잡기를 타지 않는다
+    idx = search.SearchIndex(path=str(tmp_path / "index.npz"), refresh_after=float("inf"))
+    idx.install(search.build_segment(ROWS))
+    return idx
+
+
+def ids(hits):
+    return [vid for vid, _ in hits]
+
+
+def test_korean_title_matches_by_bigrams(index):
+    total, hits = index.search("브이로그")
+    assert total == 3
+    assert set(ids(hits)) == {1, 2, 3}
+
+
+def test_popular_match_ranks_first(index):
+    total, hits = index.search("먹방 브이로그")
+    assert ids(hits)[:2] == [2, 1]
+    assert hits[0][1] >= hits[1][1]
+
+
+def test_coverage_threshold_drops_weak_matches(index):
+    # 질의 토큰의 절반 이상을 덮어야 한다 — 요리 강좌는 "요리" 하나만 겹친다
+    total, hits = index.search("주말 캠핑 요리")
+    assert (total, ids(hits)) == (1, [3])
+
+
+def test_description_words_and_ascii(index):
+    assert ids(index.search("python")[1]) == [4]
+    assert ids(index.search("김치찌개")[1]) == [5]
+
+
+def test_paging_is_a_slice_of_the_full_ranking(index):
+    total, full = index.search("브이로그", limit=10)
+    pages = index.search("브이로그", limit=1, offset=0)[1] + index.search("브이로그", limit=2, offset=1)[1]
+    assert ids(pages) == ids(full)
+    assert index.search("브이로그", limit=5, offset=10) == (total, [])
+
+
+def test_upsert_replaces_and_hides(index):
+    index.upsert(3, "등산 브이로그", "", 500)
+    assert 3 not in ids(index.search("캠핑")[1])
+    assert 3 in ids(index.search("등산")[1])
+    index.upsert(3, "등산 브이로그", "", 500, visibility="private")
+    assert 3 not in ids(index.search("브이로그")[1])
+    index.remove(1)
+    assert ids(index.search("떡볶이")[1]) == []
+
+
+def test_merge_keeps_results(index):
+    index.upsert(6, "캠핑 요리", "", 5)
+    before = index.search("캠핑", limit=10)
+    st = index._state
+    index.install(search.merge(st))
+    assert index.search("캠핑", limit=10) == before
+
+
+def test_upsert_does_not_advance_catch_up_mark(index):
+    index.upsert(100, "새 영상", "", 0)
+    assert index._caught_up_id == 5
+
+
+def test_autocomplete_keeps_earlier_words(index):
+    assert index.autocomplete("먹방 브") == ["먹방 브이로그"]
+    assert index.autocomplete("") == []
+
+
+def test_snapshot_round_trip(index, tmp_path):
+    path = str(tmp_path / "snap.npz")
+    index.save(path)
+    loaded = search.SearchIndex(path=path, refresh_after=float("inf"))
+    assert loaded.load()
+    assert loaded.search("먹방 브이로그") == index.search("먹방 브이로그")
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+import singleflight
+
+
+def _wait_for_waiters(group, key, n):
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline:
+        with group._lock:
+            call = group._calls.get(key)
+            if call is not None and call.waiters >= n:
+                return
+        time.sleep(0.001)
+    raise AssertionError("followers did not arrive")
+
+
+def _leader_blocked(group, key, release, result=None, error=None):
+    """Start a leader whose ``fn`` blocks until ``release`` is set."""
+    out = {}
+
+    def fn():
+        release.wait(2)
+        if error is not None:
+            raise error
+        return result
+
+    def run():
+        try:
+            out["value"] = group.do(key, fn)
+        except Exception as e:
+            out["error"] = e
+
+    t = threading.Thread(target=run)
+    t.start()
+    deadline = time.monotonic() + 2
+    while key not in group._calls and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return t, out
+
+
+def test_followers_share_the_leaders_result():
+    group = singleflight.Group()
+    release = threading.Event()
+    rows = [{"video_id": 1}]
+    leader, leader_out = _leader_blocked(group, "k", release, result=rows)
+
+    calls = []
+    results = []
+    followers = [
+        threading.Thread(target=lambda: results.append(group.do("k", lambda: calls.append(1) or []))),
+        threading.Thread(target=lambda: results.append(group.do("k", lambda: calls.append(1) or []))),
+    ]
+    for t in followers:
+        t.start()
+    _wait_for_waiters(group, "k", 2)
+    release.set()
+    for t in [leader, *followers]:
+        t.join()
+
+    assert calls == []
+    assert leader_out["value"] is rows
+    assert results == [rows, rows]
+    # 팔로워는 각자 복사본을 받는다
+    assert all(r is not rows for r in results) and results[0] is not results[1]
+
+
+def test_leader_error_reaches_followers():
+    group = singleflight.Group()
+    release = threading.Event()
+    leader, leader_out = _leader_blocked(group, "k", release, error=ValueError("boom"))
+
+    errors = []
+
+    def follow():
+        try:
+            group.do("k", lambda: "unused")
+        except ValueError as e:
+            errors.append(e)
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    _wait_for_waiters(group, "k", 1)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert isinstance(leader_out["error"], ValueError)
+    assert errors == [leader_out["error"]]
+    assert "k" not in group._calls
+
+
+def test_follower_runs_the_query_itself_after_timeout():
+    group = singleflight.Group()
+    release = threading.Event()
+    leader, _ = _leader_blocked(group, "k", release, result="leader")
+    try:
+        assert group.do("k", lambda: "own", timeout=0.01) == "own"
+    finally:
+        release.set()
+        leader.join()
+
+
+def test_key_is_released_after_the_call():
+    group = singleflight.Group()
+    calls = []
+    assert group.do("k", lambda: calls.append(1) or len(calls)) == 1
+    assert group.do("k", lambda: calls.append(1) or len(calls)) == 2
+    assert group._calls == {}
+
+
+def test_error_without_followers_releases_the_key():
+    group = singleflight.Group()
+    with pytest.raises(KeyError):
+        group.do("k", lambda: {}["missing"])
+    assert group.do("k", lambda: "again") == "again"
+
+
+def test_query_key_ignores_whitespace():
+    assert singleflight.normalize("\n  SELECT  1\n  FROM t;\n") == "SELECT 1 FROM t"
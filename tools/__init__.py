@@ -0,0 +1,2 @@
+"""Offline tools (benchmarks, data generation). Run from the repo root,
+e.g. ``python -m tools.bench_catalog``."""
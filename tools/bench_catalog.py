@@ -0,0 +1,67 @@
+"""Benchmark the columnar movie catalog on a synthetic snapshot.
+
+    python -m tools.bench_catalog --rows 1000000 --repeat 20
+
+No database is needed: a seeded random snapshot is installed directly via
+``MovieCatalog.load`` and the same filter/sort combinations the endpoint
+accepts are timed.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from catalog import MovieCatalog
+
+
+def synthetic_columns(n, seed):
+    rng = np.random.default_rng(seed)
+    price = np.round(rng.uniform(1000, 20000, n), -2)
+    price[rng.random(n) < 0.02] = np.nan  # 일부 NULL
+    return {
+        "movie_id": np.arange(1, n + 1, dtype=np.int64),
+        "title": np.array([f"movie {i}" for i in range(1, n + 1)], dtype=object),
+        "thumbnail_url": np.array([None] * n, dtype=object),
+        "price": price,
+        "duration": rng.integers(60, 200, n).astype(np.float64),
+        "release_year": rng.integers(1950, 2026, n).astype(np.float64),
+    }
+
+
+CASES = [
+    ("no filter", {}),
+    ("year 2000-2010", {"release_year": (2000, 2010)}),
+    ("price <= 5000", {"price": (None, 5000)}),
+    ("year + price + duration", {"release_year": (1990, 2020), "price": (3000, 9000), "duration": (90, 150)}),
+]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    cols = synthetic_columns(args.rows, args.seed)
+    catalog = MovieCatalog(refresh_after=float("inf"), full_reload_after=float("inf"))
+    catalog.load(cols)
+    print(f"snapshot: {args.rows} rows built in {time.perf_counter() - t0:.2f}s, "
+          f"numeric columns {sum(cols[c].nbytes for c in MovieCatalog.NUMERIC) / 1e6:.1f} MB")
+
+    for label, ranges in CASES:
+        for sort in ("newest", "price_asc", "duration_desc"):
+            for offset in (0, 1000):
+                times = []
+                for _ in range(args.repeat):
+                    t = time.perf_counter()
+                    total, rows = catalog.query(ranges, sort=sort, limit=20, offset=offset)
+                    times.append((time.perf_counter() - t) * 1000)
+                times.sort()
+                print(f"{label:<26} sort={sort:<14} offset={offset:<5} matched={total:<8} "
+                      f"p50={times[len(times) // 2]:.2f}ms max={times[-1]:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
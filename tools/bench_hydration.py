@@ -0,0 +1,173 @@
+"""Join-heavy listing queries vs id queries + card hydration.
+
+    python -m tools.bench_hydration --repeat 200
+
+Runs against whatever database ``db.DB_CONFIG`` points at (fill it with
+``python -m tools.datagen`` first). For each listing the old query (which
+joins ``Users`` / ``VideoType`` for the display fields) is timed against
+the id-only query plus ``hydration.videos_with_channels`` in two states:
+
+* cold — empty card cache, so every card is loaded with ``WHERE id IN``
+* warm — cards already cached, only the id query hits the database
+
+Ids are drawn from a seeded ``IdPool``, so runs are comparable. Route-level
+numbers (before/after this change) come from ``tools.bench_routes
+--compare``.
+"""
+import argparse
+import time
+
+import cache
+import hydration
+from db import get_db
+from routes import home
+from tools.bench_routes import percentile
+from tools.workload import IdPool
+
+LEGACY = {
+    "time_based": ("""
+        SELECT V.video_id, V.title, VT.type_name AS video_type, V.view_count, V.upload_date,
+               U.user_id, U.username AS uploader_name, U.profile_img,
+               CASE
+                   WHEN HOUR(NOW()) BETWEEN 18 AND 23 AND VT.type_name = 'video'  THEN 10
+                   WHEN HOUR(NOW()) BETWEEN  6 AND 17 AND VT.type_name = 'shorts' THEN 10
+                   ELSE 1
+               END AS type_weight
+        FROM VideoType VT
+        CROSS JOIN LATERAL (
+            SELECT v.video_id, v.title, v.view_count, v.upload_date, v.user_id
+            FROM Videos v
+            WHERE v.type_id = VT.type_id AND v.visibility = 'public'
+            ORDER BY v.view_count DESC, v.upload_date DESC
+            LIMIT 20
+        ) V
+        JOIN Users U ON U.user_id = V.user_id
+        ORDER BY (V.view_count * type_weight) DESC, V.upload_date DESC
+        LIMIT 20
+    """, None),
+    "recent_watched": ("""
+        SELECT wh.watched_at, v.video_id, v.title, vt.type_name AS video_type, v.view_count AS raw_views,
+               v.upload_date, u.user_id AS creator_id, u.username AS creator_name,
+               u.profile_img AS creator_profile_image
+        FROM WatchHistory wh
+        JOIN Videos v ON wh.video_id = v.video_id
+        JOIN Users u  ON v.user_id  = u.user_id
+        JOIN VideoType vt ON v.type_id = vt.type_id
+        WHERE wh.user_id = %s
+        ORDER BY wh.watched_at DESC
+        LIMIT 5
+    """, "user"),
+    "shorts_list": ("""
+        SELECT v.video_id AS shorts_id, v.user_id AS channel_id, u.username AS channel_name, v.title,
+               v.video_url, v.thumbnail_url, v.duration, v.view_count, v.like_count, v.comment_count,
+               v.upload_date
+        FROM Videos v
+        JOIN Users u ON v.user_id = u.user_id
+        WHERE v.type_id = 2
+        ORDER BY v.view_count DESC, v.upload_date DESC
+        LIMIT 20 OFFSET %s
+    """, "offset"),
+    "feed": ("""
+        SELECT v.video_id, v.title, v.thumbnail_url, v.duration, v.upload_date, vt.type_name,
+               u.user_id AS channel_id, u.username AS channel_name, u.profile_img AS channel_profile,
+               COALESCE(v.view_count, 0) AS view_count
+        FROM Subscriptions s
+        JOIN Videos v ON s.channel_id = v.user_id
+        JOIN Users u ON u.user_id = v.user_id
+        JOIN VideoType vt ON vt.type_id = v.type_id
+        WHERE s.subscriber_id = %s AND v.visibility = 'public'
+        ORDER BY v.upload_date DESC
+        LIMIT 20
+    """, "user"),
+}
+
+# 라우트와 같은 id 쿼리 (shorts_list / feed는 라우트 안에 인라인)
+ID_QUERIES = {
+    "shorts_list": """
+        SELECT v.video_id, v.view_count FROM Videos v
+        WHERE v.type_id = 2
+        ORDER BY v.view_count DESC, v.upload_date DESC
+        LIMIT 20 OFFSET %s
+    """,
+    "feed": """
+        SELECT v.video_id, COALESCE(v.view_count, 0) AS view_count
+        FROM Subscriptions s
+        JOIN Videos v ON s.channel_id = v.user_id
+        WHERE s.subscriber_id = %s AND v.visibility = 'public'
+        ORDER BY v.upload_date DESC
+        LIMIT 20
+    """,
+}
+
+
+def param(kind, ids, i):
+    if kind == "user":
+        return (ids.user(),)
+    if kind == "offset":
+        return ((i % 10) * 20,)
+    return None
+
+
+def hydrated(name, cur, args):
+    if name == "time_based":
+        return home._time_based(cur)
+    if name == "recent_watched":
+        return home._recent_watched(cur, args[0])
+    cur.execute(ID_QUERIES[name], args)
+    ranked = cur.fetchall()
+    return hydration.videos_with_channels([r["video_id"] for r in ranked], cur)
+
+
+def timed(fn, repeat):
+    times = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return {p: percentile(times, p) for p in (50, 95)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    print(f"median / p95 of {args.repeat} runs (ms)")
+    for name, (sql, kind) in LEGACY.items():
+        ids = IdPool.load(seed=args.seed)
+
+        def legacy(i):
+            cur.execute(sql, param(kind, ids, i))
+            cur.fetchall()
+
+        def cold(i):
+            cache._backend = cache.LRUBackend()  # 카드 캐시 비우기
+            hydrated(name, cur, param(kind, ids, i))
+
+        def warm(i):
+            hydrated(name, cur, param(kind, ids, i))
+
+        results = [("join", timed(legacy, args.repeat))]
+        ids = IdPool.load(seed=args.seed)
+        results.append(("ids+cold", timed(cold, args.repeat)))
+        ids = IdPool.load(seed=args.seed)
+        for i in range(args.repeat):  # 같은 요청으로 캐시 채우기
+            warm(i)
+        ids = IdPool.load(seed=args.seed)
+        results.append(("ids+warm", timed(warm, args.repeat)))
+
+        line = "  ".join(f"{label} {r[50]:>7.2f} / {r[95]:>7.2f}" for label, r in results)
+        print(f"  {name:<15} {line}")
+
+    cache._backend = None
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark JSON encoding of a large ``yt_history`` response.
+
+    python -m tools.bench_json --rows 10000 --repeat 20
+
+No database is needed: rows shaped like ``_load_history`` output (raw
+``datetime`` values as the cursor returns them) are built in memory and
+encoded three ways:
+
+* legacy   — the old per-row ``strftime`` loop, then Flask's default provider
+* stdlib   — ``FastJSONProvider`` encoding with the ``json`` fallback
+* orjson   — ``FastJSONProvider`` encoding with orjson (when installed)
+
+followed by the size and time of gzip / brotli compression of the result.
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import json_provider
+
+
+def history_rows(n, seed):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    rows = []
+    for i in range(n):
+        video_id = rng.randrange(1, 1_000_000)
+        rows.append({
+            "history_id": i + 1,
+            "video_id": video_id,
+            "title": f"video title {video_id} with a few more words",
+            "thumbnail_url": f"https://cdn.example.com/t/{video_id}.jpg",
+            "duration": rng.randrange(5, 3600),
+            "type_id": rng.choice((1, 2, 3)),
+            "type_name": rng.choice(("video", "shorts", "live")),
+            "last_position": rng.randrange(0, 3600),
+            "is_finished": rng.random() < 0.3,
+            "watched_at": base + timedelta(seconds=rng.randrange(0, 90 * 86400)),
+            "view_count": rng.randrange(0, 10_000_000),
+            "like_count": rng.randrange(0, 100_000),
+            "comment_count": rng.randrange(0, 10_000),
+            "creator_id": rng.randrange(1, 100_000),
+            "creator_name": f"creator {rng.randrange(1, 100_000)}",
+            "creator_handle": f"@creator{rng.randrange(1, 100_000)}",
+            "creator_profile": "https://cdn.example.com/default.png",
+        })
+    return rows
+
+
+def timed(fn, repeat):
+    times = []
+    out = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return out, times[len(times) // 2]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    app = Flask(__name__)
+    legacy_provider = DefaultJSONProvider(app)
+    rows = history_rows(args.rows, args.seed)
+
+    def legacy():
+        converted = [dict(r) for r in rows]  # 라우트가 행을 직접 고쳐 쓰던 것과 같은 비용
+        for row in converted:
+            if row.get("watched_at"):
+                row["watched_at"] = row["watched_at"].strftime('%Y-%m-%d %H:%M:%S')
+        return legacy_provider.dumps({"success": True, "count": len(converted), "history": converted}).encode("utf-8")
+
+    def stdlib():
+        return json.dumps(
+            {"success": True, "count": len(rows), "history": rows},
+            default=json_provider._default, ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+        ).encode("utf-8")
+
+    cases = [("legacy", legacy), ("stdlib", stdlib)]
+    if json_provider.orjson is not None:
+        cases.append(("orjson", lambda: json_provider.dumps_bytes({"success": True, "count": len(rows), "history": rows})))
+    else:
+        print("orjson not installed — skipping the orjson case")
+
+    print(f"{args.rows} rows, median of {args.repeat}")
+    body = None
+    for label, fn in cases:
+        body, ms = timed(fn, args.repeat)
+        print(f"  encode {label:<8} {ms:>8.2f}ms  {len(body) / 1024:>8.1f} KiB")
+
+    _, ms = timed(lambda: gzip.compress(body, compresslevel=json_provider.GZIP_LEVEL), args.repeat)
+    print(f"  gzip   level {json_provider.GZIP_LEVEL}  {ms:>8.2f}ms  {len(gzip.compress(body, compresslevel=json_provider.GZIP_LEVEL)) / 1024:>8.1f} KiB")
+    if json_provider.brotli is not None:
+        q = json_provider.BROTLI_QUALITY
+        _, ms = timed(lambda: json_provider.brotli.compress(body, quality=q), args.repeat)
+        print(f"  brotli q{q}       {ms:>8.2f}ms  {len(json_provider.brotli.compress(body, quality=q)) / 1024:>8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
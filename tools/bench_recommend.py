@@ -0,0 +1,78 @@
+"""Build time and memory of the shorts co-watch index on synthetic data.
+
+    python -m tools.bench_recommend --shorts 1000000 --users 2000000 --interactions 20000000
+
+No database is needed: seeded power-law interactions (a few users do most
+of the watching, a few shorts get most of the views, like ``tools.datagen``)
+go straight into ``recommend.build_index``. Reports wall time per phase,
+the peak of NumPy / SciPy allocations (``tracemalloc``) and the process
+max RSS, then the size of the resulting index and the lookup latency.
+"""
+import argparse
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+import recommend
+from tools.bench_routes import percentile
+from tools.datagen import Sampler, zipf_weights
+
+
+def synthetic_interactions(n_shorts, n_users, n, like_share, seed):
+    rng = np.random.default_rng(seed)
+    users = Sampler(zipf_weights(n_users, 1.0, rng)).draw(rng, n)
+    items = Sampler(zipf_weights(n_shorts, 1.0, rng)).draw(rng, n)
+    weights = np.where(rng.random(n) < like_share, recommend.LIKE_WEIGHT, 1.0).astype(np.float32)
+    return users, items, weights
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shorts", type=int, default=1_000_000)
+    ap.add_argument("--users", type=int, default=2_000_000)
+    ap.add_argument("--interactions", type=int, default=20_000_000)
+    ap.add_argument("--like-share", type=float, default=0.2)
+    ap.add_argument("--k", type=int, default=recommend.TOP_K)
+    ap.add_argument("--block-nnz", type=int, default=recommend.BLOCK_NNZ)
+    ap.add_argument("--lookups", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    users, items, weights = synthetic_interactions(args.shorts, args.users, args.interactions, args.like_share, args.seed)
+    print(f"input: {args.interactions:,} interactions, {args.users:,} users, {args.shorts:,} shorts "
+          f"({(users.nbytes + items.nbytes + weights.nbytes) / 1e6:.0f} MB, generated in {time.perf_counter() - t0:.1f}s)")
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    index = recommend.build_index(users, items, weights, args.shorts, k=args.k, block_nnz=args.block_nnz, seed=args.seed)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # ru_maxrss: Linux는 KB 단위
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"build: {elapsed:.1f}s, peak traced {peak / 1e6:.0f} MB, max RSS {rss:.0f} MB")
+
+    ids = np.arange(1, args.shorts + 1, dtype=np.int32)
+    index["ids"] = ids
+    idx = recommend.CoWatchIndex(path="/nonexistent", reload_check=float("inf"))
+    idx.install(index)
+    s = idx.stats()
+    counts = np.diff(index["indptr"])
+    print(f"index: {s['neighbors']:,} neighbours, {s['bytes'] / 1e6:.0f} MB, "
+          f"{(counts > 0).mean() * 100:.1f}% of shorts have any, median {int(np.median(counts))} per short")
+
+    rng = np.random.default_rng(args.seed)
+    times = []
+    for vid in rng.choice(ids, args.lookups).tolist():
+        t = time.perf_counter()
+        idx.neighbors(vid)
+        times.append((time.perf_counter() - t) * 1e6)
+    times.sort()
+    print(f"lookup: p50 {percentile(times, 50):.1f} us, p99 {percentile(times, 99):.1f} us")
+
+
+if __name__ == "__main__":
+    main()
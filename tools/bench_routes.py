@@ -0,0 +1,178 @@
+"""Replay every route through the Flask test client and record latency.
+
+    python -m tools.bench_routes --requests 200 --out bench/baseline.json
+    python -m tools.bench_routes --routes get_feed,yt_history --compare bench/baseline.json
+
+Runs against whatever database ``db.DB_CONFIG`` points at (fill it with
+``python -m tools.datagen`` first). Each route gets ``--warmup`` untimed
+requests, then ``--requests`` timed ones with ids drawn from a seeded
+``IdPool``, so two runs with the same seed send the same requests.
+
+Per route the JSON report keeps wall-time percentiles, the DB time and the
+query count parsed from the ``Server-Timing`` header, and the error count.
+``--compare`` prints the change against an earlier report and exits
+non-zero when any route's p95 regressed by more than ``--threshold``.
+Write routes are skipped unless ``--writes`` is given, since they change
+the data the next run measures.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from app import create_app
+from tools.workload import IdPool, parse_server_timing, query_count, select, send
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies, db_ms, queries, errors):
+    latencies = sorted(latencies)
+    db_ms = sorted(db_ms)
+    out = {
+        "requests": len(latencies),
+        "errors": errors,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "max_ms": round(latencies[-1], 3) if latencies else None,
+    }
+    for p in PERCENTILES:
+        v = percentile(latencies, p)
+        out[f"p{p}_ms"] = round(v, 3) if v is not None else None
+    out["db_p50_ms"] = round(percentile(db_ms, 50), 3) if db_ms else None
+    out["queries_mean"] = round(sum(queries) / len(queries), 2) if queries else None
+    out["queries_max"] = max(queries) if queries else None
+    return out
+
+
+def bench_route(client, spec, ids, requests, warmup):
+    for _ in range(warmup):
+        send(client, spec, ids)
+
+    latencies, db_ms, queries, errors = [], [], [], 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        resp = send(client, spec, ids)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if resp.status_code >= 500:
+            errors += 1
+        timing = parse_server_timing(resp.headers.get("Server-Timing"))
+        if "db" in timing:
+            db_ms.append(timing["db"][0])
+            queries.append(query_count(timing))
+    return summarize(latencies, db_ms, queries, errors)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _table_counts():
+    from db import connect_raw
+
+    conn, _ = connect_raw()
+    cur = conn.cursor()
+    counts = {}
+    try:
+        for table in ("Users", "Videos", "Comments", "VideoLikes", "Subscriptions", "WatchHistory"):
+            # information_schema 추정치 — COUNT(*)는 1억 행에서 수십 초
+            cur.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                (table,),
+            )
+            row = cur.fetchone()
+            counts[table] = (row[0] if isinstance(row, (tuple, list)) else next(iter(row.values()))) if row else None
+    finally:
+        cur.close()
+        conn.close()
+    return counts
+
+
+def compare(report, baseline, threshold):
+    """Print p50/p95/query deltas; return the routes whose p95 regressed."""
+    regressions = []
+    print(f"\n{'route':<22} {'p50 base':>9} {'p50 now':>9} {'p95 base':>9} {'p95 now':>9} {'Δp95':>8} {'queries':>11}")
+    for name, now in report["routes"].items():
+        base = baseline.get("routes", {}).get(name)
+        if not base or not base.get("p95_ms") or now.get("p95_ms") is None:
+            print(f"{name:<22} {'-':>9} {now.get('p50_ms') or 0:>9.2f} {'-':>9} {now.get('p95_ms') or 0:>9.2f}")
+            continue
+        change = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSED"
+            regressions.append(name)
+        queries = f"{base.get('queries_mean')}→{now.get('queries_mean')}"
+        print(f"{name:<22} {base['p50_ms']:>9.2f} {now['p50_ms']:>9.2f} {base['p95_ms']:>9.2f} "
+              f"{now['p95_ms']:>9.2f} {change:>+8.0%} {queries:>11}{flag}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--routes", help="comma-separated route names (default: every read route)")
+    ap.add_argument("--writes", action="store_true", help="include write routes")
+    ap.add_argument("--requests", type=int, default=100)
+    ap.add_argument("--warmup", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", help="write the JSON report here")
+    ap.add_argument("--compare", help="earlier JSON report to diff against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="p95 regression tolerance (0.2 = +20%%)")
+    args = ap.parse_args()
+
+    specs = select(args.routes, writes=args.writes)
+    ids = IdPool.load(seed=args.seed)
+    client = create_app().test_client()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+            "rows": _table_counts(),
+        },
+        "routes": {},
+    }
+
+    for spec in specs:
+        result = bench_route(client, spec, ids, args.requests, args.warmup)
+        report["routes"][spec.name] = result
+        print(f"{spec.name:<22} p50={result['p50_ms']:>8.2f}ms p95={result['p95_ms']:>8.2f}ms "
+              f"p99={result['p99_ms']:>8.2f}ms queries={result['queries_mean']} errors={result['errors']}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nreport written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\np95 regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measure dict rows vs compact tuple rows on a large result set.
+
+    python -m tools.bench_rows --rows 100000
+
+No database is needed. The driver's tuple rows are simulated with
+``tools.bench_json.history_rows`` (the ``yt_history`` column set), then
+kept two ways:
+
+* dict     — what ``cursor(dictionary=True)`` hands back, one dict per row
+* compact  — what ``cursor(compact=True)`` + ``db.fetch_compact`` hand back
+
+For each, tracemalloc reports the memory the result set holds, and the
+JSON provider's encode time and size are measured for the matching
+response shape (list of objects vs ``{"columns", "rows"}``).
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import json_provider
+from tools.bench_json import history_rows
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = build()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return rows, held
+
+
+def encode(payload, repeat):
+    times = []
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = json_provider.dumps_bytes(payload)
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return body, times[len(times) // 2]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    sample = history_rows(args.rows, args.seed)
+    columns = list(sample[0])
+    # 드라이버가 소켓에서 읽어 온 상태 — 값 객체는 두 방식이 공유
+    raw = [tuple(r.values()) for r in sample]
+    del sample
+
+    dict_rows, dict_bytes = measure(lambda: [dict(zip(columns, r)) for r in raw])
+    tuple_rows, tuple_bytes = measure(lambda: [tuple([*r]) for r in raw])  # 새 tuple (tuple(r)은 같은 객체)
+
+    print(f"{args.rows} rows x {len(columns)} columns (memory held by the row containers; values are shared)")
+    print(f"  dict rows     {dict_bytes / 1e6:>8.1f} MB")
+    print(f"  tuple rows    {tuple_bytes / 1e6:>8.1f} MB  ({1 - tuple_bytes / dict_bytes:.0%} less)")
+
+    body, ms = encode({"success": True, "count": len(dict_rows), "history": dict_rows}, args.repeat)
+    print(f"  encode rows      {ms:>8.2f}ms  {len(body) / 1e6:>6.2f} MB")
+    body_c, ms_c = encode({"success": True, "count": len(tuple_rows), "columns": columns, "rows": tuple_rows}, args.repeat)
+    print(f"  encode columnar  {ms_c:>8.2f}ms  {len(body_c) / 1e6:>6.2f} MB  ({1 - len(body_c) / len(body):.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Build / restart / query cost of the search index on synthetic videos.
+
+    python -m tools.bench_search --videos 1000000 --repeat 500
+
+No database is needed. Titles and descriptions are drawn from a seeded
+vocabulary of Hangul and Latin words with power-law frequencies (a few
+words appear in many titles, like real ones), view counts are power-law
+too. Reports build time, snapshot size and load time (a restart), query
+latency for one- and two-word queries and autocomplete latency, plus the
+cost of ``upsert`` into the delta.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import search
+from tools.bench_routes import percentile
+from tools.datagen import zipf_weights
+
+HANGUL = [chr(c) for c in range(0xAC00, 0xD7A4, 7)]
+LATIN = "abcdefghijklmnopqrstuvwxyz"
+
+
+def vocabulary(rng, n):
+    out = []
+    for i in range(n):
+        if i % 4:
+            out.append("".join(rng.choice(HANGUL, rng.integers(2, 5))))
+        else:
+            out.append("".join(rng.choice(list(LATIN), rng.integers(3, 9))))
+    return out
+
+
+def synthetic_rows(n, vocab_size, seed):
+    rng = np.random.default_rng(seed)
+    vocab = vocabulary(rng, vocab_size)
+    cdf = np.cumsum(zipf_weights(vocab_size, 1.0, rng))
+    title_words = np.searchsorted(cdf, rng.random(n * 5), side="right").clip(0, vocab_size - 1)
+    desc_words = np.searchsorted(cdf, rng.random(n * 12), side="right").clip(0, vocab_size - 1)
+    views = (rng.pareto(1.2, n) * 100).astype(np.int64)
+    rows = []
+    for i in range(n):
+        t = title_words[i * 5:i * 5 + 2 + i % 4]
+        d = desc_words[i * 12:(i + 1) * 12]
+        rows.append((i + 1, " ".join(vocab[j] for j in t), " ".join(vocab[j] for j in d), int(views[i])))
+    return rows, vocab, cdf
+
+
+def timed(fn, args):
+    times = []
+    for a in args:
+        t = time.perf_counter()
+        fn(a)
+        times.append((time.perf_counter() - t) * 1000)
+    times.sort()
+    return f"p50 {percentile(times, 50):6.2f} ms  p95 {percentile(times, 95):6.2f} ms"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--videos", type=int, default=1_000_000)
+    ap.add_argument("--vocab", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    rows, vocab, cdf = synthetic_rows(args.videos, args.vocab, args.seed)
+    print(f"input: {args.videos:,} videos generated in {time.perf_counter() - t0:.1f}s")
+
+    t0 = time.perf_counter()
+    segment = search.build_segment(rows)
+    print(f"build: {time.perf_counter() - t0:.1f}s, {len(segment.terms):,} terms, {len(segment.docs):,} postings")
+
+    path = os.path.join(tempfile.mkdtemp(), "search_index.npz")
+    index = search.SearchIndex(path, refresh_after=float("inf"))
+    index.install(segment)
+    t0 = time.perf_counter()
+    index.save()
+    print(f"save: {time.perf_counter() - t0:.1f}s, {os.path.getsize(path) / 1e6:.0f} MB on disk")
+
+    index = search.SearchIndex(path, refresh_after=float("inf"))
+    t0 = time.perf_counter()
+    index.load()
+    print(f"load (restart): {time.perf_counter() - t0:.1f}s")
+
+    rng = np.random.default_rng(args.seed + 1)
+    # 검색어는 제목 단어와 같은 분포에서 — 흔한 단어일수록 자주, 후보도 많다
+    draw = lambda k: [vocab[j] for j in np.searchsorted(cdf, rng.random(k), side="right").clip(0, len(vocab) - 1)]
+    one = draw(args.repeat)
+    two = [f"{a} {b}" for a, b in zip(draw(args.repeat), draw(args.repeat))]
+    prefixes = [w[:1] if i % 2 else w[:2] for i, w in enumerate(draw(args.repeat))]
+
+    print(f"  search 1 word   {timed(lambda q: index.search(q), one)}")
+    print(f"  search 2 words  {timed(lambda q: index.search(q), two)}")
+    print(f"  autocomplete    {timed(lambda q: index.autocomplete(q), prefixes)}")
+
+    new = [(args.videos + i + 1, t, d, v) for i, (_, t, d, v) in enumerate(rows[:args.repeat])]
+    print(f"  upsert          {timed(lambda r: index.upsert(*r), new)}")
+    print(f"  search 1 word + delta  {timed(lambda q: index.search(q), one)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+"""Seeded synthetic data for the DB_TP schema.
+
+    python -m tools.datagen --scale small                 # ~1M rows, a minute or two
+    python -m tools.datagen --scale large --method load-data
+    python -m tools.datagen --scale medium --history 20000000 --reset
+
+Loads Users, Videos, Comments, VideoLikes, Subscriptions, WatchHistory, plus
+a few Movies / MoviePurchases / SupportTickets so every route has something
+to read. Popularity is power-law: a small share of creators own most videos,
+a small share of videos get most views, likes, comments and history rows,
+and a small share of users produce most of the activity.
+
+Runs are reproducible: the same ``--seed`` and counts produce the same rows
+(timestamps are relative to ``--anchor``, today by default). Ids are assigned
+explicitly, continuing after whatever is already in each table, so a run can
+be appended to an existing database. Tables keyed on pairs (likes,
+subscriptions, history) use ``INSERT IGNORE``; duplicates drawn by the
+generator are simply dropped, so the final counts land slightly below the
+requested ones.
+
+Rows go in as multi-row ``INSERT`` batches (``--method insert``, default) or
+through TSV chunks and ``LOAD DATA LOCAL INFILE`` (``--method load-data``,
+needs ``local_infile=ON`` on the server), which is several times faster at
+the 100M-row end. Denormalized counters (Videos.like_count / comment_count,
+Users.subscriber_count) are recomputed once at the end; the affinity
+profiles are not — run ``python affinity.py rebuild`` afterwards.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+import db
+
+# rows per table for each preset; any of them can be overridden by flag
+SCALES = {
+    "tiny": dict(users=1_000, videos=2_000, comments=10_000, likes=20_000, subscriptions=5_000, history=50_000, movies=200, purchases=1_000, tickets=500),
+    "small": dict(users=10_000, videos=20_000, comments=100_000, likes=200_000, subscriptions=50_000, history=500_000, movies=1_000, purchases=10_000, tickets=5_000),
+    "medium": dict(users=100_000, videos=100_000, comments=1_000_000, likes=2_000_000, subscriptions=500_000, history=5_000_000, movies=5_000, purchases=100_000, tickets=50_000),
+    "large": dict(users=1_000_000, videos=1_000_000, comments=10_000_000, likes=20_000_000, subscriptions=5_000_000, history=100_000_000, movies=20_000, purchases=1_000_000, tickets=200_000),
+}
+
+TABLES = ("users", "videos", "comments", "likes", "subscriptions", "history", "movies", "purchases", "tickets")
+
+# truncated child-first so foreign keys never point at a missing row
+RESET_ORDER = (
+    "Notifications", "NotificationCounters", "NotificationJobs", "VideoStatsRollup", "UserAffinity",
+    "WatchHistory", "VideoLikes", "CommentLikes", "Comments", "PlaylistItems", "OfflineVideo",
+    "Playlists", "Subscriptions", "BlockList", "ReportCounters", "Reports", "MoviePurchases", "Movies",
+    "SupportTickets", "Premium", "WatchTime", "Videos", "Users",
+)
+
+CHUNK = 50_000
+
+# VideoType: 1 video, 2 shorts, 3 live
+TYPE_SHARE = (0.6, 0.35, 0.05)
+TYPE_DURATION = {1: (60, 3600), 2: (5, 60), 3: (600, 14400)}
+VISIBILITY = np.array(["public", "unlisted", "private"], dtype=object)
+TICKET_TYPES = np.array(["bug", "feature", "account", "other"], dtype=object)
+TICKET_STATUSES = np.array(["open", "in_progress", "closed"], dtype=object)
+
+WORDS = np.array(
+    "vlog review tutorial live music game cooking travel daily news shorts funny cat dog "
+    "study coding react python mysql seoul tokyo street food workout asmr unboxing tips".split(),
+    dtype=object,
+)
+
+
+# ------------------------------------------------------------
+# sampling helpers
+# ------------------------------------------------------------
+def zipf_weights(n, a, rng):
+    """Power-law weights over ``n`` items, shuffled so rank is not id order."""
+    w = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** a
+    rng.shuffle(w)
+    return w / w.sum()
+
+
+class Sampler:
+    """Draw indices with fixed weights; O(log n) per draw via the CDF."""
+
+    def __init__(self, weights):
+        self.cdf = np.cumsum(weights)
+        self.cdf[-1] = 1.0
+
+    def draw(self, rng, k):
+        return np.searchsorted(self.cdf, rng.random(k), side="right")
+
+
+def timestamps(anchor, rng, k, max_days, skew=1.0):
+    """``k`` datetime64 values in the last ``max_days`` days, recent ones denser when skew > 1."""
+    age = ((rng.random(k) ** skew) * max_days * 86400).astype("timedelta64[s]")
+    return np.datetime64(anchor, "s") - age
+
+
+def fmt(ts):
+    """datetime64 array -> 'YYYY-MM-DD HH:MM:SS' strings, vectorized."""
+    return np.char.replace(np.datetime_as_string(ts, unit="s"), "T", " ").tolist()
+
+
+def titles(rng, k, words=3):
+    picks = WORDS[rng.integers(0, len(WORDS), size=(k, words))]
+    return [" ".join(row) for row in picks]
+
+
+# ------------------------------------------------------------
+# writers
+# ------------------------------------------------------------
+def _sql_value(v):
+    if v is None:
+        return "NULL"
+    if isinstance(v, (int, np.integer)):
+        return str(int(v))
+    if isinstance(v, (float, np.floating)):
+        return repr(float(v))
+    return "'" + str(v).replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def _tsv_value(v):
+    if v is None:
+        return "\\N"
+    if isinstance(v, (int, np.integer)):
+        return str(int(v))
+    return str(v).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+class Writer:
+    def __init__(self, conn, method, batch):
+        self.conn = conn
+        self.method = method
+        self.batch = batch
+        self.cur = conn.cursor()
+
+    def write(self, table, columns, rows, ignore=False):
+        """Insert ``rows`` (list of tuples); one commit per call."""
+        if not rows:
+            return
+        if self.method == "load-data":
+            self._load_data(table, columns, rows, ignore)
+        else:
+            head = f"INSERT {'IGNORE ' if ignore else ''}INTO {table} ({', '.join(columns)}) VALUES "
+            for i in range(0, len(rows), self.batch):
+                values = ",".join("(" + ",".join(_sql_value(v) for v in row) + ")" for row in rows[i:i + self.batch])
+                self.cur.execute(head + values)
+        self.conn.commit()
+
+    def _load_data(self, table, columns, rows, ignore):
+        fd, path = tempfile.mkstemp(suffix=".tsv")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+                for row in rows:
+                    f.write("\t".join(_tsv_value(v) for v in row))
+                    f.write("\n")
+            self.cur.execute(
+                f"LOAD DATA LOCAL INFILE '{path}' {'IGNORE' if ignore else ''} INTO TABLE {table} "
+                f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' "
+                f"({', '.join(columns)})"
+            )
+        finally:
+            os.remove(path)
+
+
+def connect(method):
+    if method != "load-data":
+        return db.connect_raw()[0]
+    # LOAD DATA LOCAL has to be allowed on the client side as well
+    try:
+        return db.mysql.connector.connect(allow_local_infile=True, **db.DB_CONFIG)
+    except db.mysql_errors.NotSupportedError:
+        if db.pymysql is None:
+            raise
+        cfg = {k: v for k, v in db.DB_CONFIG.items() if k != "database"}
+        return db.pymysql.connect(local_infile=True, db=db.DB_CONFIG["database"], **cfg)
+
+
+def existing_tables(cur):
+    """Lower-cased names of the tables in the current database."""
+    cur.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE()")
+    return {(row[0] if isinstance(row, (tuple, list)) else next(iter(row.values()))).lower() for row in cur.fetchall()}
+
+
+def next_id(cur, table, column):
+    cur.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")
+    row = cur.fetchone()
+    return int(row[0] if isinstance(row, (tuple, list)) else next(iter(row.values()))) + 1
+
+
+# ------------------------------------------------------------
+# generators — each yields lists of row tuples, CHUNK at a time
+# ------------------------------------------------------------
+def gen_users(rng, first, n, anchor):
+    for start in range(0, n, CHUNK):
+        k = min(CHUNK, n - start)
+        ids = np.arange(first + start, first + start + k)
+        joined = fmt(timestamps(anchor, rng, k, 5 * 365))
+        yield [
+            (int(uid), f"user{uid}", f"@user{uid}", f"user{uid}@example.com", f"https://cdn.example.com/u/{uid}.png", joined[i])
+            for i, uid in enumerate(ids)
+        ]
+
+
+def gen_videos(rng, first, n, user_ids, creators, view_weights, anchor):
+    types = rng.choice([1, 2, 3], size=n, p=TYPE_SHARE)
+    # 조회수: 가중치에 비례 + 노이즈, 상위 영상은 수백만 단위
+    views = (view_weights * n * 2000 * rng.lognormal(0, 0.5, n)).astype(np.int64)
+    for start in range(0, n, CHUNK):
+        k = min(CHUNK, n - start)
+        owner = user_ids[creators.draw(rng, k)]
+        vis = VISIBILITY[rng.choice(3, size=k, p=(0.92, 0.05, 0.03))]
+        uploaded = fmt(timestamps(anchor, rng, k, 2 * 365, skew=1.5))
+        names = titles(rng, k)
+        rows = []
+        for i in range(k):
+            vid = first + start + i
+            t = int(types[start + i])
+            lo, hi = TYPE_DURATION[t]
+            rows.append((
+                vid, int(owner[i]), t, f"{names[i]} #{vid}", f"lorem ipsum {vid}",
+                f"https://cdn.example.com/v/{vid}.mp4", f"https://cdn.example.com/t/{vid}.jpg",
+                int(rng.integers(lo, hi)), vis[i], int(views[start + i]), uploaded[i],
+            ))
+        yield rows
+
+
+def gen_comments(rng, first, n, user_ids, users, video_ids, videos, anchor):
+    for start in range(0, n, CHUNK):
+        k = min(CHUNK, n - start)
+        vid = np.sort(video_ids[videos.draw(rng, k)])
+        uid = user_ids[users.draw(rng, k)]
+        created = fmt(np.sort(timestamps(anchor, rng, k, 365, skew=1.5)))
+        reply = rng.random(k) < 0.2
+        likes = rng.zipf(2.0, k) - 1
+        names = titles(rng, k, words=6)
+        rows = []
+        for i in range(k):
+            cid = first + start + i
+            # 같은 영상의 직전 댓글에 대한 답글 (정렬되어 있어 바로 앞 행)
+            parent = cid - 1 if reply[i] and i > 0 and vid[i - 1] == vid[i] else None
+            rows.append((cid, int(vid[i]), int(uid[i]), names[i], parent, int(min(likes[i], 100_000)), created[i]))
+        yield rows
+
+
+def gen_pairs(rng, n, left_ids, left, right_ids, right):
+    """Random (left, right) id pairs; drawn duplicates are dropped by the writer."""
+    for start in range(0, n, CHUNK):
+        k = min(CHUNK, n - start)
+        yield left_ids[left.draw(rng, k)], right_ids[right.draw(rng, k)], k
+
+
+def gen_likes(rng, n, user_ids, users, video_ids, videos, anchor):
+    for a, b, k in gen_pairs(rng, n, user_ids, users, video_ids, videos):
+        dislike = rng.random(k) < 0.05
+        created = fmt(timestamps(anchor, rng, k, 365, skew=1.5))
+        yield [(int(a[i]), int(b[i]), bool(dislike[i]), created[i]) for i in range(k)]
+
+
+def gen_subscriptions(rng, n, user_ids, users, creator_ids, creators, anchor):
+    for a, b, k in gen_pairs(rng, n, user_ids, users, creator_ids, creators):
+        created = fmt(timestamps(anchor, rng, k, 3 * 365))
+        yield [(int(a[i]), int(b[i]), True, created[i]) for i in range(k) if a[i] != b[i]]
+
+
+def gen_history(rng, n, user_ids, users, video_ids, videos, durations, anchor):
+    for a, b, k in gen_pairs(rng, n, user_ids, users, video_ids, videos):
+        dur = durations[b - video_ids[0]]
+        position = (rng.random(k) * dur).astype(np.int64)
+        finished = rng.random(k) < 0.3
+        watched = fmt(timestamps(anchor, rng, k, 90, skew=2.0))
+        yield [
+            (int(a[i]), int(b[i]), int(dur[i] if finished[i] else position[i]), bool(finished[i]), watched[i])
+            for i in range(k)
+        ]
+
+
+def gen_movies(rng, first, n):
+    names = titles(rng, n, words=2)
+    price = np.round(rng.uniform(1000, 20000, n), -2)
+    return [
+        (first + i, names[i].title(), f"synopsis {first + i}", None if rng.random() < 0.02 else float(price[i]),
+         int(rng.integers(60, 200)), int(rng.integers(1950, 2026)), f"https://cdn.example.com/m/{first + i}.jpg")
+        for i in range(n)
+    ]
+
+
+def gen_purchases(rng, n, user_ids, users, movie_ids, anchor):
+    for start in range(0, n, CHUNK):
+        k = min(CHUNK, n - start)
+        uid = user_ids[users.draw(rng, k)]
+        mid = movie_ids[rng.integers(0, len(movie_ids), k)]
+        rent = rng.random(k) < 0.6
+        created = timestamps(anchor, rng, k, 365)
+        expires = fmt(created + np.timedelta64(2, "D"))
+        created = fmt(created)
+        yield [
+            (int(uid[i]), int(mid[i]), "rent" if rent[i] else "buy", 1200.0 if rent[i] else 9900.0,
+             expires[i] if rent[i] else None, created[i])
+            for i in range(k)
+        ]
+
+
+def gen_tickets(rng, n, user_ids, users, anchor):
+    for start in range(0, n, CHUNK):
+        k = min(CHUNK, n - start)
+        uid = user_ids[users.draw(rng, k)]
+        kind = TICKET_TYPES[rng.integers(0, 4, k)]
+        status = TICKET_STATUSES[rng.choice(3, size=k, p=(0.3, 0.2, 0.5))]
+        created = fmt(timestamps(anchor, rng, k, 180))
+        yield [(int(uid[i]), kind[i], f"{kind[i]} report", "details", status[i], created[i]) for i in range(k)]
+
+
+# ------------------------------------------------------------
+# driver
+# ------------------------------------------------------------
+def load(table, columns, chunks, writer, ignore=False):
+    started = time.perf_counter()
+    total = 0
+    for rows in chunks:
+        writer.write(table, columns, rows, ignore=ignore)
+        total += len(rows)
+        elapsed = time.perf_counter() - started
+        print(f"\r  {table:<15} {total:>12,} rows  {total / max(elapsed, 1e-9):>10,.0f} rows/s", end="", flush=True)
+    print(f"\r  {table:<15} {total:>12,} rows in {time.perf_counter() - started:.1f}s" + " " * 16)
+
+
+def recount(cur, conn):
+    print("  recomputing denormalized counters")
+    cur.execute("""
+        UPDATE Videos v
+        LEFT JOIN (SELECT video_id, COUNT(*) AS n FROM VideoLikes WHERE is_dislike = 0 GROUP BY video_id) l
+               ON l.video_id = v.video_id
+        LEFT JOIN (SELECT video_id, COUNT(*) AS n FROM Comments GROUP BY video_id) c
+               ON c.video_id = v.video_id
+        SET v.like_count = COALESCE(l.n, 0), v.comment_count = COALESCE(c.n, 0)
+    """)
+    cur.execute("""
+        UPDATE Users u
+        LEFT JOIN (SELECT channel_id, COUNT(*) AS n FROM Subscriptions GROUP BY channel_id) s
+               ON s.channel_id = u.user_id
+        SET u.subscriber_count = COALESCE(s.n, 0)
+    """)
+    conn.commit()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--scale", choices=SCALES, default="small")
+    for name in TABLES:
+        ap.add_argument(f"--{name}", type=int, help=f"row count override for {name}")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--anchor", type=datetime.fromisoformat, default=None,
+                    help="newest timestamp (ISO date/time, default: now rounded to the hour)")
+    ap.add_argument("--method", choices=("insert", "load-data"), default="insert")
+    ap.add_argument("--batch", type=int, default=2000, help="rows per multi-row INSERT statement")
+    ap.add_argument("--reset", action="store_true", help="TRUNCATE the generated tables first")
+    args = ap.parse_args()
+
+    counts = dict(SCALES[args.scale])
+    counts.update({name: getattr(args, name) for name in TABLES if getattr(args, name) is not None})
+    anchor = args.anchor or datetime.now().replace(minute=0, second=0, microsecond=0)
+    # 테이블마다 독립 스트림 — 한 테이블 개수를 바꿔도 다른 테이블 데이터는 그대로
+    streams = dict(zip(TABLES + ("weights",), (np.random.default_rng(s) for s in np.random.SeedSequence(args.seed).spawn(len(TABLES) + 1))))
+
+    conn = connect(args.method)
+    cur = conn.cursor()
+    # 생성 데이터는 참조 무결성이 보장되므로 적재 중에는 FK 검사 생략
+    cur.execute("SET SESSION foreign_key_checks = 0")
+    if args.reset:
+        # 마이그레이션 전(DB_TP.sql 만 적용된) 스키마에는 없는 테이블이 있다
+        existing = existing_tables(cur)
+        for table in RESET_ORDER:
+            if table.lower() in existing:
+                cur.execute(f"TRUNCATE TABLE {table}")
+        cur.execute("UPDATE SupportTicketCounts SET ticket_count = 0")
+        conn.commit()
+
+    first_user = next_id(cur, "Users", "user_id")
+    first_video = next_id(cur, "Videos", "video_id")
+    first_comment = next_id(cur, "Comments", "comment_id")
+    first_movie = next_id(cur, "Movies", "movie_id")
+
+    n_users, n_videos = counts["users"], counts["videos"]
+    w = streams["weights"]
+    user_ids = np.arange(first_user, first_user + n_users)
+    video_ids = np.arange(first_video, first_video + n_videos)
+    n_creators = max(1, n_users // 10)
+    creator_ids = user_ids[w.permutation(n_users)[:n_creators]]
+
+    activity = Sampler(zipf_weights(n_users, 1.0, w))        # 소수 사용자가 대부분의 활동
+    creators = Sampler(zipf_weights(n_creators, 1.1, w))     # 소수 채널이 대부분의 영상/구독
+    view_weights = zipf_weights(n_videos, 1.0, w)
+    popularity = Sampler(view_weights)                       # 소수 영상이 대부분의 조회/좋아요/댓글
+
+    print(f"generating scale={args.scale} seed={args.seed} method={args.method} anchor={anchor}")
+    writer = Writer(conn, args.method, args.batch)
+    started = time.perf_counter()
+
+    load("Users", ("user_id", "username", "handle", "email", "profile_img", "join_date"),
+         gen_users(streams["users"], first_user, n_users, anchor), writer)
+
+    durations = np.empty(n_videos, dtype=np.int64)
+
+    def videos_with_durations():
+        for rows in gen_videos(streams["videos"], first_video, n_videos, creator_ids, creators, view_weights, anchor):
+            for row in rows:
+                durations[row[0] - first_video] = row[7]
+            yield rows
+
+    load("Videos", ("video_id", "user_id", "type_id", "title", "description", "video_url", "thumbnail_url",
+                    "duration", "visibility", "view_count", "upload_date"),
+         videos_with_durations(), writer)
+    load("Comments", ("comment_id", "video_id", "user_id", "content", "parent_id", "like_count", "created_at"),
+         gen_comments(streams["comments"], first_comment, counts["comments"], user_ids, activity, video_ids, popularity, anchor), writer)
+    load("VideoLikes", ("user_id", "video_id", "is_dislike", "created_at"),
+         gen_likes(streams["likes"], counts["likes"], user_ids, activity, video_ids, popularity, anchor), writer, ignore=True)
+    load("Subscriptions", ("subscriber_id", "channel_id", "alert_enabled", "created_at"),
+         gen_subscriptions(streams["subscriptions"], counts["subscriptions"], user_ids, activity, creator_ids, creators, anchor), writer, ignore=True)
+    load("WatchHistory", ("user_id", "video_id", "last_position", "is_finished", "watched_at"),
+         gen_history(streams["history"], counts["history"], user_ids, activity, video_ids, popularity, durations, anchor), writer, ignore=True)
+
+    if counts["movies"]:
+        load("Movies", ("movie_id", "title", "description", "price", "duration", "release_year", "thumbnail_url"),
+             iter([gen_movies(streams["movies"], first_movie, counts["movies"])]), writer)
+        load("MoviePurchases", ("user_id", "movie_id", "type", "price_paid", "expired_at", "created_at"),
+             gen_purchases(streams["purchases"], counts["purchases"], user_ids, activity,
+                           np.arange(first_movie, first_movie + counts["movies"]), anchor), writer)
+    load("SupportTickets", ("user_id", "type", "subject", "message", "status", "created_at"),
+         gen_tickets(streams["tickets"], counts["tickets"], user_ids, activity, anchor), writer)
+
+    recount(cur, conn)
+    cur.execute("SET SESSION foreign_key_checks = 1")
+    cur.close()
+    conn.close()
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
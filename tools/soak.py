@@ -0,0 +1,320 @@
+"""Mixed read/write soak test: many concurrent workers for a fixed duration.
+
+    python -m tools.soak --workers 32 --duration 120 --out bench/soak.json
+    python -m tools.soak --workers 32 --duration 120 --compare bench/soak.json
+    python -m tools.soak --mix home_time=8,like_short=4,comment_short=2 --workers 64
+
+Each worker thread loops over a weighted random mix of routes (the weights
+in ``tools.workload.ROUTES`` unless ``--mix`` overrides them), sending
+requests through its own Flask test client against the configured MySQL.
+Run it with more workers than ``DB_POOL_SIZE`` to see pool saturation.
+
+Reported per route: throughput, p50/p95/p99, errors, and how many of those
+were deadlocks (MySQL 1213), lock wait timeouts (1205) or pool checkout
+timeouts. Every ``--interval`` seconds a sampler records throughput, the
+pool's in-use / waiting counts and the server's ``Threads_connected`` /
+``Threads_running`` / ``Innodb_row_lock_waits``, so saturation shows up as
+a timeline instead of a single average. ``--compare`` diffs against an
+earlier report and exits non-zero on a throughput drop or a p99 / error
+rate regression beyond ``--threshold``.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+import db
+from app import create_app
+from tools.bench_routes import git_commit, percentile
+from tools.workload import ROUTES, ROUTES_BY_NAME, IdPool, send
+
+DEADLOCK = 1213
+LOCK_WAIT_TIMEOUT = 1205
+_ERRNO = re.compile(r"\b(1213|1205)\b")
+
+
+class RouteStats:
+    __slots__ = ("latencies", "errors", "deadlocks", "lock_timeouts", "pool_timeouts")
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.deadlocks = 0
+        self.lock_timeouts = 0
+        self.pool_timeouts = 0
+
+    def merge(self, other):
+        self.latencies += other.latencies
+        for name in ("errors", "deadlocks", "lock_timeouts", "pool_timeouts"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+def classify(stats, error_text=None, errno=None, pool_timeout=False):
+    stats.errors += 1
+    if pool_timeout:
+        stats.pool_timeouts += 1
+        return
+    if errno is None and error_text:
+        m = _ERRNO.search(error_text)
+        errno = int(m.group(1)) if m else None
+    if errno == DEADLOCK:
+        stats.deadlocks += 1
+    elif errno == LOCK_WAIT_TIMEOUT:
+        stats.lock_timeouts += 1
+
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES_BY_NAME:
+            raise SystemExit(f"unknown route in --mix: {name}")
+        weights[name] = float(weight or 1)
+    return [(ROUTES_BY_NAME[n], w) for n, w in weights.items() if w > 0]
+
+
+class Soak:
+    def __init__(self, app, ids, mix, workers, duration, interval, seed):
+        self.app = app
+        self.ids = ids
+        self.specs = [spec for spec, _ in mix]
+        self.weights = [w for _, w in mix]
+        self.workers = workers
+        self.duration = duration
+        self.interval = interval
+        self.seed = seed
+        self.stop_at = None
+        self.done = 0  # 전체 완료 요청 수 (sampler가 구간 처리량 계산에 사용)
+        self._done_lock = threading.Lock()
+        self.results = []  # one {route: RouteStats} per worker
+        self.timeline = []
+
+    def _worker(self, n):
+        rng = random.Random(self.seed + n)
+        client = self.app.test_client()
+        local = {spec.name: RouteStats() for spec in self.specs}
+        self.results.append(local)
+        while time.monotonic() < self.stop_at:
+            spec = rng.choices(self.specs, self.weights)[0]
+            stats = local[spec.name]
+            started = time.perf_counter()
+            try:
+                resp = send(client, spec, self.ids)
+            except db.PoolTimeout:
+                classify(stats, pool_timeout=True)
+            except Exception as e:
+                errno = getattr(e, "errno", None) or (e.args[0] if e.args and isinstance(e.args[0], int) else None)
+                classify(stats, str(e), errno)
+            else:
+                if resp.status_code >= 500:
+                    classify(stats, resp.get_data(as_text=True)[:500])
+            stats.latencies.append((time.perf_counter() - started) * 1000)
+            with self._done_lock:
+                self.done += 1
+
+    def _sample_server(self, cur):
+        cur.execute(
+            "SHOW GLOBAL STATUS WHERE Variable_name IN "
+            "('Threads_connected', 'Threads_running', 'Innodb_row_lock_waits')"
+        )
+        out = {}
+        for row in cur.fetchall():
+            name, value = row if isinstance(row, (tuple, list)) else (row["Variable_name"], row["Value"])
+            out[name] = int(value)
+        return out
+
+    def _sampler(self):
+        try:
+            conn, _ = db.connect_raw()
+            cur = conn.cursor()
+        except Exception:
+            conn = cur = None
+        started = time.monotonic()
+        last_done, last_t, last_waits = 0, started, None
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            pool = db.pool_stats()
+            point = {
+                "t": round(now - started, 1),
+                "rps": round((self.done - last_done) / (now - last_t), 1),
+                "pool_in_use": pool["in_use"],
+                "pool_waiting": pool["waiting"],
+            }
+            last_done, last_t = self.done, now
+            if cur is not None:
+                try:
+                    status = self._sample_server(cur)
+                    point["threads_connected"] = status.get("Threads_connected")
+                    point["threads_running"] = status.get("Threads_running")
+                    waits = status.get("Innodb_row_lock_waits")
+                    if waits is not None and last_waits is not None:
+                        point["row_lock_waits"] = waits - last_waits
+                    last_waits = waits
+                except Exception:
+                    pass
+            self.timeline.append(point)
+            print(f"  t={point['t']:>6}s rps={point['rps']:>8} pool in_use={point['pool_in_use']:>3} "
+                  f"waiting={point['pool_waiting']:>3} threads_running={point.get('threads_running', '-')}",
+                  flush=True)
+            if now >= self.stop_at:
+                break
+        if conn is not None:
+            conn.close()
+
+    def run(self):
+        self.stop_at = time.monotonic() + self.duration
+        threads = [threading.Thread(target=self._worker, args=(n,), name=f"soak-{n}", daemon=True)
+                   for n in range(self.workers)]
+        sampler = threading.Thread(target=self._sampler, name="soak-sampler", daemon=True)
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        sampler.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+        sampler.join(self.interval * 2)
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        merged = {spec.name: RouteStats() for spec in self.specs}
+        for local in self.results:
+            for name, stats in local.items():
+                merged[name].merge(stats)
+
+        routes, total, errors = {}, 0, 0
+        for name, stats in merged.items():
+            lat = sorted(stats.latencies)
+            total += len(lat)
+            errors += stats.errors
+            routes[name] = {
+                "requests": len(lat),
+                "rps": round(len(lat) / elapsed, 2),
+                "p50_ms": round(percentile(lat, 50), 3) if lat else None,
+                "p95_ms": round(percentile(lat, 95), 3) if lat else None,
+                "p99_ms": round(percentile(lat, 99), 3) if lat else None,
+                "max_ms": round(lat[-1], 3) if lat else None,
+                "errors": stats.errors,
+                "deadlocks": stats.deadlocks,
+                "lock_timeouts": stats.lock_timeouts,
+                "pool_timeouts": stats.pool_timeouts,
+            }
+
+        size = db.pool_stats()["size"]
+        in_use = [p["pool_in_use"] for p in self.timeline]
+        return {
+            "summary": {
+                "duration_s": round(elapsed, 1),
+                "requests": total,
+                "rps": round(total / elapsed, 1),
+                "errors": errors,
+                "error_rate": round(errors / total, 4) if total else 0.0,
+                "deadlocks": sum(r["deadlocks"] for r in routes.values()),
+                "lock_timeouts": sum(r["lock_timeouts"] for r in routes.values()),
+                "pool_timeouts": sum(r["pool_timeouts"] for r in routes.values()),
+                "pool_size": size,
+                "pool_peak_in_use": max(in_use, default=0),
+                "pool_peak_waiting": max((p["pool_waiting"] for p in self.timeline), default=0),
+                # 샘플 중 풀이 꽉 찬 비율
+                "pool_saturated_share": round(sum(1 for n in in_use if n >= size) / len(in_use), 3) if in_use else 0.0,
+                "peak_threads_running": max((p.get("threads_running") or 0 for p in self.timeline), default=0),
+            },
+            "routes": routes,
+            "timeline": self.timeline,
+        }
+
+
+def compare(report, baseline, threshold):
+    """Print the diff; return a list of regression descriptions."""
+    problems = []
+    now, base = report["summary"], baseline["summary"]
+    print(f"\nthroughput {base['rps']} → {now['rps']} rps, error rate {base['error_rate']:.2%} → {now['error_rate']:.2%}, "
+          f"deadlocks {base['deadlocks']} → {now['deadlocks']}, pool saturated {base['pool_saturated_share']:.0%} → {now['pool_saturated_share']:.0%}")
+    if base["rps"] and (base["rps"] - now["rps"]) / base["rps"] > threshold:
+        problems.append(f"throughput dropped {1 - now['rps'] / base['rps']:.0%}")
+    if now["error_rate"] > base["error_rate"] + 0.01:
+        problems.append(f"error rate up {now['error_rate'] - base['error_rate']:+.2%}")
+
+    print(f"{'route':<22} {'p99 base':>9} {'p99 now':>9} {'Δp99':>8} {'errors':>13}")
+    for name, r in report["routes"].items():
+        b = baseline["routes"].get(name)
+        if not b or not b.get("p99_ms") or r.get("p99_ms") is None:
+            continue
+        change = (r["p99_ms"] - b["p99_ms"]) / b["p99_ms"]
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSED"
+            problems.append(f"{name} p99 {change:+.0%}")
+        print(f"{name:<22} {b['p99_ms']:>9.2f} {r['p99_ms']:>9.2f} {change:>+8.0%} {str(b['errors']) + '→' + str(r['errors']):>13}{flag}")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=60.0, help="seconds")
+    ap.add_argument("--interval", type=float, default=2.0, help="timeline sampling interval (seconds)")
+    ap.add_argument("--mix", help="route=weight,... (default: weights from tools.workload)")
+    ap.add_argument("--reads-only", action="store_true")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", help="write the JSON report here")
+    ap.add_argument("--compare", help="earlier soak report to diff against")
+    ap.add_argument("--threshold", type=float, default=0.2)
+    args = ap.parse_args()
+
+    if args.mix:
+        mix = parse_mix(args.mix)
+    else:
+        mix = [(r, r.weight) for r in ROUTES if not (args.reads_only and r.write)]
+
+    app = create_app()
+    # 예외를 워커까지 올려서 PoolTimeout / 데드락을 종류별로 집계
+    app.testing = True
+    ids = IdPool.load(seed=args.seed)
+
+    print(f"soak: {args.workers} workers, {args.duration:.0f}s, {len(mix)} routes, pool size {db.pool_stats()['size']}")
+    report = Soak(app, ids, mix, args.workers, args.duration, args.interval, args.seed).run()
+    report["meta"] = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "workers": args.workers,
+        "duration": args.duration,
+        "seed": args.seed,
+        "mix": {spec.name: w for spec, w in mix},
+    }
+
+    s = report["summary"]
+    print(f"\n{s['requests']} requests, {s['rps']} rps, {s['errors']} errors "
+          f"({s['deadlocks']} deadlocks, {s['lock_timeouts']} lock timeouts, {s['pool_timeouts']} pool timeouts), "
+          f"pool peak {s['pool_peak_in_use']}/{s['pool_size']} in use, {s['pool_peak_waiting']} waiting")
+    print(f"{'route':<22} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7} {'deadlk':>7}")
+    for name, r in sorted(report["routes"].items(), key=lambda kv: -(kv[1]["p99_ms"] or 0)):
+        if not r["requests"]:
+            continue
+        print(f"{name:<22} {r['rps']:>8.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['errors']:>7} {r['deadlocks']:>7}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nreport written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.threshold)
+        if problems:
+            print("\nregressions: " + "; ".join(problems))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
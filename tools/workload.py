@@ -0,0 +1,185 @@
+"""Route specs shared by the benchmark and soak tools.
+
+Each ``RouteSpec`` knows how to build one request (path, query string and
+JSON body) from an ``IdPool``, a sample of ids drawn from the database the
+app is pointed at. Ids are sampled once up front so the timed loop never
+touches the DB itself.
+"""
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+from db import connect_raw
+
+
+class IdPool:
+    """Ids to drive the routes with, sampled from the current database.
+
+    Half the user picks come from the most recent watch history rows, which
+    draws users in proportion to their activity, so history-backed routes
+    see realistic result sizes instead of mostly empty accounts.
+    """
+
+    def __init__(self, users, active_users, videos, shorts, movies, channels=None, sample=2000, seed=42):
+        self.users = users
+        self.active_users = active_users or users
+        self.channels = channels or users
+        self.videos = videos
+        self.shorts = shorts or videos
+        self.movies = movies
+        self.sample = sample
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def load(cls, sample=2000, seed=42):
+        conn, _ = connect_raw()
+        cur = conn.cursor()
+        try:
+            def ids(sql):
+                cur.execute(sql, (sample,))
+                return [row[0] if isinstance(row, (tuple, list)) else next(iter(row.values())) for row in cur.fetchall()]
+
+            pool = cls(
+                users=ids("SELECT user_id FROM Users ORDER BY RAND() LIMIT %s"),
+                active_users=ids("SELECT user_id FROM WatchHistory ORDER BY history_id DESC LIMIT %s"),
+                videos=ids("SELECT video_id FROM Videos WHERE visibility = 'public' ORDER BY RAND() LIMIT %s"),
+                shorts=ids("SELECT video_id FROM Videos WHERE type_id = 2 ORDER BY RAND() LIMIT %s"),
+                movies=ids("SELECT movie_id FROM Movies ORDER BY RAND() LIMIT %s"),
+                # 업로드한 사용자 (영상 수에 비례) — 구독 대상
+                channels=ids("SELECT user_id FROM Videos WHERE visibility = 'public' ORDER BY RAND() LIMIT %s"),
+                sample=sample,
+                seed=seed,
+            )
+        finally:
+            cur.close()
+            conn.close()
+        if not pool.users or not pool.videos:
+            raise RuntimeError("database has no users/videos - run `python -m tools.datagen` first")
+        return pool
+
+    def user(self):
+        # 절반은 최근 시청 기록에서 (활동량에 비례)
+        pick = self.active_users if self.rng.random() < 0.5 else self.users
+        return self.rng.choice(pick)
+
+    def channel(self, exclude=None):
+        # 자기 자신은 구독 대상이 아니다 — 채널이 하나뿐이면 그대로
+        for _ in range(8):
+            channel_id = self.rng.choice(self.channels)
+            if channel_id != exclude:
+                return channel_id
+        return channel_id
+
+    def video(self):
+        return self.rng.choice(self.videos)
+
+    def short(self):
+        return self.rng.choice(self.shorts)
+
+    def movie(self):
+        return self.rng.choice(self.movies) if self.movies else 1
+
+
+@dataclass(frozen=True)
+class RouteSpec:
+    name: str
+    method: str
+    build: Callable  # IdPool -> (path, query dict, json body or None)
+    weight: float = 1.0  # share of traffic in the soak mix
+    write: bool = False
+
+
+def _get(name, build, weight=1.0):
+    return RouteSpec(name, "GET", lambda ids: (*build(ids), None), weight)
+
+
+def _subscription(ids):
+    user_id = ids.user()
+    return f"/subscriptions/{user_id}/channel/{ids.channel(exclude=user_id)}", {}, None
+
+
+ROUTES = [
+    # home
+    _get("home_time", lambda ids: ("/time", {}), weight=8),
+    _get("home_time_trending", lambda ids: ("/time", {"order": "trending"}), weight=2),
+    _get("recent_watch", lambda ids: ("/watch/recent", {"user_id": ids.user()}), weight=4),
+    _get("ads_recommend", lambda ids: ("/ads/recommend", {"user_id": ids.user()}), weight=3),
+    _get("top_creators", lambda ids: ("/creators/top", {"user_id": ids.user()}), weight=3),
+    _get("post_random", lambda ids: ("/post/random", {}), weight=2),
+    _get("shorts_random", lambda ids: ("/shorts/random", {}), weight=2),
+    _get("home_full", lambda ids: ("/full", {"user_id": ids.user()}), weight=1),
+    # subscriptions
+    _get("subs_header", lambda ids: (f"/subscriptions/{ids.user()}/header", {}), weight=2),
+    _get("get_feed", lambda ids: (f"/subscriptions/{ids.user()}/feed", {}), weight=6),
+    _get("get_feed_unwatched", lambda ids: (f"/subscriptions/{ids.user()}/feed", {"filter": "unwatched"}), weight=1),
+    _get("get_subscriptions", lambda ids: (f"/subscriptions/{ids.user()}/subscriptions", {"limit": 20}), weight=2),
+    # shorts
+    _get("shorts_list", lambda ids: ("/shorts/list", {"user_id": ids.user(), "limit": 20}), weight=6),
+    _get("shorts_list_trending", lambda ids: ("/shorts/list", {"user_id": ids.user(), "limit": 20, "order": "trending"}), weight=2),
+    _get("shorts_detail", lambda ids: (f"/shorts/detail/{ids.short()}", {"user_id": ids.user()}), weight=6),
+    _get("shorts_mix", lambda ids: ("/shorts/mix", {"shorts_id": ids.short(), "user_id": ids.user()}), weight=3),
+    _get("shorts_comments", lambda ids: (f"/shorts/comments/{ids.short()}", {}), weight=4),
+    _get("likes_info", lambda ids: (f"/shorts/likes/{ids.short()}", {"user_id": ids.user()}), weight=4),
+    # mypage
+    _get("yt_profile", lambda ids: (f"/yt_profile/{ids.user()}", {}), weight=2),
+    _get("yt_history", lambda ids: ("/yt_history", {"user_id": ids.user()}), weight=3),
+    _get("yt_playlists", lambda ids: (f"/yt_playlists/{ids.user()}", {}), weight=1),
+    _get("yt_myvideos", lambda ids: ("/yt_myvideos", {"user_id": ids.user()}), weight=1),
+    _get("yt_movies", lambda ids: (f"/yt_movies/{ids.user()}", {}), weight=1),
+    _get("yt_dashboard", lambda ids: (f"/yt_dashboard/{ids.user()}", {}), weight=1),
+    _get("notifications", lambda ids: (f"/notifications/{ids.user()}", {"limit": 20}), weight=2),
+    # movies / support
+    _get("movie_playable", lambda ids: (f"/movies/{ids.movie()}/playable", {"user_id": ids.user()}), weight=2),
+    _get("movie_catalog", lambda ids: ("/movies/catalog", {"sort": "newest", "limit": 20}), weight=1),
+    _get("support_queue", lambda ids: ("/support/queue", {"status": "open", "limit": 50}), weight=0.5),
+    # writes
+    RouteSpec("like_short", "POST", lambda ids: (f"/shorts/likes/{ids.short()}", {}, {"user_id": ids.user(), "type": "like"}), weight=3, write=True),
+    RouteSpec("unlike_short", "DELETE", lambda ids: (f"/shorts/likes/{ids.short()}", {"user_id": ids.user()}, None), weight=1, write=True),
+    RouteSpec("comment_short", "POST", lambda ids: ("/shorts/comments", {}, {"shorts_id": ids.short(), "user_id": ids.user(), "content": "bench comment"}), weight=2, write=True),
+    RouteSpec("watch", "POST", lambda ids: ("/watch", {}, {"user_id": ids.user(), "video_id": ids.video(), "position": 30}), weight=3, write=True),
+    RouteSpec("subscribe", "POST", _subscription, weight=1, write=True),
+    RouteSpec("publish_video", "POST", lambda ids: ("/videos", {}, {"user_id": ids.user(), "title": "bench video", "video_url": "https://example.com/bench.mp4"}), weight=0.2, write=True),
+    RouteSpec("unsubscribe", "DELETE", _subscription, weight=1, write=True),
+]
+
+ROUTES_BY_NAME = {r.name: r for r in ROUTES}
+
+
+def select(names=None, writes=False):
+    """Route specs by name (comma list or iterable); all reads by default."""
+    if names:
+        if isinstance(names, str):
+            names = [n.strip() for n in names.split(",") if n.strip()]
+        unknown = [n for n in names if n not in ROUTES_BY_NAME]
+        if unknown:
+            raise SystemExit(f"unknown routes: {', '.join(unknown)} (known: {', '.join(ROUTES_BY_NAME)})")
+        return [ROUTES_BY_NAME[n] for n in names]
+    return [r for r in ROUTES if writes or not r.write]
+
+
+def send(client, spec, ids):
+    """Issue one request for ``spec`` through a Flask test client."""
+    path, query, body = spec.build(ids)
+    return client.open(path, method=spec.method, query_string=query, json=body)
+
+
+def parse_server_timing(header):
+    """``db;dur=12.41;desc="7 queries", ...`` -> {"db": (12.41, "7 queries"), ...}"""
+    out = {}
+    if not header:
+        return out
+    for part in header.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        name, dur, desc = fields[0], None, None
+        for f in fields[1:]:
+            if f.startswith("dur="):
+                dur = float(f[4:])
+            elif f.startswith("desc="):
+                desc = f[5:].strip('"')
+        out[name] = (dur, desc)
+    return out
+
+
+def query_count(timing):
+    desc = timing.get("db", (None, None))[1]
+    return int(desc.split()[0]) if desc else None
@@ -0,0 +1,245 @@
+# trending.py
+"""Time-decayed trending score (``Videos.trend_score``).
+
+The trending value of a video is the sum of its interaction weights
+(``VIEW_WEIGHT`` per watch, ``LIKE_WEIGHT`` per new like), each decayed
+with a ``HALF_LIFE_HOURS`` half-life. Every video decays at the same rate,
+so instead of the decayed sum itself the column stores it in log space
+relative to a fixed ``EPOCH``::
+
+    trend_score = ln( Σ weight · exp((t_event - EPOCH) / τ) ),  τ = half-life / ln 2
+
+An event only adds a term: ``score = logaddexp(score, ln w + (t - EPOCH) / τ)``
+— no rewrite of idle rows, and the stored order is the current ranking
+at any time.
+
+Requests do not touch ``Videos``: ``record_view`` / ``record_like`` are
+called after the request's commit and only fold the term into an
+in-process buffer (terms of the same video combine with the same
+logaddexp). A background thread, started with the first request each
+process serves, writes the buffer every
+``FLUSH_INTERVAL`` seconds, one ``UPDATE`` per video in id order, so a
+hot video's row is locked once per flush instead of once per view and
+never while a request holds other locks. Terms not yet flushed when a
+process dies are lost; ``rebuild`` recomputes from the source tables. ``idx_type_trend
+(type_id, trend_score)`` serves "top N of a type" as a backward index
+scan. Videos without any event have ``NULL`` (last in ``DESC`` order).
+
+Unlikes do not subtract: the like happened and its weight decays away.
+
+Backfill / rebuild after bulk loads::
+
+    python trending.py rebuild
+"""
+import argparse
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+from db import get_db
+
+HALF_LIFE_HOURS = 24.0
+VIEW_WEIGHT = 1.0
+LIKE_WEIGHT = 5.0
+
+EPOCH = datetime(2025, 1, 1)
+TAU = HALF_LIFE_HOURS * 3600 / math.log(2)
+
+FLUSH_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+# 한 번에 재계산할 영상 id 구간
+REBUILD_CHUNK = 10_000
+
+# video_id -> 아직 쓰지 않은 항들의 log-합
+_pending = {}
+_pending_lock = threading.Lock()
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+# logaddexp(a, b) = max(a, b) + ln(1 + e^-|a - b|), 첫 이벤트면 그대로
+_BUMP = """
+    UPDATE Videos
+    SET trend_score = IF(trend_score IS NULL, %s,
+                         GREATEST(trend_score, %s) + LN(1 + EXP(-ABS(trend_score - %s))))
+    WHERE video_id = %s
+"""
+
+
+def log_weight(weight, at=None):
+    """``weight`` at time ``at`` as a ``trend_score`` term."""
+    at = at or datetime.now()
+    return math.log(weight) + (at - EPOCH).total_seconds() / TAU
+
+
+def current_value(score, now=None):
+    """Decayed sum of a stored ``trend_score`` as of ``now`` (0 for NULL)."""
+    if score is None:
+        return 0.0
+    now = now or datetime.now()
+    return math.exp(score - (now - EPOCH).total_seconds() / TAU)
+
+
+def _logaddexp(a, b):
+    hi = max(a, b)
+    return hi + math.log1p(math.exp(-abs(a - b)))
+
+
+def _merge(pending):
+    with _pending_lock:
+        for video_id, x in pending.items():
+            prev = _pending.get(video_id)
+            _pending[video_id] = x if prev is None else _logaddexp(prev, x)
+
+
+def record(video_id, weight, at=None):
+    """Count one committed event towards the next flush."""
+    _merge({int(video_id): log_weight(weight, at)})
+
+
+def record_view(video_id, at=None):
+    record(video_id, VIEW_WEIGHT, at)
+
+
+def record_like(video_id, at=None):
+    record(video_id, LIKE_WEIGHT, at)
+
+
+def flush():
+    """Write the buffered terms; returns the number of videos updated."""
+    global _pending
+    with _pending_lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return 0
+
+    # id 순서로 — 여러 워커가 동시에 flush 해도 같은 순서로 잠근다
+    ids = sorted(pending)
+    conn = get_db()
+    cur = conn.cursor(compact=True)
+    try:
+        cur.executemany(_BUMP, [(pending[v], pending[v], pending[v], v) for v in ids])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        # 다음 flush 때 다시 — 그사이 쌓인 항과 합친다
+        _merge(pending)
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    return len(ids)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.exception("trending flush failed")
+
+
+def _flush_quietly():
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+def _after_fork():
+    # 자식 프로세스: 부모 버퍼는 부모가 쓴다 — 빈 버퍼, 새 락, flush 스레드 없음으로 시작
+    global _pending, _pending_lock, _flusher_pid, _flusher_lock
+    _pending = {}
+    _pending_lock = threading.Lock()
+    _flusher_pid = None
+    _flusher_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+# 자식도 물려받아 각자 자기 버퍼를 쓴다
+atexit.register(_flush_quietly)
+
+
+def _ensure_flusher():
+    """Start this process' flush thread (once per PID; a forked child has none)."""
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid == pid:
+        return
+    with _flusher_lock:
+        if _flusher_pid == pid:
+            return
+        threading.Thread(target=_flush_loop, name="trending-flush", daemon=True).start()
+        _flusher_pid = pid
+
+
+def init_app(app):
+    # preload 된 마스터에서 띄우면 fork 된 워커에는 스레드가 없다 — 요청을 받는 프로세스에서 띄운다
+    app.before_request(_ensure_flusher)
+
+
+def rebuild(now=None):
+    """Recompute every score from ``WatchHistory`` / ``VideoLikes``.
+
+    ``WatchHistory`` keeps one row per (user, video), so a rebuild counts
+    each viewer once at their latest watch. Returns the size of the
+    video id range processed.
+    """
+    now = now or datetime.now()
+    offset = (now - EPOCH).total_seconds() / TAU
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("SELECT MIN(video_id) AS lo, MAX(video_id) AS hi FROM Videos")
+        bounds = cur.fetchone()
+        if bounds["lo"] is None:
+            return 0
+        for first in range(bounds["lo"], bounds["hi"] + 1, REBUILD_CHUNK):
+            last = first + REBUILD_CHUNK - 1
+            # 지수는 now 기준(<= 0)으로 계산해 넘치지 않게 하고, 끝에서 EPOCH 기준으로 되돌린다.
+            # 아주 오래된 이벤트만 있으면 합이 0이 되어 LN이 NULL — 점수 없음과 같다
+            cur.execute("""
+                UPDATE Videos v
+                LEFT JOIN (
+                    SELECT e.video_id, LN(SUM(e.w * EXP(TIMESTAMPDIFF(SECOND, %s, e.t) / %s))) AS s
+                    FROM (
+                        SELECT video_id, watched_at AS t, %s AS w
+                        FROM WatchHistory WHERE video_id BETWEEN %s AND %s
+                        UNION ALL
+                        SELECT video_id, created_at, %s
+                        FROM VideoLikes WHERE is_dislike = 0 AND video_id BETWEEN %s AND %s
+                    ) e
+                    GROUP BY e.video_id
+                ) agg ON agg.video_id = v.video_id
+                SET v.trend_score = agg.s + %s
+                WHERE v.video_id BETWEEN %s AND %s
+            """, (now, TAU, VIEW_WEIGHT, first, last, LIKE_WEIGHT, first, last, offset, first, last))
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    return bounds["hi"] - bounds["lo"] + 1
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild", help="recompute trend_score from WatchHistory / VideoLikes")
+    args = ap.parse_args()
+
+    if args.cmd == "rebuild":
+        n = rebuild()
+        print(f"rebuilt trend_score ({n} video ids)")
+
+
+if __name__ == "__main__":
+    main()